@@ -0,0 +1,36 @@
+from fastapi import HTTPException
+from fastapi.responses import PlainTextResponse
+from core.services.drone_manager import DroneManager
+from core.services.metrics import metrics_registry
+from core.services.profiler import profiler
+import utils.exceptions as exceptions
+
+class AdminController:
+    def get_metrics(self):
+        """Obtém as métricas no formato de exposição do Prometheus"""
+        return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+    
+    def profile(self, target: str, duration: float, interval: float, include_idle: bool):
+        """Executa um perfil por amostragem e retorna as pilhas no formato collapsed (flamegraph)"""
+        try:
+            stacks = profiler.profile(target, duration, interval, include_idle)
+        except exceptions.ProfilerBusyException as e:
+            raise HTTPException(status_code=409, detail={"response": str(e), 
+                                                    "type": e.__class__.__name__})
+        return PlainTextResponse(stacks)
+    
+    def get_ingest(self):
+        """Profundidade e descartes das filas de ingestão de cada drone"""
+        drone_manager = DroneManager()
+        with drone_manager._lock:
+            drones = list(drone_manager.drones.items())
+        return {"workers": drone_manager.ingest.workers, "pending_drones": drone_manager.ingest.pending(),
+                "queues": {cs: drone.message_queue.stats() for cs, drone in drones}}
+    
+    def get_telemetry_export(self):
+        """Estado da exportação de telemetria em memória compartilhada"""
+        export = DroneManager().telemetry_export
+        if export is None:
+            raise HTTPException(status_code=404, detail={"response": "Telemetry export is disabled (set TELEMETRY_EXPORT_PATH)",
+                                                         "type": "TelemetryExportDisabled"})
+        return export.stats()
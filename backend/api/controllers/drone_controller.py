@@ -1,15 +1,23 @@
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 from core.services.drone_manager import DroneManager
+from core.models.geometry import Point
+from api.responses import VersionedResponseCache, conditional_response, event_stream_response, json_response
+from core.models.telemetry.telemetry_history import HISTORY_FIELDS
+from core.parameters.parameter_snapshots import ParameterSnapshot, diff_snapshots
+from core.parameters.parameter_definitions import get_parameter_definition_index
+from core.mavlink.stream_rates import DEMAND_LEVELS, DEMAND_OVERVIEW
+from core.mavlink.mission import MissionItem
 import utils.exceptions as exceptions
 
 class DroneController:
     def __init__(self):
         self.drone_manager = DroneManager()
+        self.response_cache = VersionedResponseCache()
     
-    def connect(self, connection_string: str):
+    def connect(self, connection_string: str, origin: Point = None):
         """Conecta ao drone usando a string de conexão fornecida"""
         try:
-            self.drone_manager.connect_drone(connection_string)
+            self.drone_manager.connect_drone(connection_string, origin)
             return {"message": "Connected to drone"}
         except Exception as e:
             raise HTTPException(status_code=500, detail="Could not connect to drone")
@@ -18,10 +26,14 @@ class DroneController:
         """Desconecta do drone"""
         drone = self.drone_manager.get_drone(connection_string)
         if drone is None:
+            if self.drone_manager.close_shared_link(connection_string):
+                return {"message": "Disconnected from link"}
             raise HTTPException(status_code=404, detail="Drone not connected")
         
         drone.disconnect()
         self.drone_manager.remove_drone(connection_string)
+        self.response_cache.discard(("drone_info", connection_string))
+        self.response_cache.discard(("drone_parameters", connection_string))
         return {"message": "Disconnected from drone"}
     
     def arm(self, connection_string: str):
@@ -128,22 +140,324 @@ class DroneController:
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     
-    def get_drone_info(self, connection_string: str):
+    def get_drone_info(self, connection_string: str, if_none_match: str = None, accept_encoding: str = None):
         """Obtém informações sobre o drone"""
         drone = self.drone_manager.get_drone(connection_string)
         if drone is None:
             raise HTTPException(status_code=404, detail="Drone not connected")
         
-        return drone.get_drone_info()
+        entry = self.response_cache.get(("drone_info", connection_string), 
+                                        drone.telemetry_version, drone.get_drone_info)
+        drone.latency.record_served("drone_info")
+        # Estar sendo consultado já é demanda de visão geral
+        drone.stream_rates.watch("api", DEMAND_OVERVIEW)
+        return conditional_response(entry, if_none_match, accept_encoding)
     
-    def get_all_drones_info(self):
+    def get_all_drones_info(self, if_none_match: str = None, accept_encoding: str = None):
         """Obtém informações sobre todos os drones conectados"""
-        return self.drone_manager.get_all_drones_info()
+        entry = self.response_cache.get("drones_info", self.drone_manager.get_telemetry_versions(), 
+                                        self.drone_manager.get_all_drones_info)
+        with self.drone_manager._lock:
+            drones = list(self.drone_manager.drones.values())
+        for drone in drones:
+            drone.latency.record_served("drones_info")
+            drone.stream_rates.watch("api", DEMAND_OVERVIEW)
+        return conditional_response(entry, if_none_match, accept_encoding)
     
-    def get_drone_parameters(self, connection_string: str):
+    def watch(self, connection_string: str, client_id: str, level: str):
+        """Registra que um cliente está assistindo o drone, ajustando as taxas de telemetria"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        try:
+            return drone.watch(client_id, DEMAND_LEVELS[level])
+        except exceptions.DroneNotConnectedException as e:
+            raise HTTPException(status_code=400, detail={"response": str(e), 
+                                                    "type": e.__class__.__name__})
+    
+    def unwatch(self, connection_string: str, client_id: str):
+        """Remove a demanda de um cliente; as taxas caem na próxima revisão"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        drone.stream_rates.unwatch(client_id)
+        return drone.stream_rates.status()
+    
+    def upload_mission(self, connection_string: str, items: list):
+        """Envia uma missão (lista de itens) para o drone, substituindo a atual"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        try:
+            result = drone.upload_mission([MissionItem(**item) for item in items])
+            return {"message": "Mission uploaded", **result}
+        except exceptions.MissionTransferBusyException as e:
+            raise HTTPException(status_code=409, detail={"response": str(e), 
+                                                    "type": e.__class__.__name__})
+        except (exceptions.DroneNotConnectedException, exceptions.ACKTimeoutException, 
+                exceptions.CommandFailedException) as e:
+            raise HTTPException(status_code=400, detail={"response": str(e), 
+                                                    "type": e.__class__.__name__})
+    
+    def download_mission(self, connection_string: str):
+        """Baixa a missão armazenada no drone"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        try:
+            items = drone.download_mission()
+        except exceptions.MissionTransferBusyException as e:
+            raise HTTPException(status_code=409, detail={"response": str(e), 
+                                                    "type": e.__class__.__name__})
+        except (exceptions.DroneNotConnectedException, exceptions.ACKTimeoutException) as e:
+            raise HTTPException(status_code=400, detail={"response": str(e), 
+                                                    "type": e.__class__.__name__})
+        return json_response({"items": [item.to_dict() for item in items]})
+    
+    def clear_mission(self, connection_string: str):
+        """Apaga a missão armazenada no drone"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        try:
+            drone.clear_mission()
+            return {"message": "Mission cleared"}
+        except exceptions.MissionTransferBusyException as e:
+            raise HTTPException(status_code=409, detail={"response": str(e), 
+                                                    "type": e.__class__.__name__})
+        except (exceptions.DroneNotConnectedException, exceptions.ACKTimeoutException, 
+                exceptions.CommandFailedException) as e:
+            raise HTTPException(status_code=400, detail={"response": str(e), 
+                                                    "type": e.__class__.__name__})
+    
+    def mission_progress(self, connection_string: str, follow: bool, request: Request):
+        """Stream (SSE) do andamento da transferência de missão"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        # Sem follow, o stream termina junto com a transferência atual
+        until = None if follow else (lambda event: event["state"] != "running")
+        return event_stream_response(request, drone.mission.events, [drone.mission.progress()], until,
+                                     served=lambda event: drone.latency.record_served("mission_events"))
+    
+    def add_forwarding(self, connection_string: str, output: str):
+        """Encaminha o tráfego MAVLink do drone para uma saída externa (outro GCS)"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        try:
+            drone.forwarding.add_output(output)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except OSError as e:
+            raise HTTPException(status_code=502, detail=f"Could not open output {output}: {e}")
+        return {"outputs": drone.forwarding.stats()}
+    
+    def remove_forwarding(self, connection_string: str, output: str):
+        """Para de encaminhar o tráfego do drone para a saída"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        if not drone.forwarding.remove_output(output):
+            raise HTTPException(status_code=404, detail="Forwarding output not found")
+        return {"outputs": drone.forwarding.stats()}
+    
+    def get_link(self, connection_string: str):
+        """Estado do enlace do drone segundo o supervisor de enlaces"""
+        drone = self.drone_manager.get_drone(connection_string)
+        status = self.drone_manager.link_supervisor.status(drone) if drone is not None else None
+        if status is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        return status
+    
+    def get_outbound(self, connection_string: str):
+        """Estatísticas do escritor da conexão do drone"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None or drone.outbound is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        return drone.outbound.stats()
+    
+    def set_outbound_budget(self, connection_string: str, bytes_per_second: float):
+        """Ajusta o orçamento de bytes do enlace (compartilhado por todos os veículos dele)"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None or drone.outbound is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        drone.outbound.set_budget(bytes_per_second)
+        return drone.outbound.stats()
+    
+    def get_forwarding(self, connection_string: str):
+        """Saídas de encaminhamento do drone e seus contadores"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        return {"outputs": drone.forwarding.stats()}
+    
+    def get_drone_parameters(self, connection_string: str, if_none_match: str = None, accept_encoding: str = None):
         """Obtém todos os parâmetros do drone"""
         drone = self.drone_manager.get_drone(connection_string)
         if drone is None:
             raise HTTPException(status_code=404, detail="Drone not connected")
         
-        return drone.get_all_parameters()
\ No newline at end of file
+        try:
+            entry = self.response_cache.get(("drone_parameters", connection_string), 
+                                            drone.drone_parameters.version, drone.get_all_parameters)
+        except exceptions.DroneNotConnectedException as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return conditional_response(entry, if_none_match, accept_encoding)
+    
+    def get_drone_history(self, connection_string: str, window: float, points: int, 
+                          fields: str = None, accept_encoding: str = None):
+        """Obtém o histórico recente de telemetria, reduzido para a quantidade de pontos pedida"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        field_list = [field.strip() for field in fields.split(",")] if fields else list(HISTORY_FIELDS)
+        unknown_fields = [field for field in field_list if field not in HISTORY_FIELDS]
+        if unknown_fields:
+            raise HTTPException(status_code=400, detail=f"Unknown history fields: {', '.join(unknown_fields)}")
+        
+        return json_response(drone.get_history(window, points, field_list), accept_encoding)
+    
+    def get_drone_track(self, connection_string: str, zoom: int, since: int = 0, accept_encoding: str = None):
+        """Obtém a trajetória do drone simplificada para o nível de zoom"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        return json_response(drone.flight_track.get_track(zoom, since), accept_encoding)
+    
+    def search_parameters(self, connection_string: str, query: str = "", mode: str = "auto", 
+                          page: int = 1, page_size: int = 50):
+        """Busca parâmetros do drone, juntando os valores atuais com as suas definições"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        try:
+            parameters = drone.get_all_parameters()
+        except exceptions.DroneNotConnectedException as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        index = get_parameter_definition_index()
+        names = index.rank(list(parameters), query, mode)
+        
+        start = (page - 1) * page_size
+        return {
+            "query": query,
+            "total": len(names),
+            "page": page,
+            "page_size": page_size,
+            "results": [index.describe(name, parameters[name]) for name in names[start:start + page_size]]
+        }
+    
+    def search_parameter_definitions(self, query: str = "", mode: str = "auto", 
+                                     page: int = 1, page_size: int = 50):
+        """Busca nas definições de parâmetros, sem depender de um drone conectado"""
+        index = get_parameter_definition_index()
+        names = index.rank(index.definitions.keys(), query, mode)
+        
+        start = (page - 1) * page_size
+        return {
+            "query": query,
+            "total": len(names),
+            "page": page,
+            "page_size": page_size,
+            "results": [index.describe(name) for name in names[start:start + page_size]]
+        }
+    
+    def take_parameter_snapshot(self, connection_string: str, label: str = None):
+        """Registra um snapshot dos parâmetros atuais do drone"""
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        try:
+            parameters = drone.get_all_parameters()
+        except exceptions.DroneNotConnectedException as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        session_id = drone.flight_logger.session_id if drone.flight_logger else None
+        snapshot = self.drone_manager.snapshot_store.take(connection_string, parameters,
+                                                          session_id=session_id, label=label)
+        return snapshot.metadata()
+    
+    def get_parameter_snapshots(self, connection_string: str):
+        """Lista os snapshots de parâmetros registrados para o drone"""
+        return {"snapshots": self.drone_manager.snapshot_store.list(connection_string)}
+    
+    def get_parameter_snapshot(self, connection_string: str, snapshot_id: str):
+        """Obtém os valores de um snapshot de parâmetros"""
+        snapshot = self.drone_manager.snapshot_store.get(connection_string, snapshot_id)
+        if snapshot is None:
+            raise HTTPException(status_code=404, detail="Snapshot not found")
+        
+        return {**snapshot.metadata(), "parameters": snapshot.to_parameters()}
+    
+    def get_parameter_diff(self, connection_string: str, against: str, base: str = "live"):
+        """Compara os parâmetros do drone (ou de um snapshot) com um snapshot ou outro drone"""
+        snapshot_a = self.__resolve_parameter_source(connection_string, base)
+        snapshot_b = self.__resolve_parameter_source(connection_string, against, reference=snapshot_a)
+        
+        return {"a": base, "b": against, **diff_snapshots(snapshot_a, snapshot_b)}
+    
+    def audit_fleet_parameters(self, connection_string: str):
+        """Compara os parâmetros de todos os drones conectados com os do drone de referência"""
+        reference = self.__resolve_parameter_source(connection_string, "live")
+        
+        with self.drone_manager._lock:
+            drones = list(self.drone_manager.drones.items())
+        
+        results = {}
+        for other_connection_string, drone in drones:
+            if other_connection_string == connection_string or not drone.connected:
+                continue
+            
+            snapshot = ParameterSnapshot.from_parameters(drone.drone_parameters.get_parameters(), 
+                                                         other_connection_string, previous=reference)
+            diff = diff_snapshots(reference, snapshot)
+            results[other_connection_string] = {
+                "difference_count": diff["difference_count"],
+                "changed": sorted(diff["changed"].keys()),
+                "missing": sorted(diff["only_in_a"].keys()),
+                "extra": sorted(diff["only_in_b"].keys())
+            }
+        
+        return {"reference": connection_string, "drones": results}
+    
+    def __resolve_parameter_source(self, connection_string: str, source: str, 
+                                   reference: ParameterSnapshot = None) -> ParameterSnapshot:
+        """
+            Converte a origem de uma comparação em um snapshot:
+            "live" (drone atual), "snapshot:<id>" ou "drone:<connection_string>"
+        """
+        if source == "live":
+            target_connection_string = connection_string
+        elif source.startswith("drone:"):
+            target_connection_string = source[len("drone:"):].replace("+", "/")
+        elif source.startswith("snapshot:"):
+            snapshot = self.drone_manager.snapshot_store.get(connection_string, source[len("snapshot:"):])
+            if snapshot is None:
+                raise HTTPException(status_code=404, detail="Snapshot not found")
+            return snapshot
+        else:
+            raise HTTPException(status_code=400, detail=f"Invalid parameter source '{source}'")
+        
+        drone = self.drone_manager.get_drone(target_connection_string)
+        if drone is None:
+            raise HTTPException(status_code=404, detail="Drone not connected")
+        
+        # Compartilha buckets com a referência (ou com o último snapshot do próprio drone),
+        # assim a comparação pula tudo o que for idêntico
+        previous = reference or self.drone_manager.snapshot_store.latest(target_connection_string)
+        return ParameterSnapshot.from_parameters(drone.drone_parameters.get_parameters(), 
+                                                 target_connection_string, previous=previous)
\ No newline at end of file
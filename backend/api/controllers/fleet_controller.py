@@ -0,0 +1,171 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from fastapi import HTTPException, Request
+from api.responses import event_stream_response, json_response
+from core.services.drone_manager import DroneManager
+from core.services.geofence import Geofence
+from core.services.fleet_health import HealthRule
+import utils.exceptions as exceptions
+
+# Cada comando pode ficar bloqueado até o timeout do ACK; com uma thread por drone
+# a latência total fica próxima de um único round trip
+BATCH_MAX_WORKERS = 64
+
+BATCH_COMMANDS = ("arm", "takeoff", "set_mode", "land")
+
+class FleetController:
+    def __init__(self):
+        self.drone_manager = DroneManager()
+        self.executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix="fleet-command")
+    
+    def execute_batch(self, connection_strings: List[str], command: str, height: float = None, mode: str = None):
+        """Envia o mesmo comando para vários drones em paralelo e retorna o resultado de cada um"""
+        if command not in BATCH_COMMANDS:
+            raise HTTPException(status_code=400, detail=f"Unknown command '{command}'")
+        if command == "takeoff" and height is None:
+            raise HTTPException(status_code=400, detail="Takeoff requires a height")
+        if command == "set_mode" and not mode:
+            raise HTTPException(status_code=400, detail="set_mode requires a mode")
+        
+        connection_strings = list(dict.fromkeys(cs.replace("+", "/") for cs in connection_strings))
+        
+        start_time = time.time()
+        futures = {
+            connection_string: self.executor.submit(self.__execute, connection_string, command, height, mode)
+            for connection_string in connection_strings
+        }
+        results = {connection_string: future.result() for connection_string, future in futures.items()}
+        
+        return {
+            "command": command,
+            "results": results,
+            "succeeded": sum(1 for result in results.values() if result["success"]),
+            "failed": sum(1 for result in results.values() if not result["success"]),
+            "elapsed_seconds": time.time() - start_time
+        }
+    
+    def __execute(self, connection_string: str, command: str, height: float, mode: str) -> dict:
+        start_time = time.time()
+        
+        drone = self.drone_manager.get_drone(connection_string)
+        if drone is None:
+            return {"success": False, "status_code": 404, "response": "Drone not connected",
+                    "type": None, "elapsed_seconds": 0}
+        
+        try:
+            if command == "arm":
+                drone.arm()
+                message = "Arming"
+            elif command == "takeoff":
+                drone.takeoff(height)
+                message = "Taking off"
+            elif command == "set_mode":
+                drone.set_mode(mode)
+                message = f"Setting mode to {mode}"
+            else:
+                drone.land()
+                message = "Landing"
+            
+            return {"success": True, "status_code": 200, "response": message, 
+                    "type": None, "elapsed_seconds": time.time() - start_time}
+        except (exceptions.DroneNotConnectedException, exceptions.ACKTimeoutException, 
+                exceptions.CommandFailedException, ValueError) as e:
+            return {"success": False, "status_code": 400, "response": str(e), 
+                    "type": e.__class__.__name__, "elapsed_seconds": time.time() - start_time}
+        except Exception as e:
+            return {"success": False, "status_code": 500, "response": "Unknown error", 
+                    "type": e.__class__.__name__, "elapsed_seconds": time.time() - start_time}
+
+    
+    def get_tracks(self, zoom: int, accept_encoding: str = None):
+        """Obtém as trajetórias simplificadas de todos os drones conectados"""
+        with self.drone_manager._lock:
+            drones = list(self.drone_manager.drones.items())
+        
+        return json_response({connection_string: drone.flight_track.get_track(zoom) 
+                              for connection_string, drone in drones}, accept_encoding)
+    
+    def get_replays(self):
+        """Obtém o andamento e a vazão dos replays de voos gravados"""
+        return {"replays": self.drone_manager.get_replays()}
+    
+    def get_links(self):
+        """Obtém os enlaces compartilhados (vários veículos em um socket) e seus veículos"""
+        return {"links": self.drone_manager.get_links()}
+    
+    def get_link_status(self):
+        """Estado, perda de pacotes e RTT do enlace de cada drone"""
+        return {"links": self.drone_manager.link_supervisor.links()}
+    
+    def get_proximity(self, connection_string: str, radius: float):
+        """Drones a até `radius` metros do drone informado"""
+        try:
+            drones = self.drone_manager.get_proximity(connection_string, radius)
+        except exceptions.DroneNotConnectedException:
+            raise HTTPException(status_code=404, detail="Drone not connected or without position")
+        return {"connection_string": connection_string, "radius": radius, "drones": drones}
+    
+    def get_nearest(self, x: float, y: float, z: float, count: int):
+        """Drones mais próximos de um ponto (coordenadas do mundo NED, em metros)"""
+        return {"drones": self.drone_manager.proximity.nearest(x, y, z, count)}
+    
+    def get_separation(self):
+        """Alertas de separação ativos"""
+        proximity = self.drone_manager.proximity
+        return {"separation": proximity.separation, "hysteresis": proximity.hysteresis, 
+                "alerts": proximity.alerts()}
+    
+    def stream_events(self, request: Request):
+        """Stream (SSE) dos eventos da frota, começando pelos alertas ativos"""
+        active = [{"type": "separation_alert", **alert} for alert in self.drone_manager.proximity.alerts()]
+        active += [{"type": "geofence_breach", **breach} for breach in self.drone_manager.geofences.breaches()]
+        return event_stream_response(request, self.drone_manager.fleet_events, active, served=self._record_served)
+    
+    def _record_served(self, event: dict):
+        """Idade da telemetria dos drones citados num evento entregue pelo stream da frota"""
+        names = event.get("drones") or [event.get("connection_string")]
+        for name in names:
+            drone = self.drone_manager.get_drone(name) if name else None
+            if drone is not None:
+                drone.latency.record_served("fleet_events")
+    
+    def get_geofences(self):
+        """Cercas configuradas e as violações ativas"""
+        geofences = self.drone_manager.geofences
+        return {"geofences": [fence.to_dict() for fence in geofences.fences()], 
+                "breaches": geofences.breaches()}
+    
+    def add_geofence(self, fence: dict):
+        """Adiciona uma cerca, avaliada para todos os drones a cada posição recebida"""
+        try:
+            return self.drone_manager.geofences.add(Geofence(**fence)).to_dict()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    def remove_geofence(self, fence_id: int):
+        """Remove uma cerca (as violações dela são encerradas)"""
+        if not self.drone_manager.geofences.remove(fence_id):
+            raise HTTPException(status_code=404, detail="Geofence not found")
+        return {"message": "Geofence removed"}
+    
+    def get_health(self, sort: str, descending: bool, status: str = None, search: str = None,
+                   limit: int = None, accept_encoding: str = None):
+        """Tabela de saúde da frota, ordenada e filtrada"""
+        try:
+            table = self.drone_manager.health.table(sort, descending, status, search, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return json_response(table, accept_encoding)
+    
+    def get_health_rules(self):
+        """Regras de limite usadas na avaliação de saúde"""
+        return {"rules": self.drone_manager.health.rules_as_dicts()}
+    
+    def set_health_rules(self, rules: List[dict]):
+        """Substitui as regras de limite (valem a partir da próxima avaliação)"""
+        try:
+            self.drone_manager.health.set_rules([HealthRule(**rule) for rule in rules])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return self.get_health_rules()
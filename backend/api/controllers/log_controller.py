@@ -1,8 +1,9 @@
 import os
-import json
 import gzip
+import orjson
 from fastapi import HTTPException
 import glob
+from api.responses import json_response
 
 class LogController:
     def __init__(self):
@@ -54,7 +55,7 @@ class LogController:
         logs.sort(key=lambda x: x["datetime"], reverse=True)
         return {"logs": logs}
     
-    def get_log_content(self, filename: str, max_entries: int = 1000):
+    def get_log_content(self, filename: str, max_entries: int = 1000, accept_encoding: str = None):
         """Obtém o conteúdo de um arquivo de log"""
         file_path = os.path.join(self.log_dir, filename)
         
@@ -65,15 +66,16 @@ class LogController:
             entries = []
             is_compressed = filename.endswith(".gz")
             
-            # Abrir o arquivo (comprimido ou não)
-            with gzip.open(file_path, 'rt') if is_compressed else open(file_path, 'r') as file:
+            # Abrir o arquivo (comprimido ou não) em modo binário: orjson lê bytes diretamente
+            with gzip.open(file_path, 'rb') if is_compressed else open(file_path, 'rb') as file:
                 for i, line in enumerate(file):
                     if i >= max_entries:
                         break
                     
-                    entries.append(json.loads(line.strip()))
+                    entries.append(orjson.loads(line))
             
-            return {"entries": entries, "total": len(entries), "truncated": len(entries) >= max_entries}
+            return json_response({"entries": entries, "total": len(entries), "truncated": len(entries) >= max_entries},
+                                 accept_encoding)
             
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error reading log file: {str(e)}")
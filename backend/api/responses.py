@@ -0,0 +1,179 @@
+import gzip
+import asyncio
+import uuid
+import queue
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Identifica esta execução do servidor, para que ETags de antes de um restart não sejam aceitas
+BOOT_ID = uuid.uuid4().hex[:8]
+
+# Corpos menores que isso não compensam o custo de comprimir
+COMPRESSION_THRESHOLD = 1024  # bytes
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def make_etag(version: Any) -> str:
+    """Gera uma ETag a partir de uma versão (int) ou de uma combinação de versões"""
+    if not isinstance(version, int):
+        version = hashlib.blake2b(repr(version).encode(), digest_size=8).hexdigest()
+    return f'"{BOOT_ID}-{version}"'
+
+
+def serialize(data: Any) -> bytes:
+    """Serializa direto para bytes, sem passar pelo jsonable_encoder do FastAPI"""
+    return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+def choose_encoding(accept_encoding: Optional[str], size: int) -> str:
+    """Escolhe a codificação de conteúdo suportada pelo cliente (br > gzip > identity)"""
+    if not accept_encoding or size < COMPRESSION_THRESHOLD:
+        return "identity"
+
+    accepted = {token.split(";")[0].strip().lower() for token in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+
+def encode(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+class CachedBody:
+    """Corpo serializado de uma versão, com as variantes comprimidas geradas sob demanda"""
+    __slots__ = ('etag', 'body', 'encoded')
+
+    def __init__(self, etag: str, body: bytes):
+        self.etag = etag
+        self.body = body
+        self.encoded: Dict[str, bytes] = {"identity": body}
+
+    def get(self, encoding: str) -> bytes:
+        encoded = self.encoded.get(encoding)
+        if encoded is None:
+            encoded = encode(self.body, encoding)
+            self.encoded[encoding] = encoded
+        return encoded
+
+
+class VersionedResponseCache:
+    """
+        Guarda o corpo JSON já serializado (e comprimido) de cada recurso junto com a
+        versão que o gerou. Leituras repetidas da mesma versão custam apenas uma consulta
+        ao dicionário.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, CachedBody] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Any, render: Callable[[], Any]) -> CachedBody:
+        etag = make_etag(version)
+        entry = self._entries.get(key)
+        if entry is not None and entry.etag == etag:
+            return entry
+
+        entry = CachedBody(etag, serialize(render()))
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+def _encoded_response(body: bytes, encoding: str, headers: dict) -> Response:
+    headers["Vary"] = "Accept-Encoding"
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def conditional_response(entry: CachedBody, if_none_match: Optional[str] = None,
+                         accept_encoding: Optional[str] = None) -> Response:
+    """Responde 304 se o cliente já tem a versão atual, senão o corpo serializado"""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if if_none_match is not None and entry.etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    encoding = choose_encoding(accept_encoding, len(entry.body))
+    return _encoded_response(entry.get(encoding), encoding, headers)
+
+
+def json_response(data: Any, accept_encoding: Optional[str] = None) -> Response:
+    """Resposta JSON rápida (orjson + compressão) para recursos sem versão"""
+    body = serialize(data)
+    encoding = choose_encoding(accept_encoding, len(body))
+    return _encoded_response(encode(body, encoding), encoding, {})
+
+
+# Intervalo entre comentários de keep-alive em streams de eventos, para proxies não fecharem a conexão
+SSE_KEEPALIVE = 15.0  # segundos
+# Intervalo entre verificações da fila do assinante (e da desconexão do cliente)
+SSE_POLL_INTERVAL = 0.1  # segundos
+
+
+def _sse_event(event: dict) -> bytes:
+    return b"event: " + event["type"].encode() + b"\ndata: " + serialize(event) + b"\n\n"
+
+
+def event_stream_response(request: Request, broadcaster, initial: Optional[list] = None,
+                          until: Optional[Callable[[dict], bool]] = None,
+                          served: Optional[Callable[[dict], None]] = None) -> StreamingResponse:
+    """
+        Server-Sent Events a partir de um EventBroadcaster. `initial` são eventos enviados
+        logo na abertura (o estado atual); `until` encerra o stream após o evento que o satisfizer.
+        `served` é chamado com cada evento entregue (ex.: para o traçado de latência).
+        O gerador é assíncrono e espera com asyncio.sleep: um stream aberto não ocupa uma
+        thread do threadpool que atende as rotas síncronas.
+    """
+    subscriber = broadcaster.subscribe()
+
+    async def stream():
+        try:
+            for event in initial or []:
+                yield _sse_event(event)
+                if served is not None:
+                    served(event)
+                if until is not None and until(event):
+                    return
+            idle = 0.0
+            while not await request.is_disconnected():
+                try:
+                    event = subscriber.get_nowait()
+                except queue.Empty:
+                    await asyncio.sleep(SSE_POLL_INTERVAL)
+                    idle += SSE_POLL_INTERVAL
+                    if idle >= SSE_KEEPALIVE:
+                        idle = 0.0
+                        yield b": keepalive\n\n"
+                    continue
+                idle = 0.0
+                yield _sse_event(event)
+                if served is not None:
+                    served(event)
+                if until is not None and until(event):
+                    return
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", 
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
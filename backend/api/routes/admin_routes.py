@@ -0,0 +1,30 @@
+from typing import Literal
+from fastapi import APIRouter, Query
+from api.controllers.admin_controller import AdminController
+from core.services.profiler import PROFILE_DEFAULT_INTERVAL, PROFILE_MAX_DURATION
+
+router = APIRouter(tags=["admin"])
+controller = AdminController()
+
+@router.get("/metrics")
+def metrics():
+    """Métricas de ingestão MAVLink, leitura e logs (formato Prometheus)"""
+    return controller.get_metrics()
+
+@router.get("/admin/profile")
+def profile(target: Literal["reader", "api", "all"] = "all",
+            duration: float = Query(5.0, gt=0, le=PROFILE_MAX_DURATION),
+            interval: float = Query(PROFILE_DEFAULT_INTERVAL, ge=0.001, le=1.0),
+            include_idle: bool = False):
+    """Perfil por amostragem da thread de leitura MAVLink e/ou das threads da API"""
+    return controller.profile(target, duration, interval, include_idle)
+
+@router.get("/admin/ingest")
+def ingest():
+    """Filas de ingestão MAVLink por drone (profundidade, pico e mensagens descartadas)"""
+    return controller.get_ingest()
+
+@router.get("/admin/telemetry_export")
+def telemetry_export():
+    """Região de memória compartilhada com a telemetria da frota (caminho, slots usados, escritas)"""
+    return controller.get_telemetry_export()
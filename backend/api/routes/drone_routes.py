@@ -1,15 +1,37 @@
-from fastapi import APIRouter
+from typing import List, Literal
+from fastapi import APIRouter, Query, Request
+from pydantic import BaseModel
 from api.controllers.drone_controller import DroneController
+from core.models.flight_track import TRACK_MAX_ZOOM
+from core.models.geometry import Point
 
 router = APIRouter(tags=["drones"])
 controller = DroneController()
 
+class MissionItem(BaseModel):
+    command: int
+    x: float = 0.0
+    y: float = 0.0
+    z: float = 0.0
+    frame: int = 6  # MAV_FRAME_GLOBAL_RELATIVE_ALT_INT
+    param1: float = 0.0
+    param2: float = 0.0
+    param3: float = 0.0
+    param4: float = 0.0
+    autocontinue: bool = True
+
+class Mission(BaseModel):
+    items: List[MissionItem]
+
 @router.get("/connect/{connection_string}")
-def connect(connection_string: str):
-    """Conecta ao drone usando a string de conexão fornecida"""
+def connect(connection_string: str, x: float = 0.0, y: float = 0.0, z: float = 0.0):
+    """
+        Conecta ao drone usando a string de conexão fornecida. x, y e z são a posição
+        inicial do drone no mundo (metros, NED), somada ao LOCAL_POSITION_NED dele.
+    """
     connection_string = connection_string.replace("+", "/")
     print(f"Connecting to drone with connection string: {connection_string}")
-    return controller.connect(connection_string)
+    return controller.connect(connection_string, Point(x, y, z))
 
 @router.get("/{connection_string}/arm")
 def arm(connection_string: str):
@@ -48,21 +70,157 @@ def set_parameter(connection_string: str, param_id: str, value: float):
     return controller.set_parameter(connection_string, param_id, value)
 
 @router.get("/{connection_string}/drone_info")
-def drone_info(connection_string: str):
+def drone_info(connection_string: str, request: Request):
     """Obtém informações sobre o drone"""
     connection_string = connection_string.replace("+", "/")
-    return controller.get_drone_info(connection_string)
+    return controller.get_drone_info(connection_string, request.headers.get("if-none-match"),
+                                     request.headers.get("accept-encoding"))
+
+@router.get("/{connection_string}/watch")
+def watch(connection_string: str, client_id: str, level: Literal["idle", "overview", "detail"] = "detail"):
+    """Informa que o cliente está assistindo o drone (renovar antes do watch_ttl retornado)"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.watch(connection_string, client_id, level)
+
+@router.get("/{connection_string}/unwatch")
+def unwatch(connection_string: str, client_id: str):
+    """Informa que o cliente parou de assistir o drone"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.unwatch(connection_string, client_id)
+
+@router.post("/{connection_string}/mission")
+def upload_mission(connection_string: str, mission: Mission):
+    """Envia uma missão para o drone (x/y em graus nos frames globais, em metros nos locais)"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.upload_mission(connection_string, [item.model_dump() for item in mission.items])
+
+@router.get("/{connection_string}/mission")
+def download_mission(connection_string: str):
+    """Baixa a missão armazenada no drone"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.download_mission(connection_string)
+
+@router.delete("/{connection_string}/mission")
+def clear_mission(connection_string: str):
+    """Apaga a missão armazenada no drone"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.clear_mission(connection_string)
+
+@router.get("/{connection_string}/mission/progress")
+def mission_progress(connection_string: str, request: Request, follow: bool = False):
+    """Andamento da transferência de missão como Server-Sent Events (follow=true mantém o stream aberto)"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.mission_progress(connection_string, follow, request)
+
+@router.get("/{connection_string}/link")
+def link(connection_string: str):
+    """Estado e qualidade do enlace do drone (perda de pacotes, RTT, reconexões)"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.get_link(connection_string)
+
+@router.get("/{connection_string}/outbound")
+def outbound(connection_string: str):
+    """Fila de saída do enlace por classe de prioridade (mensagens, bytes, atraso na fila)"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.get_outbound(connection_string)
+
+@router.get("/{connection_string}/outbound/budget")
+def outbound_budget(connection_string: str, bytes_per_second: float = Query(..., ge=0)):
+    """Define o orçamento de bytes/s da saída do enlace (0 = sem limite)"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.set_outbound_budget(connection_string, bytes_per_second)
+
+@router.get("/{connection_string}/forwarding")
+def forwarding(connection_string: str):
+    """Saídas para onde o tráfego MAVLink do drone é encaminhado, com frames encaminhados e descartados"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.get_forwarding(connection_string)
+
+@router.get("/{connection_string}/forward")
+def forward(connection_string: str, output: str):
+    """Encaminha o tráfego do drone para "udp:<host>:<porta>" ou "tcp:<host>:<porta>" (ex.: outro GCS)"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.add_forwarding(connection_string, output)
+
+@router.get("/{connection_string}/unforward")
+def unforward(connection_string: str, output: str):
+    """Para de encaminhar o tráfego do drone para a saída"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.remove_forwarding(connection_string, output)
 
 @router.get("/drones_info")
-def drones_info():
+def drones_info(request: Request):
     """Obtém informações sobre todos os drones conectados"""
-    return controller.get_all_drones_info()
+    return controller.get_all_drones_info(request.headers.get("if-none-match"),
+                                          request.headers.get("accept-encoding"))
 
 @router.get("/{connection_string}/drone_parameters")
-def drone_parameters(connection_string: str):
+def drone_parameters(connection_string: str, request: Request):
     """Obtém todos os parâmetros do drone"""
     connection_string = connection_string.replace("+", "/")
-    return controller.get_drone_parameters(connection_string)
+    return controller.get_drone_parameters(connection_string, request.headers.get("if-none-match"),
+                                           request.headers.get("accept-encoding"))
+
+@router.get("/{connection_string}/history")
+def drone_history(connection_string: str, request: Request, window: float = Query(600, gt=0), 
+                  points: int = Query(500, ge=3, le=5000), fields: str = None):
+    """
+        Obtém o histórico de telemetria (altitude, bateria, atitude...) dos últimos segundos.
+        O histórico guarda até 20 linhas por segundo (a última de cada 1/20 s), não cada mensagem.
+    """
+    connection_string = connection_string.replace("+", "/")
+    return controller.get_drone_history(connection_string, window, points, fields, 
+                                        request.headers.get("accept-encoding"))
+
+@router.get("/{connection_string}/track")
+def drone_track(connection_string: str, request: Request, zoom: int = Query(TRACK_MAX_ZOOM, ge=0, le=TRACK_MAX_ZOOM), 
+                since: int = Query(0, ge=0)):
+    """Obtém a trajetória simplificada do drone; `since` retorna apenas o trecho novo"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.get_drone_track(connection_string, zoom, since, request.headers.get("accept-encoding"))
+
+@router.get("/{connection_string}/parameters/search")
+def search_parameters(connection_string: str, q: str = "", mode: Literal["auto", "prefix", "fuzzy"] = "auto",
+                      page: int = Query(1, gt=0), page_size: int = Query(50, gt=0, le=500)):
+    """Busca paginada nos parâmetros do drone, com as suas definições"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.search_parameters(connection_string, q, mode, page, page_size)
+
+@router.get("/parameter_definitions")
+def search_parameter_definitions(q: str = "", mode: Literal["auto", "prefix", "fuzzy"] = "auto",
+                                 page: int = Query(1, gt=0), page_size: int = Query(50, gt=0, le=500)):
+    """Busca paginada nas definições de parâmetros"""
+    return controller.search_parameter_definitions(q, mode, page, page_size)
+
+@router.get("/{connection_string}/parameter_snapshots")
+def parameter_snapshots(connection_string: str):
+    """Lista os snapshots de parâmetros do drone"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.get_parameter_snapshots(connection_string)
+
+@router.post("/{connection_string}/parameter_snapshots")
+def take_parameter_snapshot(connection_string: str, label: str = None):
+    """Registra um snapshot dos parâmetros atuais do drone"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.take_parameter_snapshot(connection_string, label)
+
+@router.get("/{connection_string}/parameter_snapshots/{snapshot_id}")
+def parameter_snapshot(connection_string: str, snapshot_id: str):
+    """Obtém os valores de um snapshot de parâmetros"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.get_parameter_snapshot(connection_string, snapshot_id)
+
+@router.get("/{connection_string}/parameter_diff")
+def parameter_diff(connection_string: str, against: str, base: str = "live"):
+    """Compara parâmetros: live, snapshot:<id> ou drone:<connection_string>"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.get_parameter_diff(connection_string, against, base)
+
+@router.get("/{connection_string}/parameter_audit")
+def parameter_audit(connection_string: str):
+    """Compara os parâmetros da frota com os do drone de referência"""
+    connection_string = connection_string.replace("+", "/")
+    return controller.audit_fleet_parameters(connection_string)
 
 @router.get("/{connection_string}/disconnect")
 def disconnect(connection_string: str):
@@ -0,0 +1,113 @@
+import math
+from typing import List, Literal, Optional, Tuple
+from fastapi import APIRouter, Query, Request
+from pydantic import BaseModel
+from api.controllers.fleet_controller import FleetController
+from core.models.flight_track import TRACK_MAX_ZOOM
+from core.services.proximity import PROXIMITY_MAX_RADIUS
+
+router = APIRouter(prefix="/fleet", tags=["fleet"])
+controller = FleetController()
+
+class GeofenceModel(BaseModel):
+    name: str
+    kind: Literal["inclusion", "exclusion"]
+    shape: Literal["polygon", "cylinder"]
+    vertices: List[Tuple[float, float]] = []
+    center: Tuple[float, float] = (0.0, 0.0)
+    radius: float = 0.0
+    min_altitude: Optional[float] = None
+    max_altitude: Optional[float] = None
+
+class HealthRuleModel(BaseModel):
+    column: str
+    operator: Literal["<", "<=", ">", ">=", "==", "!="]
+    threshold: float
+    severity: Literal["warning", "critical"]
+    message: str
+
+class BatchCommand(BaseModel):
+    connection_strings: List[str]
+    command: Literal["arm", "takeoff", "set_mode", "land"]
+    height: Optional[float] = None
+    mode: Optional[str] = None
+
+@router.post("/commands")
+def batch_command(batch: BatchCommand):
+    """Envia um comando para vários drones ao mesmo tempo"""
+    return controller.execute_batch(batch.connection_strings, batch.command, batch.height, batch.mode)
+
+@router.get("/tracks")
+def tracks(request: Request, zoom: int = Query(TRACK_MAX_ZOOM, ge=0, le=TRACK_MAX_ZOOM)):
+    """Obtém as trajetórias simplificadas de todos os drones"""
+    return controller.get_tracks(zoom, request.headers.get("accept-encoding"))
+
+@router.get("/replays")
+def replays():
+    """Andamento dos drones virtuais que reproduzem voos gravados (conectados via "replay:<arquivo>")"""
+    return controller.get_replays()
+
+@router.get("/links")
+def links():
+    """Enlaces compartilhados (conectados via "mux:<endereço>") e os veículos descobertos em cada um"""
+    return controller.get_links()
+
+@router.get("/link_status")
+def link_status():
+    """Estado e qualidade do enlace de todos os drones"""
+    return controller.get_link_status()
+
+@router.get("/proximity")
+def proximity(connection_string: str, radius: float = Query(..., gt=0, le=PROXIMITY_MAX_RADIUS)):
+    """Drones a até `radius` metros do drone informado"""
+    return controller.get_proximity(connection_string.replace("+", "/"), radius)
+
+@router.get("/nearest")
+def nearest(x: float, y: float, z: float = 0.0, count: int = Query(1, ge=1, le=100)):
+    """Drones mais próximos de um ponto (coordenadas do mundo NED, em metros)"""
+    return controller.get_nearest(x, y, z, count)
+
+@router.get("/separation")
+def separation():
+    """Pares de drones mais próximos que a distância de separação"""
+    return controller.get_separation()
+
+@router.get("/events")
+def events(request: Request):
+    """Eventos da frota (alertas de separação, violações de cercas) como Server-Sent Events"""
+    return controller.stream_events(request)
+
+@router.get("/geofences")
+def geofences():
+    """Cercas configuradas e violações ativas"""
+    return controller.get_geofences()
+
+@router.post("/geofences")
+def add_geofence(fence: GeofenceModel):
+    """Adiciona uma cerca (x/y em metros no referencial do mundo, LOCAL_POSITION_NED somado à origem do drone; altitude = -z, sem limite se omitida)"""
+    data = fence.model_dump()
+    data["min_altitude"] = -math.inf if fence.min_altitude is None else fence.min_altitude
+    data["max_altitude"] = math.inf if fence.max_altitude is None else fence.max_altitude
+    return controller.add_geofence(data)
+
+@router.delete("/geofences/{fence_id}")
+def remove_geofence(fence_id: int):
+    """Remove uma cerca"""
+    return controller.remove_geofence(fence_id)
+
+@router.get("/health")
+def health(request: Request, sort: str = "severity", descending: bool = True,
+           status: Optional[Literal["ok", "warning", "critical"]] = None, search: Optional[str] = None,
+           limit: Optional[int] = Query(None, ge=1)):
+    """Tabela de saúde da frota (EKF, bateria, idade do link, modo, falhas de ACK), ordenada e filtrada"""
+    return controller.get_health(sort, descending, status, search, limit, request.headers.get("accept-encoding"))
+
+@router.get("/health/rules")
+def health_rules():
+    """Regras de limite da avaliação de saúde"""
+    return controller.get_health_rules()
+
+@router.put("/health/rules")
+def set_health_rules(rules: List[HealthRuleModel]):
+    """Substitui as regras de limite da avaliação de saúde"""
+    return controller.set_health_rules([rule.model_dump() for rule in rules])
@@ -1,5 +1,5 @@
 import os
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import FileResponse
 from api.controllers.log_controller import LogController
 
@@ -26,9 +26,9 @@ def download_log(filename: str):
     )
 
 @router.get("/logs/{filename}")
-def get_log_content(filename: str, max_entries: int = Query(1000, gt=0, le=10000)):
+def get_log_content(filename: str, request: Request, max_entries: int = Query(1000, gt=0, le=10000)):
     """Obtém o conteúdo de um arquivo de log"""
-    return controller.get_log_content(filename, max_entries)
+    return controller.get_log_content(filename, max_entries, request.headers.get("accept-encoding"))
 
 @router.delete("/logs/{filename}")
 def delete_log(filename: str):
@@ -0,0 +1,210 @@
+"""
+    Benchmark do caminho de resposta dos endpoints mais acessados.
+
+    Compara o caminho padrão do FastAPI (jsonable_encoder + JSONResponse) com o caminho
+    otimizado (cache por versão + orjson + compressão negociada), medindo vazão de
+    requisições e tamanho das respostas.
+
+    Uso (a partir de backend/):
+        python -m benchmarks.api_serialization --drones 20 --requests 2000
+"""
+import os
+import json
+import gzip
+import time
+import shutil
+import argparse
+import tempfile
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pymavlink import mavutil
+
+import api.responses as responses
+from core.models.drone import Drone
+from core.services.drone_manager import DroneManager
+
+
+class NullWriter:
+    def write(self, buf: bytes) -> None:
+        pass
+
+
+class BenchmarkConnection:
+    """Conexão falsa: o benchmark mede apenas o caminho HTTP"""
+    flightmode = 'GUIDED'
+    target_system = 1
+    target_component = 1
+
+    def __init__(self):
+        # A thread de leitura ajusta as taxas de stream a cada segundo; os comandos são descartados
+        self.mav = mavutil.mavlink.MAVLink(NullWriter())
+
+    def recv_match(self, *args, **kwargs):
+        return None
+
+
+def create_drones(count: int, param_count: int) -> dict:
+    manager = DroneManager()
+    encoder = mavutil.mavlink.MAVLink(None)
+    drones = {}
+    for i in range(count):
+        drone = Drone()
+        drone.connection = BenchmarkConnection()
+        drone.connected = True
+        drone.drone_parameters.set_parameters({f"PARAM_{j:04d}": float(j) * 0.5 for j in range(param_count)})
+        drone.update_info(encoder.attitude_encode(0, 0.1, -0.2, 1.5, 0, 0, 0))
+        drone.update_info(encoder.vfr_hud_encode(1.2, 1.1, 90, 50, 10.5, 0.2))
+
+        connection_string = f"127.0.0.1:{15000 + i}"
+        manager.drones[connection_string] = drone
+        drones[connection_string] = drone
+    return drones
+
+
+def create_legacy_app(manager: DroneManager, log_dir: str) -> FastAPI:
+    """Os mesmos endpoints no formato anterior: dicts passando pelo encoder genérico"""
+    app = FastAPI()
+
+    @app.get("/drones_info")
+    def drones_info():
+        return manager.get_all_drones_info()
+
+    @app.get("/{connection_string}/drone_info")
+    def drone_info(connection_string: str):
+        return manager.get_drone(connection_string).get_drone_info()
+
+    @app.get("/{connection_string}/drone_parameters")
+    def drone_parameters(connection_string: str):
+        return manager.get_drone(connection_string).get_all_parameters()
+
+    @app.get("/logs/{filename}")
+    def log_content(filename: str):
+        with gzip.open(os.path.join(log_dir, filename), 'rt') as file:
+            entries = [json.loads(line.strip()) for line in file]
+        return {"entries": entries, "total": len(entries), "truncated": False}
+
+    return app
+
+
+def measure_requests(client: TestClient, path: str, count: int, headers: dict = None, before_request=None) -> dict:
+    # O cliente de teste pede compressão por padrão; "identity" mede o corpo sem compressão
+    headers = headers or {"Accept-Encoding": "identity"}
+    size = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        if before_request is not None:
+            before_request()
+        response = client.get(path, headers=headers)
+        size = int(response.headers.get("content-length", len(response.content)))
+    elapsed = time.perf_counter() - start
+    return {"requests_per_second": count / elapsed, "response_bytes": size}
+
+
+def measure_serialization(data, iterations: int) -> dict:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        JSONResponse(jsonable_encoder(data)).body
+    legacy = (time.perf_counter() - start) / iterations
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        responses.serialize(data)
+    optimized = (time.perf_counter() - start) / iterations
+
+    body = responses.serialize(data)
+    return {
+        "legacy_us": legacy * 1e6,
+        "orjson_us": optimized * 1e6,
+        "speedup": legacy / optimized,
+        "identity_bytes": len(body),
+        "gzip_bytes": len(responses.encode(body, "gzip")),
+        "br_bytes": len(responses.encode(body, "br")) if responses.brotli is not None else None
+    }
+
+
+def write_sample_log(path: str, entries: int) -> None:
+    with gzip.open(path, 'wt') as file:
+        for i in range(entries):
+            file.write(json.dumps({
+                "timestamp": "2025-01-01T00:00:00",
+                "session_id": "benchmark",
+                "connection_string": "127.0.0.1:14550",
+                "event_type": "TELEMETRY",
+                "data": {"position": {"x": i * 0.1, "y": 0.0, "z": -1.0},
+                         "attitude": {"roll": 0.01, "pitch": 0.02, "yaw": 1.0},
+                         "battery": 90, "armed": True, "mode": "GUIDED"}
+            }) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, default=20)
+    parser.add_argument("--params", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--log-entries", type=int, default=1000)
+    parser.add_argument("--output", help="salva os resultados em JSON")
+    args = parser.parse_args()
+
+    drones = create_drones(args.drones, args.params)
+    connection_string, drone = next(iter(drones.items()))
+
+    log_dir = tempfile.mkdtemp()
+    write_sample_log(os.path.join(log_dir, "benchmark.jsonl.gz"), args.log_entries)
+
+    import main as backend_main
+    backend_main.log_routes.controller.log_dir = log_dir
+    optimized_client = TestClient(backend_main.app)
+    legacy_client = TestClient(create_legacy_app(DroneManager(), log_dir))
+
+    # Telemetria mudando a cada requisição: mede o custo sem acerto de cache
+    def bump_telemetry():
+        drone.update_info(drone_encoder.attitude_encode(0, 0.1, -0.2, time.time() % 3, 0, 0, 0))
+    drone_encoder = mavutil.mavlink.MAVLink(None)
+
+    results = {"serialization": {}, "http": {}}
+    results["serialization"]["drones_info"] = measure_serialization(DroneManager().get_all_drones_info(), 2000)
+    results["serialization"]["drone_info"] = measure_serialization(drone.get_drone_info(), 20000)
+    results["serialization"]["drone_parameters"] = measure_serialization(drone.get_all_parameters(), 200)
+
+    accept = {"Accept-Encoding": "br, gzip"}
+    paths = {
+        "drones_info": "/drones_info",
+        "drone_info": f"/{connection_string}/drone_info",
+        "drone_parameters": f"/{connection_string}/drone_parameters",
+    }
+    for name, path in paths.items():
+        results["http"][name] = {
+            "legacy": measure_requests(legacy_client, path, args.requests),
+            "optimized_changing": measure_requests(optimized_client, path, args.requests, before_request=bump_telemetry),
+            "optimized_cached": measure_requests(optimized_client, path, args.requests),
+            "optimized_compressed": measure_requests(optimized_client, path, args.requests, headers=accept),
+        }
+
+    log_requests = max(args.requests // 20, 10)
+    results["http"]["logs"] = {
+        "legacy": measure_requests(legacy_client, "/logs/benchmark.jsonl.gz", log_requests),
+        "optimized": measure_requests(optimized_client, "/logs/benchmark.jsonl.gz", log_requests),
+        "optimized_compressed": measure_requests(optimized_client, "/logs/benchmark.jsonl.gz", log_requests,
+                                                 headers=accept),
+    }
+    shutil.rmtree(log_dir)
+
+    print(f"{'payload':<20}{'legacy us':>12}{'orjson us':>12}{'speedup':>10}{'bytes':>10}{'gzip':>10}{'br':>10}")
+    for name, row in results["serialization"].items():
+        print(f"{name:<20}{row['legacy_us']:>12.1f}{row['orjson_us']:>12.1f}{row['speedup']:>9.1f}x"
+              f"{row['identity_bytes']:>10}{row['gzip_bytes']:>10}{str(row['br_bytes']):>10}")
+
+    print(f"\n{'endpoint':<20}{'variant':<24}{'req/s':>10}{'bytes':>10}")
+    for name, variants in results["http"].items():
+        for variant, row in variants.items():
+            print(f"{name:<20}{variant:<24}{row['requests_per_second']:>10.0f}{row['response_bytes']:>10}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+    Benchmark dos caminhos de comando e parâmetros contra o autopiloto falso.
+
+    Mede, pelo caminho real da estação (DroneManager.connect_drone e os métodos do Drone):
+    tempo de conexão (heartbeat + download dos parâmetros), set_parameter, arm, set_mode
+    e takeoff. Para os comandos também mede o round trip "cru" (envio até o ACK chegar
+    ao drone), que mostra quanto da latência vem das esperas por polling da estação.
+
+    Uso (a partir de backend/):
+        python -m benchmarks.commands --params 800 --iterations 20 --output commands.json
+        python -m benchmarks.commands --loss 0.02 --latency 0.05 --compare commands.json
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+from typing import Callable, Dict, List
+
+import core.mavlink.mavlink_commands as mav
+from benchmarks.fake_autopilot import DEFAULT_PARAM_COUNT, run_autopilot_process
+from core.models.drone import Drone
+from core.models.enums import MavResult
+from core.services.drone_manager import DroneManager
+
+ACK_TIMEOUT = 2.0  # segundos
+
+
+def summarize(samples: List[float], failures: int) -> dict:
+    values = sorted(samples)
+    def at(q):
+        return 1000 * values[min(int(q / 100 * len(values)), len(values) - 1)] if values else 0.0
+    return {"count": len(values), "failures": failures, "p50_ms": at(50), "p99_ms": at(99),
+            "max_ms": 1000 * values[-1] if values else 0.0}
+
+
+def measure(action: Callable[[int], None], iterations: int) -> dict:
+    samples, failures = [], 0
+    for i in range(iterations):
+        start = time.perf_counter()
+        try:
+            action(i)
+            samples.append(time.perf_counter() - start)
+        except Exception:
+            failures += 1
+    return summarize(samples, failures)
+
+
+def wait_ack(drone: Drone, field: str) -> None:
+    deadline = time.perf_counter() + ACK_TIMEOUT
+    while getattr(drone, field) == MavResult.IDLE:
+        if time.perf_counter() > deadline:
+            raise TimeoutError(field)
+        time.sleep(0.0005)
+    setattr(drone, field, MavResult.IDLE)
+
+
+def run(args) -> dict:
+    manager = DroneManager()
+    connection_string = f"127.0.0.1:{args.port}"
+    options = {"param_count": args.params, "loss": args.loss, "latency": args.latency,
+               "jitter": args.jitter, "seed": 1}
+
+    stop = multiprocessing.Event()
+    autopilot = multiprocessing.Process(target=run_autopilot_process, args=(args.port, options, stop))
+    autopilot.start()
+    results: Dict[str, dict] = {}
+    try:
+        start = time.perf_counter()
+        manager.connect_drone(connection_string)
+        drone = manager.get_drone(connection_string)
+        results["connect"] = summarize([time.perf_counter() - start], 0)
+        results["connect"]["param_count"] = drone.drone_parameters.param_count()
+
+        param_id = next(iter(drone.drone_parameters.get_parameters()))
+        results["set_parameter"] = measure(lambda i: drone.set_parameter(param_id, float(i)), args.iterations)
+
+        def arm_cycle(i):
+            drone.arm()
+            mav.disarm(drone.connection)
+            wait_ack(drone, 'armed_ack')
+        results["arm"] = measure(arm_cycle, args.iterations)
+        results["set_mode"] = measure(lambda i: drone.set_mode('GUIDED'), args.iterations)
+
+        def takeoff(i):
+            drone.arm()
+            drone.takeoff(10)
+        results["takeoff"] = measure(takeoff, args.iterations)
+
+        # Round trip sem as esperas de 100 ms do Drone
+        def raw_arm(i):
+            drone.armed_ack = MavResult.IDLE
+            mav.arm(drone.connection)
+            wait_ack(drone, 'armed_ack')
+        results["arm_raw_round_trip"] = measure(raw_arm, args.iterations)
+
+        def raw_set_mode(i):
+            drone.set_mode_ack = MavResult.IDLE
+            mav.set_mode(drone.connection, 'GUIDED')
+            wait_ack(drone, 'set_mode_ack')
+        results["set_mode_raw_round_trip"] = measure(raw_set_mode, args.iterations)
+
+        drone.disconnect()
+        manager.remove_drone(connection_string)
+    finally:
+        stop.set()
+        autopilot.join(timeout=5)
+        if autopilot.is_alive():
+            autopilot.terminate()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--params", type=int, default=DEFAULT_PARAM_COUNT)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--loss", type=float, default=0.0, help="probabilidade de perda por pacote (0-1)")
+    parser.add_argument("--latency", type=float, default=0.0, help="latência de cada sentido, em segundos")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=16500)
+    parser.add_argument("--output", help="salva os resultados em JSON")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    # Logs de voo e snapshots de parâmetros da execução ficam em um diretório temporário
+    workdir = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        results = run(args)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    base = {}
+    if baseline:
+        with open(baseline, 'r') as file:
+            base = json.load(file)["results"]
+
+    print(f"{'operation':<26}{'ok':>5}{'fail':>6}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+          + (f"{'Δp50 ms':>10}" if base else ""))
+    for name, row in results.items():
+        line = (f"{name:<26}{row['count']:>5}{row['failures']:>6}{row['p50_ms']:>10.1f}"
+                f"{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}")
+        if name in base:
+            line += f"{row['p50_ms'] - base[name]['p50_ms']:>+10.1f}"
+        print(line)
+
+    if output:
+        with open(output, 'w') as file:
+            json.dump({"options": vars(args), "results": results}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,384 @@
+"""
+    Autopiloto falso, em Python puro, para medir os caminhos de comando e parâmetros sem SITL.
+
+    Fala o suficiente de MAVLink para a estação: HEARTBEAT com o mapeamento de modos do
+    ArduCopter, tabela de parâmetros (PARAM_REQUEST_LIST/READ/SET), COMMAND_LONG ->
+    COMMAND_ACK (arm/disarm, takeoff, DO_SET_MODE, SET_MESSAGE_INTERVAL), protocolo de
+    missão (upload, download e clear) e telemetria nas taxas pedidas. O enlace pode simular
+    perda de pacotes, latência e a banda de um rádio (ex.: 5760 bytes/s em 57600 baud).
+
+    Uso (a partir de backend/), para conectar a estação em 127.0.0.1:14550:
+        python -m benchmarks.fake_autopilot --port 14550 --params 800 --loss 0.01 --latency 0.05
+"""
+import time
+import heapq
+import random
+import socket
+import argparse
+import threading
+from typing import Dict, List, Optional, Tuple
+from pymavlink import mavutil
+
+from benchmarks.synthetic_fleet import DEFAULT_RATES, GUIDED_MODE, SyntheticVehicle
+
+mavlink = mavutil.mavlink
+
+DEFAULT_PARAM_COUNT = 800
+DEFAULT_PARAM_RATE = 1000  # PARAM_VALUE/s durante o download completo
+MISSION_REQUEST_TIMEOUT = 1.0  # segundos até pedir de novo um item de missão que não chegou
+TAKEOFF_MODES = {GUIDED_MODE}
+
+# Mensagens que a estação pode pedir via SET_MESSAGE_INTERVAL
+STREAMABLE_MESSAGES = set(DEFAULT_RATES) | {'NAV_CONTROLLER_OUTPUT'}
+
+
+def build_parameter_table(count: int, seed: int = 0) -> Dict[str, float]:
+    """Nomes reais do ArduPilot (das definições, se disponíveis) completados com nomes sintéticos"""
+    from core.parameters.parameter_definitions import get_parameter_definition_index
+
+    rng = random.Random(seed)
+    names = sorted(name for name in get_parameter_definition_index().definitions if len(name) <= 16)
+    names = names[:count] + [f"FAKE_PARAM_{i:04d}" for i in range(max(count - len(names), 0))]
+    return {name: float(round(rng.uniform(0, 100), 2)) for name in names}
+
+
+class LinkEmulator:
+    """
+        "Arquivo" de saída do MAVLink que simula o rádio: descarta pacotes com
+        probabilidade `loss` e entrega os demais após `latency` (+ jitter) segundos.
+        Com `bandwidth` (bytes/s) os pacotes também esperam a vez de serem transmitidos.
+    """
+
+    def __init__(self, sock: socket.socket, address: Tuple[str, int], loss: float = 0.0,
+                 latency: float = 0.0, jitter: float = 0.0, rng: random.Random = None,
+                 bandwidth: float = None):
+        self.sock = sock
+        self.address = address
+        self.loss = loss
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.rng = rng or random.Random()
+        self._pending: List[Tuple[float, int, bytes]] = []
+        self._sequence = 0
+        self._busy_until = 0.0
+
+    @property
+    def delayed(self) -> bool:
+        return bool(self.latency or self.jitter or self.bandwidth)
+
+    def delay(self) -> float:
+        return self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def arrival(self, size: int, busy_until: float) -> Tuple[float, float]:
+        """(instante de chegada, fim da transmissão) de um pacote que entra no rádio agora"""
+        sent = time.monotonic()
+        if self.bandwidth:
+            sent = max(sent, busy_until) + size / self.bandwidth
+        return sent + self.delay(), sent
+
+    def dropped(self) -> bool:
+        return self.loss > 0 and self.rng.random() < self.loss
+
+    def write(self, buf: bytes) -> None:
+        if self.dropped():
+            return
+        if not self.delayed:
+            self._send(buf)
+            return
+        due, self._busy_until = self.arrival(len(buf), self._busy_until)
+        self._sequence += 1
+        heapq.heappush(self._pending, (due, self._sequence, buf))
+
+    def flush(self, now: float) -> None:
+        while self._pending and self._pending[0][0] <= now:
+            self._send(heapq.heappop(self._pending)[2])
+
+    def next_due(self) -> Optional[float]:
+        return self._pending[0][0] if self._pending else None
+
+    def _send(self, buf: bytes) -> None:
+        try:
+            self.sock.sendto(buf, self.address)
+        except OSError:
+            pass
+
+
+class FakeAutopilot(SyntheticVehicle):
+    """Um veículo falso que também responde a comandos e parâmetros da estação"""
+
+    def __init__(self, port: int, sysid: int = 1, param_count: int = DEFAULT_PARAM_COUNT,
+                 loss: float = 0.0, latency: float = 0.0, jitter: float = 0.0,
+                 rates: Dict[str, float] = None, param_rate: float = DEFAULT_PARAM_RATE,
+                 host: str = '127.0.0.1', seed: int = None, bandwidth: float = None):
+        super().__init__(sysid, (host, port))
+        self.rng = random.Random(seed)
+        self.link = LinkEmulator(self.sock, self.address, loss, latency, jitter, self.rng, bandwidth)
+        self.mav.file = self.link
+        self.parser = mavlink.MAVLink(None)
+        self.parser.robust_parsing = True
+
+        self.parameters = build_parameter_table(param_count, seed or 0)
+        self.param_names = list(self.parameters)
+        self.param_rate = param_rate
+        self._param_queue: List[int] = []
+        self._param_next = 0.0
+
+        # Heartbeat sempre sai a 1 Hz; o resto segue SET_MESSAGE_INTERVAL
+        self.rates: Dict[str, float] = dict(rates if rates is not None else DEFAULT_RATES)
+        self.rates['HEARTBEAT'] = 1
+        self._schedule: List[Tuple[float, str]] = []
+        self._inbound: List[Tuple[float, int, bytes]] = []
+        self._inbound_sequence = 0
+        self._inbound_busy_until = 0.0
+
+        # Missão armazenada (MISSION_ITEM_INT recebidos) e o upload em andamento
+        self.mission: list = []
+        self._upload: Optional[list] = None
+        self._upload_next = 0
+        self._upload_retry_at = 0.0
+
+        self.received: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- telemetria ----
+
+    def encode(self, msg_type: str):
+        if msg_type == 'NAV_CONTROLLER_OUTPUT':
+            return self.mav.nav_controller_output_encode(0, 0, 0, 0, 0, 0, 0, 0)
+        return super().encode(msg_type)
+
+    def _reschedule(self) -> None:
+        now = time.monotonic()
+        self._schedule = [(now, msg_type) for msg_type, rate in self.rates.items() if rate > 0]
+        heapq.heapify(self._schedule)
+
+    def _send_due_telemetry(self, now: float) -> None:
+        while self._schedule and self._schedule[0][0] <= now:
+            due, msg_type = self._schedule[0]
+            self.send(msg_type)
+            heapq.heapreplace(self._schedule, (max(due + 1 / self.rates[msg_type], now - 1), msg_type))
+
+    # ---- parâmetros ----
+
+    def _send_param(self, index: int) -> None:
+        name = self.param_names[index]
+        self.mav.param_value_send(name.encode(), self.parameters[name], mavlink.MAV_PARAM_TYPE_REAL32,
+                                  len(self.param_names), index)
+
+    def _stream_params(self, now: float) -> None:
+        while self._param_queue and self._param_next <= now:
+            self._send_param(self._param_queue.pop(0))
+            self._param_next = max(self._param_next + 1 / self.param_rate, now - 0.01)
+
+    # ---- missão ----
+
+    def _request_mission_item(self) -> None:
+        self.mav.mission_request_int_send(0, 0, self._upload_next)
+        self._upload_retry_at = time.monotonic() + MISSION_REQUEST_TIMEOUT
+
+    def _send_mission_item(self, seq: int) -> None:
+        item = self.mission[seq]
+        self.mav.mission_item_int_send(0, 0, seq, item.frame, item.command, 0, item.autocontinue,
+                                       item.param1, item.param2, item.param3, item.param4, item.x, item.y, item.z)
+
+    def _handle_mission(self, msg) -> None:
+        msg_type = msg.get_type()
+        if msg_type == 'MISSION_COUNT':
+            self._upload = [None] * msg.count
+            self._upload_next = 0
+            if msg.count == 0:
+                self.mission, self._upload = [], None
+                self.mav.mission_ack_send(0, 0, mavlink.MAV_MISSION_ACCEPTED)
+            else:
+                self._request_mission_item()
+        elif msg_type in ('MISSION_ITEM_INT', 'MISSION_ITEM') and self._upload is not None:
+            if msg.seq != self._upload_next:
+                # Item repetido ou fora de ordem: pede de novo o esperado
+                self._request_mission_item()
+                return
+            self._upload[msg.seq] = msg
+            self._upload_next += 1
+            if self._upload_next == len(self._upload):
+                self.mission, self._upload = self._upload, None
+                self.mav.mission_ack_send(0, 0, mavlink.MAV_MISSION_ACCEPTED)
+            else:
+                self._request_mission_item()
+        elif msg_type == 'MISSION_REQUEST_LIST':
+            self.mav.mission_count_send(0, 0, len(self.mission))
+        elif msg_type in ('MISSION_REQUEST_INT', 'MISSION_REQUEST'):
+            if 0 <= msg.seq < len(self.mission):
+                self._send_mission_item(msg.seq)
+        elif msg_type == 'MISSION_CLEAR_ALL':
+            self.mission, self._upload = [], None
+            self.mav.mission_ack_send(0, 0, mavlink.MAV_MISSION_ACCEPTED)
+
+    # ---- comandos ----
+
+    def _ack(self, command: int, result: int) -> None:
+        self.mav.command_ack_send(command, result)
+
+    def _set_message_interval(self, msg_id: int, interval_us: float) -> int:
+        msg_class = mavlink.mavlink_map.get(int(msg_id))
+        if msg_class is None or msg_class.msgname not in STREAMABLE_MESSAGES:
+            return mavlink.MAV_RESULT_UNSUPPORTED
+
+        msg_type = msg_class.msgname
+        if interval_us < 0:
+            self.rates[msg_type] = 0
+        elif interval_us == 0:
+            self.rates[msg_type] = DEFAULT_RATES.get(msg_type, 1)
+        else:
+            self.rates[msg_type] = 1e6 / interval_us
+        self._reschedule()
+        return mavlink.MAV_RESULT_ACCEPTED
+
+    def _handle_command(self, msg) -> None:
+        command = msg.command
+        if command == mavlink.MAV_CMD_COMPONENT_ARM_DISARM:
+            self.armed = msg.param1 == 1
+            self._ack(command, mavlink.MAV_RESULT_ACCEPTED)
+        elif command == mavlink.MAV_CMD_NAV_TAKEOFF:
+            accepted = self.armed and self.custom_mode in TAKEOFF_MODES
+            self._ack(command, mavlink.MAV_RESULT_ACCEPTED if accepted else mavlink.MAV_RESULT_FAILED)
+        elif command == mavlink.MAV_CMD_DO_SET_MODE:
+            mode = int(msg.param2)
+            if mode in mavutil.mode_mapping_acm:
+                self.custom_mode = mode
+                self._ack(command, mavlink.MAV_RESULT_ACCEPTED)
+            else:
+                self._ack(command, mavlink.MAV_RESULT_DENIED)
+        elif command == mavlink.MAV_CMD_SET_MESSAGE_INTERVAL:
+            self._ack(command, self._set_message_interval(msg.param1, msg.param2))
+        else:
+            self._ack(command, mavlink.MAV_RESULT_UNSUPPORTED)
+
+    def handle(self, msg) -> None:
+        msg_type = msg.get_type()
+        self.received[msg_type] = self.received.get(msg_type, 0) + 1
+        if getattr(msg, 'target_system', self.sysid) not in (0, self.sysid):
+            return
+
+        if msg_type == 'PARAM_REQUEST_LIST':
+            self._param_queue = list(range(len(self.param_names)))
+        elif msg_type == 'PARAM_REQUEST_READ':
+            if msg.param_index >= 0:
+                index = msg.param_index
+            else:
+                name = msg.param_id
+                index = self.param_names.index(name) if name in self.parameters else None
+            if index is not None and index < len(self.param_names):
+                self._send_param(index)
+        elif msg_type == 'PARAM_SET':
+            if msg.param_id in self.parameters:
+                self.parameters[msg.param_id] = msg.param_value
+                self._send_param(self.param_names.index(msg.param_id))
+        elif msg_type == 'COMMAND_LONG':
+            self._handle_command(msg)
+        elif msg_type == 'SET_MODE':
+            if msg.custom_mode in mavutil.mode_mapping_acm:
+                self.custom_mode = msg.custom_mode
+        elif msg_type.startswith('MISSION_'):
+            self._handle_mission(msg)
+        elif msg_type == 'TIMESYNC' and msg.tc1 == 0:
+            # Como o ArduPilot: devolve o ts1 da estação com o próprio relógio em tc1
+            self.mav.timesync_send(time.monotonic_ns(), msg.ts1)
+
+    # ---- laço principal ----
+
+    def _receive(self, timeout: float) -> None:
+        self.sock.settimeout(max(timeout, 0.0005))
+        try:
+            data, _ = self.sock.recvfrom(4096)
+        except (socket.timeout, BlockingIOError):
+            return
+        except OSError:
+            # ICMP port unreachable da estação (ainda não escutando)
+            return
+
+        if self.link.dropped():
+            return
+        if self.link.delayed:
+            due, self._inbound_busy_until = self.link.arrival(len(data), self._inbound_busy_until)
+            self._inbound_sequence += 1
+            heapq.heappush(self._inbound, (due, self._inbound_sequence, data))
+        else:
+            self._parse(data)
+
+    def _parse(self, data: bytes) -> None:
+        for msg in self.parser.parse_buffer(data) or []:
+            if msg.get_type() != 'BAD_DATA':
+                self.handle(msg)
+
+    def run(self) -> None:
+        self._reschedule()
+        while not self._stop.is_set():
+            now = time.monotonic()
+            self._send_due_telemetry(now)
+            self._stream_params(now)
+            self.link.flush(now)
+            while self._inbound and self._inbound[0][0] <= now:
+                self._parse(heapq.heappop(self._inbound)[2])
+            if self._upload is not None and now >= self._upload_retry_at:
+                self._request_mission_item()
+
+            deadlines = [self._schedule[0][0] if self._schedule else now + 0.05]
+            if self._param_queue:
+                deadlines.append(self._param_next)
+            if self._upload is not None:
+                deadlines.append(self._upload_retry_at)
+            for due in (self.link.next_due(), self._inbound[0][0] if self._inbound else None):
+                if due is not None:
+                    deadlines.append(due)
+            self._receive(min(deadlines) - time.monotonic())
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name=f"fake-autopilot-{self.sysid}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self) -> None:
+        self.stop()
+        super().close()
+
+
+def run_autopilot_process(port: int, options: dict, stop) -> None:
+    """Alvo de multiprocessing: roda o autopiloto falso até `stop` (multiprocessing.Event)"""
+    autopilot = FakeAutopilot(port, **options)
+    autopilot.start()
+    try:
+        stop.wait()
+    finally:
+        autopilot.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=14550, help="porta em que a estação escuta")
+    parser.add_argument("--sysid", type=int, default=1)
+    parser.add_argument("--params", type=int, default=DEFAULT_PARAM_COUNT)
+    parser.add_argument("--loss", type=float, default=0.0, help="probabilidade de perda por pacote (0-1)")
+    parser.add_argument("--latency", type=float, default=0.0, help="latência de cada sentido, em segundos")
+    parser.add_argument("--jitter", type=float, default=0.0, help="jitter máximo, em segundos")
+    parser.add_argument("--bandwidth", type=float, default=None, help="banda de cada sentido, em bytes/s")
+    args = parser.parse_args()
+
+    autopilot = FakeAutopilot(args.port, args.sysid, args.params, args.loss, args.latency, args.jitter,
+                              bandwidth=args.bandwidth)
+    print(f"Fake autopilot (sysid {args.sysid}, {len(autopilot.parameters)} params) sending to 127.0.0.1:{args.port}")
+    try:
+        autopilot.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        autopilot.sock.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+    Benchmark da tabela de saúde da frota (FleetHealth).
+
+    Preenche N drones com variâncias do EKF, bateria, idade do link e falhas de ACK
+    aleatórias e mede o custo de avaliar as regras de limite: o laço ingênuo em Python
+    (cada drone contra cada regra) contra a avaliação colunar, e o custo de montar a
+    tabela ordenada completa. Confere que os dois dão a mesma severidade por drone.
+
+    Uso (a partir de backend/):
+        python -m benchmarks.fleet_health --drones 10,100,1000 --output fleet_health.json
+"""
+import json
+import math
+import time
+import random
+import argparse
+import operator
+from typing import Dict
+
+import numpy as np
+
+import core.services.fleet_health as fleet_health
+from core.services.fleet_health import COLUMNS, DEFAULT_HEALTH_RULES, SEVERITIES, FleetHealth
+
+PYTHON_OPERATORS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+                    '==': operator.eq, '!=': operator.ne}
+
+
+def timed(action, repeats: int) -> float:
+    best = math.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def populate(health: FleetHealth, count: int, rng: random.Random) -> list:
+    """Preenche a matriz diretamente, como a ingestão faria, e devolve as mesmas medidas em dicts"""
+    now = time.monotonic()
+    drones = []
+    for i in range(count):
+        drone = object()
+        health.register(drone, f"drone-{i}")
+        values = {
+            'velocity_variance': rng.uniform(0, 1.0), 'pos_horiz_variance': rng.uniform(0, 1.0),
+            'pos_vert_variance': rng.uniform(0, 1.0), 'compass_variance': rng.uniform(0, 1.0),
+            'battery': rng.uniform(0, 100), 'ekf_ok': float(rng.random() > 0.05), 'armed': 1.0,
+            'ack_failures': float(rng.randrange(5)), 'last_message': now - rng.expovariate(2),
+        }
+        values['last_heartbeat'] = values['last_message'] - rng.uniform(0, 1)
+        row = health._data[health._slots[drone]]
+        for column, value in values.items():
+            row[COLUMNS.index(column)] = value
+        drones.append(values)
+    return drones
+
+
+def naive(drones: list, now: float) -> list:
+    severities = []
+    for values in drones:
+        derived = dict(values, link_age=now - values['last_message'], heartbeat_age=now - values['last_heartbeat'])
+        level = 0
+        for rule in DEFAULT_HEALTH_RULES:
+            if PYTHON_OPERATORS[rule.operator](derived[rule.column], rule.threshold):
+                level = max(level, SEVERITIES[rule.severity])
+        severities.append(level)
+    return severities
+
+
+def run(count: int, repeats: int, rng: random.Random) -> dict:
+    health = FleetHealth()
+    drones = populate(health, count, rng)
+
+    def evaluate():
+        health._cache = None
+        return health._evaluate()
+
+    def table():
+        health._cache = None
+        return health.table()
+
+    vectorized_seconds = timed(evaluate, repeats)
+    table_seconds = timed(table, repeats)
+    now = time.monotonic()
+    naive_seconds = timed(lambda: naive(drones, now), max(1, repeats // 10))
+
+    # Mesmo instante de referência para os dois caminhos na conferência
+    original = time.monotonic
+    fleet_health.time.monotonic = lambda: now
+    try:
+        health._cache = None
+        severity = health._evaluate()[3]
+    finally:
+        fleet_health.time.monotonic = original
+    matches = severity.tolist() == naive(drones, now)
+
+    return {
+        "drones": count,
+        "naive_ms": 1000 * naive_seconds,
+        "vectorized_ms": 1000 * vectorized_seconds,
+        "table_ms": 1000 * table_seconds,
+        "speedup": naive_seconds / vectorized_seconds if vectorized_seconds else 0.0,
+        "critical": int(np.count_nonzero(severity == SEVERITIES['critical'])),
+        "verified": matches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", default="10,100,1000", help="tamanhos de frota, separados por vírgula")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="salva os resultados em JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results: Dict[str, dict] = {}
+    print(f"{'drones':>7}{'naive ms':>11}{'rules ms':>10}{'speedup':>9}{'table ms':>10}{'critical':>10}{'ok':>4}")
+    for count in [int(value) for value in args.drones.split(",")]:
+        row = run(count, args.repeats, rng)
+        results[str(count)] = row
+        print(f"{count:>7}{row['naive_ms']:>11.2f}{row['vectorized_ms']:>10.3f}{row['speedup']:>8.1f}x"
+              f"{row['table_ms']:>10.2f}{row['critical']:>10}{'yes' if row['verified'] else 'NO':>4}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"options": vars(args), "results": results}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+    Benchmark da avaliação de cercas (geofences).
+
+    Gera cercas aleatórias (polígonos e cilindros, de inclusão e exclusão, com limites de
+    altitude) e mede o custo de avaliar uma passada da frota inteira: o laço ingênuo em
+    Python (cada drone contra cada cerca) contra a avaliação em lote do PreparedFences.
+    Confere que os dois dão o mesmo resultado.
+
+    Uso (a partir de backend/):
+        python -m benchmarks.geofence --drones 10,100,1000 --fences 20 --output geofence.json
+"""
+import json
+import math
+import time
+import random
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+from core.services.geofence import Geofence, PreparedFences
+
+AREA = 500.0  # m
+
+
+def random_fences(count: int, vertices: int, rng: random.Random) -> List[Geofence]:
+    fences = []
+    for i in range(count):
+        cx, cy = rng.uniform(0, AREA), rng.uniform(0, AREA)
+        kind = "inclusion" if i == 0 else "exclusion"
+        if i % 3 == 2:
+            fences.append(Geofence(f"cylinder-{i}", kind, "cylinder", center=(cx, cy), radius=rng.uniform(10, 50),
+                                   min_altitude=0, max_altitude=rng.uniform(20, 80), id=i))
+            continue
+        # A cerca de inclusão cobre quase a área toda; as de exclusão são obstáculos
+        size = AREA * 0.7 if i == 0 else rng.uniform(10, 60)
+        polygon = [(cx + size * rng.uniform(0.6, 1) * math.cos(2 * math.pi * k / vertices),
+                    cy + size * rng.uniform(0.6, 1) * math.sin(2 * math.pi * k / vertices)) for k in range(vertices)]
+        fences.append(Geofence(f"polygon-{i}", kind, "polygon", vertices=polygon, max_altitude=120, id=i))
+    return fences
+
+
+def timed(action, repeats: int) -> float:
+    best = math.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(count: int, fences: List[Geofence], repeats: int, rng: random.Random) -> dict:
+    positions = np.array([(rng.uniform(0, AREA), rng.uniform(0, AREA), -rng.uniform(0, 100)) for _ in range(count)])
+    rows = positions.tolist()
+    prepared = PreparedFences(fences)
+
+    def naive():
+        return [[fence.breached(x, y, -z) for fence in fences] for x, y, z in rows]
+
+    vectorized_seconds = timed(lambda: prepared.breaches(positions), repeats)
+    naive_seconds = timed(naive, max(1, repeats // 10))
+    matches = bool((prepared.breaches(positions) == np.array(naive(), dtype=bool)).all())
+    return {
+        "drones": count,
+        "naive_ms": 1000 * naive_seconds,
+        "vectorized_ms": 1000 * vectorized_seconds,
+        "speedup": naive_seconds / vectorized_seconds if vectorized_seconds else 0.0,
+        "per_drone_us": 1e6 * vectorized_seconds / count,
+        "verified": matches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", default="10,100,1000", help="tamanhos de frota, separados por vírgula")
+    parser.add_argument("--fences", type=int, default=20)
+    parser.add_argument("--vertices", type=int, default=12, help="vértices por polígono")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="salva os resultados em JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    fences = random_fences(args.fences, args.vertices, rng)
+    results: Dict[str, dict] = {}
+    print(f"{'drones':>7}{'naive ms':>11}{'batched ms':>12}{'speedup':>9}{'µs/drone':>10}{'ok':>4}")
+    for count in [int(value) for value in args.drones.split(",")]:
+        row = run(count, fences, args.repeats, rng)
+        results[str(count)] = row
+        print(f"{count:>7}{row['naive_ms']:>11.2f}{row['vectorized_ms']:>12.3f}{row['speedup']:>8.1f}x"
+              f"{row['per_drone_us']:>10.2f}{'yes' if row['verified'] else 'NO':>4}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"options": vars(args), "results": results}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+    Benchmark da ingestão MAVLink com uma frota sintética.
+
+    Sobe N veículos falsos (benchmarks/synthetic_fleet.py) em outro processo, conecta
+    cada um pelo caminho real (mavlink_connection + Drone + thread de leitura do
+    DroneManager) e mede, para cada N: mensagens/s processadas, perdas na rede,
+    descartes e pico das filas de ingestão, CPU do processo da estação e latência
+    (envio -> update_info).
+
+    Uso (a partir de backend/):
+        python -m benchmarks.ingestion --drones 1,10,25,50 --duration 10 --output ingestion.json
+        python -m benchmarks.ingestion --drones 1,10,25,50 --compare ingestion.json
+"""
+import json
+import time
+import argparse
+import multiprocessing
+from typing import Dict, List
+from pymavlink import mavutil
+
+from benchmarks.synthetic_fleet import DEFAULT_RATES, run_fleet_process
+from core.models.drone import Drone
+from core.services.drone_manager import DroneManager
+
+CONNECT_TIMEOUT = 5.0  # segundos
+DRAIN_TIMEOUT = 2.0  # segundos
+LATENCY_SAMPLE_EVERY = 8
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(q / 100 * len(values)), len(values) - 1)]
+
+
+def trace_latency(drone: Drone, epoch: float, since: float, samples: List[float]) -> None:
+    """
+        Amostra o atraso entre o envio (time_boot_ms) e a aplicação da mensagem no drone.
+        Mensagens enviadas antes de `since` (acumuladas durante a conexão) são ignoradas.
+    """
+    update_info = drone.update_info
+    counter = [0]
+
+    def traced_update_info(msg, timestamp=None):
+        update_info(msg, timestamp)
+        counter[0] += 1
+        if counter[0] % LATENCY_SAMPLE_EVERY == 0:
+            boot_ms = getattr(msg, 'time_boot_ms', None)
+            if boot_ms is not None and epoch + boot_ms / 1000 >= since:
+                samples.append(time.time() - epoch - boot_ms / 1000)
+
+    drone.update_info = traced_update_info
+
+
+def processed_count(drones: Dict[str, Drone]) -> int:
+    return sum(sum(drone.ingest_stats.message_counts.values()) for drone in drones.values())
+
+
+def run_step(count: int, duration: float, rates: Dict[str, float], base_port: int) -> dict:
+    manager = DroneManager()
+    epoch = time.time()
+    latencies: List[float] = []
+
+    # As portas precisam estar abertas (udpin) antes dos veículos começarem a enviar
+    drones: Dict[str, Drone] = {}
+    for i in range(count):
+        connection_string = f"127.0.0.1:{base_port + i}"
+        drone = Drone()
+        drone.connection = mavutil.mavlink_connection(connection_string)
+        drones[connection_string] = drone
+    # As contagens do parser são lidas depois do teardown, quando drone.connection já é None
+    connections = {connection_string: drone.connection for connection_string, drone in drones.items()}
+
+    results = multiprocessing.Queue()
+    fleet = multiprocessing.Process(target=run_fleet_process,
+                                    args=(count, base_port, rates, epoch, duration + CONNECT_TIMEOUT, results))
+    fleet.start()
+
+    try:
+        for connection_string, drone in drones.items():
+            drone.connect(connection_string)
+            # A thread de leitura só atende drones que já têm parâmetros
+            drone.drone_parameters.set_parameters({'SYSID_THISMAV': float(drone.connection.target_system)})
+
+        measure_start = time.time()
+        for drone in drones.values():
+            trace_latency(drone, epoch, measure_start, latencies)
+        with manager._lock:
+            manager.drones.update(drones)
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        processed_start = processed_count(drones)
+
+        sent = results.get(timeout=duration + CONNECT_TIMEOUT + 10)
+        fleet.join()
+
+        # Espera a thread de leitura esvaziar os buffers dos sockets
+        drain_deadline = time.monotonic() + DRAIN_TIMEOUT
+        processed = processed_count(drones)
+        while time.monotonic() < drain_deadline:
+            time.sleep(0.1)
+            current = processed_count(drones)
+            if current == processed:
+                break
+            processed = current
+
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+    finally:
+        for connection_string, drone in drones.items():
+            # Primeiro sai da thread de leitura e dos monitores, depois fecha a conexão e o escritor
+            manager.remove_drone(connection_string)
+            if drone.connected:
+                drone.disconnect()
+            else:
+                connections[connection_string].close()
+        if fleet.is_alive():
+            fleet.terminate()
+
+    total_sent = sum(sum(counts.values()) for counts in sent)
+    # mav_count conta tudo que chegou ao parser, inclusive o HEARTBEAT consumido por wait_heartbeat
+    total_received = sum(connection.mav_count for connection in connections.values())
+    total_processed = processed_count(drones)
+    # Descartes pela política da fila de ingestão (sobrecarga da estação, não da rede)
+    queues = [drone.message_queue.stats() for drone in drones.values()]
+    ingest_dropped = sum(stats["dropped_total"] for stats in queues)
+
+    return {
+        "drones": count,
+        "sent": total_sent,
+        "received": total_received,
+        "processed": total_processed,
+        "dropped": max(total_sent - total_received, 0),
+        "drop_ratio": max(total_sent - total_received, 0) / total_sent if total_sent else 0.0,
+        "ingest_dropped": ingest_dropped,
+        "ingest_drop_ratio": ingest_dropped / total_received if total_received else 0.0,
+        "queue_high_water": max((stats["high_water"] for stats in queues), default=0),
+        "sequence_gaps": sum(connection.mav_loss for connection in connections.values()),
+        "messages_per_second": (total_processed - processed_start) / wall,
+        "cpu_percent": 100 * cpu / wall,
+        "latency_p50_ms": 1000 * percentile(latencies, 50),
+        "latency_p99_ms": 1000 * percentile(latencies, 99),
+        "latency_max_ms": 1000 * max(latencies, default=0.0),
+    }
+
+
+def compare(results: List[dict], baseline_path: str) -> None:
+    with open(baseline_path, 'r') as file:
+        baseline = {row["drones"]: row for row in json.load(file)["steps"]}
+
+    print(f"\n{'drones':>8}{'msg/s':>12}{'cpu %':>10}{'p99 ms':>10}{'drop %':>10}{'qdrop %':>10}"
+          f"   (diferença para o baseline)")
+    for row in results:
+        base = baseline.get(row["drones"])
+        if base is None:
+            continue
+        print(f"{row['drones']:>8}{row['messages_per_second'] - base['messages_per_second']:>+12.0f}"
+              f"{row['cpu_percent'] - base['cpu_percent']:>+10.1f}"
+              f"{row['latency_p99_ms'] - base['latency_p99_ms']:>+10.2f}"
+              f"{100 * (row['drop_ratio'] - base['drop_ratio']):>+10.2f}"
+              f"{100 * (row['ingest_drop_ratio'] - base.get('ingest_drop_ratio', 0.0)):>+10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", default="1,5,10,25", help="lista de tamanhos de frota, separados por vírgula")
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos medidos por tamanho de frota")
+    parser.add_argument("--rate-scale", type=float, default=1.0, help="multiplica as taxas padrão das mensagens")
+    parser.add_argument("--base-port", type=int, default=16000)
+    parser.add_argument("--output", help="salva os resultados em JSON")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    rates = {msg_type: rate * args.rate_scale for msg_type, rate in DEFAULT_RATES.items()}
+    sizes = [int(size) for size in args.drones.split(",")]
+
+    results = []
+    # drop % é perda na rede (enviadas - recebidas pelo parser); qdrop % e q peak vêm das filas de ingestão
+    print(f"{'drones':>8}{'sent':>10}{'processed':>11}{'drop %':>8}{'gaps':>7}{'qdrop %':>9}{'q peak':>8}"
+          f"{'msg/s':>10}{'cpu %':>8}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for size in sizes:
+        row = run_step(size, args.duration, rates, args.base_port)
+        results.append(row)
+        print(f"{row['drones']:>8}{row['sent']:>10}{row['processed']:>11}{100 * row['drop_ratio']:>8.2f}"
+              f"{row['sequence_gaps']:>7}{100 * row['ingest_drop_ratio']:>9.2f}{row['queue_high_water']:>8}"
+              f"{row['messages_per_second']:>10.0f}{row['cpu_percent']:>8.1f}"
+              f"{row['latency_p50_ms']:>9.2f}{row['latency_p99_ms']:>9.2f}{row['latency_max_ms']:>9.2f}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"rates": rates, "duration": args.duration, "steps": results}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""
+    Teste de carga da API HTTP com clientes simulados do dashboard.
+
+    Sobe o backend real (uvicorn) em outro processo, alimentado por K autopilotos falsos
+    (benchmarks/fake_autopilot.py), e simula M clientes fazendo o mesmo que o frontend:
+    /drones_info e /{drone}/drone_info a cada ciclo de polling, /{drone}/drone_parameters
+    de vez em quando e, ocasionalmente, um comando (set_mode). Os clientes respeitam ETag,
+    como o navegador.
+
+    Relata vazão e latência p50/p95/p99 por endpoint e a taxa de ingestão MAVLink
+    (via /metrics) antes e durante a carga.
+
+    Uso (a partir de backend/):
+        python -m benchmarks.load_test --drones 10 --clients 50 --duration 30 --output load.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+import multiprocessing
+from typing import Dict, List
+
+from benchmarks.fake_autopilot import FakeAutopilot
+
+POLL_INTERVAL = 0.3  # segundos, igual ao POLLING_INTERVAL do frontend
+PARAMETERS_INTERVAL = 10.0  # segundos
+COMMAND_PROBABILITY = 0.01  # por ciclo de polling
+SERVER_START_TIMEOUT = 15.0  # segundos
+
+
+def run_autopilots(ports: List[int], param_count: int, stop) -> None:
+    """Alvo de multiprocessing: K autopilotos falsos, uma thread cada"""
+    autopilots = [FakeAutopilot(port, sysid=i + 1, param_count=param_count, seed=i)
+                  for i, port in enumerate(ports)]
+    for autopilot in autopilots:
+        autopilot.start()
+    try:
+        stop.wait()
+    finally:
+        for autopilot in autopilots:
+            autopilot.close()
+
+
+class DashboardClient:
+    """Um cliente do dashboard: uma conexão keep-alive, polling no ritmo do frontend"""
+
+    def __init__(self, host: str, port: int, connection_strings: List[str], seed: int):
+        self.connection = http.client.HTTPConnection(host, port, timeout=10)
+        self.connection_strings = connection_strings
+        self.rng = random.Random(seed)
+        self.etags: Dict[str, str] = {}
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def request(self, endpoint: str, path: str) -> None:
+        headers = {"Accept-Encoding": "gzip, br"}
+        if path in self.etags:
+            headers["If-None-Match"] = self.etags[path]
+
+        start = time.perf_counter()
+        try:
+            self.connection.request("GET", path, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            return
+        elapsed = time.perf_counter() - start
+
+        if response.status >= 400:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            return
+        etag = response.getheader("ETag")
+        if etag:
+            self.etags[path] = etag
+        self.samples.setdefault(endpoint, []).append(elapsed)
+
+    def run(self, deadline: float) -> None:
+        selected = self.rng.choice(self.connection_strings)
+        next_parameters = time.monotonic() + self.rng.uniform(0, PARAMETERS_INTERVAL)
+        # Clientes começam fora de fase, como abas abertas em momentos diferentes
+        time.sleep(self.rng.uniform(0, POLL_INTERVAL))
+
+        while time.monotonic() < deadline:
+            cycle_start = time.monotonic()
+            self.request("drones_info", "/drones_info")
+            self.request("drone_info", f"/{selected}/drone_info")
+            if cycle_start >= next_parameters:
+                self.request("drone_parameters", f"/{selected}/drone_parameters")
+                next_parameters = cycle_start + PARAMETERS_INTERVAL
+            if self.rng.random() < COMMAND_PROBABILITY:
+                self.request("command", f"/{selected}/set_mode/GUIDED")
+
+            time.sleep(max(POLL_INTERVAL - (time.monotonic() - cycle_start), 0))
+
+
+def run_clients(host: str, port: int, connection_strings: List[str], count: int, seed: int,
+                deadline: float, results) -> None:
+    """Alvo de multiprocessing: `count` clientes em threads, devolvendo as amostras"""
+    clients = [DashboardClient(host, port, connection_strings, seed * 1000 + i) for i in range(count)]
+    threads = [threading.Thread(target=client.run, args=(deadline,)) for client in clients]
+    cpu_start = time.process_time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    samples: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for client in clients:
+        for endpoint, values in client.samples.items():
+            samples.setdefault(endpoint, []).extend(values)
+        for endpoint, value in client.errors.items():
+            errors[endpoint] = errors.get(endpoint, 0) + value
+    results.put((samples, errors, time.process_time() - cpu_start))
+
+
+def http_get(host: str, port: int, path: str, timeout: float = 30) -> bytes:
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        body = response.read()
+        if response.status >= 400:
+            raise RuntimeError(f"GET {path} returned {response.status}: {body[:200]}")
+        return body
+    finally:
+        connection.close()
+
+
+def ingested_messages(host: str, port: int) -> float:
+    """Soma de pilotstation_mavlink_messages_total no /metrics"""
+    total = 0.0
+    for line in http_get(host, port, "/metrics").decode().splitlines():
+        if line.startswith("pilotstation_mavlink_messages_total{"):
+            total += float(line.rsplit(" ", 1)[1])
+    return total
+
+
+def ingestion_rate(host: str, port: int, seconds: float) -> float:
+    start_count, start = ingested_messages(host, port), time.perf_counter()
+    time.sleep(seconds)
+    return (ingested_messages(host, port) - start_count) / (time.perf_counter() - start)
+
+
+def percentile(values: List[float], q: float) -> float:
+    return 1000 * values[min(int(q / 100 * len(values)), len(values) - 1)] if values else 0.0
+
+
+def start_server(port: int, workdir: str) -> subprocess.Popen:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=backend_dir + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=workdir, env=env
+    )
+
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            http_get("127.0.0.1", port, "/drones_info", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Backend did not start")
+
+
+def run(args) -> dict:
+    host = "127.0.0.1"
+    drone_ports = [args.base_port + i for i in range(args.drones)]
+    connection_strings = [f"{host}:{port}" for port in drone_ports]
+
+    workdir = tempfile.mkdtemp()
+    stop = multiprocessing.Event()
+    autopilots = multiprocessing.Process(target=run_autopilots, args=(drone_ports, args.params, stop))
+    server = start_server(args.port, workdir)
+    autopilots.start()
+    try:
+        # Conexões em paralelo: cada uma espera o download dos parâmetros
+        connect_threads = [threading.Thread(target=http_get, args=(host, args.port, f"/connect/{cs}"))
+                           for cs in connection_strings]
+        for thread in connect_threads:
+            thread.start()
+        for thread in connect_threads:
+            thread.join()
+
+        idle_rate = ingestion_rate(host, args.port, args.baseline)
+
+        results = multiprocessing.Queue()
+        deadline = time.monotonic() + args.duration
+        per_process = [args.clients // args.processes + (1 if i < args.clients % args.processes else 0)
+                       for i in range(args.processes)]
+        workers = [multiprocessing.Process(target=run_clients,
+                                           args=(host, args.port, connection_strings, count, i, deadline, results))
+                   for i, count in enumerate(per_process) if count > 0]
+        for worker in workers:
+            worker.start()
+
+        load_rate = ingestion_rate(host, args.port, max(args.duration - 1, 1))
+
+        samples: Dict[str, List[float]] = {}
+        errors: Dict[str, int] = {}
+        client_cpu = 0.0
+        for _ in workers:
+            worker_samples, worker_errors, cpu = results.get(timeout=args.duration + 60)
+            client_cpu += cpu
+            for endpoint, values in worker_samples.items():
+                samples.setdefault(endpoint, []).extend(values)
+            for endpoint, value in worker_errors.items():
+                errors[endpoint] = errors.get(endpoint, 0) + value
+        for worker in workers:
+            worker.join()
+    finally:
+        stop.set()
+        server.terminate()
+        server.wait(timeout=10)
+        autopilots.join(timeout=5)
+        if autopilots.is_alive():
+            autopilots.terminate()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    endpoints = {}
+    for endpoint, values in samples.items():
+        values.sort()
+        endpoints[endpoint] = {
+            "requests": len(values),
+            "errors": errors.get(endpoint, 0),
+            "requests_per_second": len(values) / args.duration,
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+        }
+    return {
+        "endpoints": endpoints,
+        "ingestion": {"idle_messages_per_second": idle_rate, "load_messages_per_second": load_rate},
+        "client_cpu_percent": 100 * client_cpu / args.duration,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, default=10)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="segundos de carga")
+    parser.add_argument("--baseline", type=float, default=5.0, help="segundos medindo a ingestão sem carga")
+    parser.add_argument("--processes", type=int, default=max(multiprocessing.cpu_count() // 2, 1),
+                        help="processos geradores de carga")
+    parser.add_argument("--params", type=int, default=300, help="parâmetros por drone")
+    parser.add_argument("--port", type=int, default=18000, help="porta HTTP do backend")
+    parser.add_argument("--base-port", type=int, default=16600, help="primeira porta MAVLink")
+    parser.add_argument("--output", help="salva os resultados em JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    print(f"{'endpoint':<20}{'req':>8}{'err':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, row in results["endpoints"].items():
+        print(f"{endpoint:<20}{row['requests']:>8}{row['errors']:>6}{row['requests_per_second']:>10.1f}"
+              f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}")
+    ingestion = results["ingestion"]
+    print(f"\ningestion msg/s: {ingestion['idle_messages_per_second']:.0f} idle, "
+          f"{ingestion['load_messages_per_second']:.0f} under load")
+    print(f"load generator CPU: {results['client_cpu_percent']:.0f}% "
+          f"(if close to 100% x processes, the generator is the bottleneck)")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"options": vars(args), "results": results}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+    Benchmark da transferência de missões contra o autopiloto falso.
+
+    Faz upload, download (conferindo que os itens voltam iguais) e clear de uma missão
+    de varredura com N waypoints, pelo caminho real da estação (Drone.upload_mission etc.),
+    com o enlace limitado à banda de um rádio. Compara cada tempo com o mínimo teórico
+    do protocolo nessa banda:
+      - upload: o veículo pede item por item, então cada item custa o pedido (descida)
+        + o item (subida) + um round trip de latência;
+      - download: a estação pede vários itens em paralelo, então o limite é a banda
+        de descida para os itens.
+
+    Uso (a partir de backend/):
+        python -m benchmarks.mission --items 700 --bandwidth 5760 --output mission.json
+        python -m benchmarks.mission --items 700 --loss 0.02 --latency 0.02 --compare mission.json
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+from typing import Dict, List
+from pymavlink import mavutil
+
+from benchmarks.fake_autopilot import run_autopilot_process
+from core.mavlink.mission import MissionItem
+from core.services.drone_manager import DroneManager
+
+mavlink = mavutil.mavlink
+
+RADIO_BANDWIDTH = 5760  # bytes/s: rádio SiK a 57600 baud
+_MAVLINK_OVERHEAD = 8  # cabeçalho + checksum do MAVLink 1
+
+
+def frame_size(msg_id: int) -> int:
+    return mavlink.mavlink_map[msg_id].unpacker.size + _MAVLINK_OVERHEAD
+
+
+def survey_mission(count: int, spacing: float = 5.0, row_length: int = 20) -> List[MissionItem]:
+    """Varredura em zigue-zague perto de um ponto fixo, com altitude constante"""
+    lat0, lon0 = -8.05, -34.95
+    meters_per_degree = 111_320
+    items = []
+    for i in range(count):
+        row, column = divmod(i, row_length)
+        if row % 2:
+            column = row_length - 1 - column
+        items.append(MissionItem(mavlink.MAV_CMD_NAV_WAYPOINT,
+                                 lat0 + row * spacing / meters_per_degree,
+                                 lon0 + column * spacing / meters_per_degree, 30.0))
+    return items
+
+
+def theoretical_minimum(count: int, bandwidth: float, latency: float) -> Dict[str, float]:
+    item = frame_size(mavlink.MAVLINK_MSG_ID_MISSION_ITEM_INT)
+    request = frame_size(mavlink.MAVLINK_MSG_ID_MISSION_REQUEST_INT)
+    count_msg = frame_size(mavlink.MAVLINK_MSG_ID_MISSION_COUNT)
+    ack = frame_size(mavlink.MAVLINK_MSG_ID_MISSION_ACK)
+    return {
+        "upload": count * ((item + request) / bandwidth + 2 * latency) + (count_msg + ack) / bandwidth + 2 * latency,
+        "download": (count * item + count_msg) / bandwidth + 2 * latency + (request + ack) / bandwidth,
+    }
+
+
+def same_items(uploaded: List[MissionItem], downloaded: List[MissionItem]) -> bool:
+    if len(uploaded) != len(downloaded):
+        return False
+    return all(a.command == b.command and abs(a.x - b.x) < 1e-6 and abs(a.y - b.y) < 1e-6
+               and abs(a.z - b.z) < 1e-3 for a, b in zip(uploaded, downloaded))
+
+
+def run(args) -> dict:
+    manager = DroneManager()
+    connection_string = f"127.0.0.1:{args.port}"
+    options = {"param_count": args.params, "loss": args.loss, "latency": args.latency,
+               "bandwidth": args.bandwidth or None, "seed": 1}
+
+    stop = multiprocessing.Event()
+    autopilot = multiprocessing.Process(target=run_autopilot_process, args=(args.port, options, stop))
+    autopilot.start()
+    items = survey_mission(args.items)
+    minimum = theoretical_minimum(args.items, args.bandwidth or float('inf'), args.latency)
+    results: Dict[str, dict] = {"upload": [], "download": [], "clear": []}
+    verified = True
+    try:
+        manager.connect_drone(connection_string)
+        drone = manager.get_drone(connection_string)
+
+        for _ in range(args.iterations):
+            result = drone.upload_mission(items)
+            results["upload"].append((result["elapsed_seconds"], result["retries"]))
+
+            start = time.perf_counter()
+            downloaded = drone.download_mission()
+            results["download"].append((time.perf_counter() - start, drone.mission.retries))
+            verified = verified and same_items(items, downloaded)
+
+            drone.clear_mission()
+            results["clear"].append((drone.mission.elapsed, drone.mission.retries))
+
+        drone.disconnect()
+        manager.remove_drone(connection_string)
+    finally:
+        stop.set()
+        autopilot.join(timeout=5)
+        if autopilot.is_alive():
+            autopilot.terminate()
+
+    summary = {}
+    for name, runs in results.items():
+        elapsed = sorted(seconds for seconds, _ in runs)
+        row = {"runs": len(runs), "median_s": elapsed[len(elapsed) // 2], "max_s": elapsed[-1],
+               "retries": sum(retries for _, retries in runs)}
+        if name in minimum:
+            row["minimum_s"] = minimum[name]
+            row["efficiency"] = minimum[name] / row["median_s"] if row["median_s"] else 0.0
+            row["items_per_second"] = args.items / row["median_s"] if row["median_s"] else 0.0
+        summary[name] = row
+    summary["download"]["verified"] = verified
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=700)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--bandwidth", type=float, default=RADIO_BANDWIDTH, help="bytes/s em cada sentido (0 = sem limite)")
+    parser.add_argument("--loss", type=float, default=0.0, help="probabilidade de perda por pacote (0-1)")
+    parser.add_argument("--latency", type=float, default=0.0, help="latência de cada sentido, em segundos")
+    parser.add_argument("--params", type=int, default=50)
+    parser.add_argument("--port", type=int, default=16600)
+    parser.add_argument("--output", help="salva os resultados em JSON")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    # Logs de voo e snapshots de parâmetros da execução ficam em um diretório temporário
+    workdir = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        results = run(args)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    base = {}
+    if baseline:
+        with open(baseline, 'r') as file:
+            base = json.load(file)["results"]
+
+    print(f"{'operation':<12}{'runs':>6}{'median s':>10}{'max s':>10}{'min s':>10}{'effic.':>8}{'items/s':>10}{'retries':>9}"
+          + (f"{'Δmedian s':>11}" if base else ""))
+    for name, row in results.items():
+        line = f"{name:<12}{row['runs']:>6}{row['median_s']:>10.2f}{row['max_s']:>10.2f}"
+        if 'minimum_s' in row:
+            line += f"{row['minimum_s']:>10.2f}{row['efficiency']:>8.0%}{row['items_per_second']:>10.0f}"
+        else:
+            line += f"{'-':>10}{'-':>8}{'-':>10}"
+        line += f"{row['retries']:>9}"
+        if name in base:
+            line += f"{row['median_s'] - base[name]['median_s']:>+11.2f}"
+        print(line)
+    if not results["download"]["verified"]:
+        print("WARNING: downloaded mission differs from the uploaded one")
+
+    if output:
+        with open(output, 'w') as file:
+            json.dump({"options": vars(args), "results": results}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+    Frota sintética: N veículos falsos enviando telemetria MAVLink por UDP local.
+
+    Cada veículo tem o seu próprio socket (como um veículo real) e envia para a porta
+    em que a estação escuta (udpin). Uma única thread agenda todos os streams por
+    prazo, então dá para simular dezenas de veículos sem uma thread por veículo.
+
+    O time_boot_ms das mensagens é contado a partir de um `epoch` compartilhado com
+    quem recebe, o que permite medir a latência de ponta a ponta no mesmo host.
+"""
+import math
+import time
+import heapq
+import socket
+import threading
+from typing import Dict, List, Optional, Tuple
+from pymavlink import mavutil
+
+# Mensagens (e taxas em Hz) enviadas por padrão, próximas das de um ArduCopter com SR padrão
+DEFAULT_RATES: Dict[str, float] = {
+    'HEARTBEAT': 1,
+    'ATTITUDE': 20,
+    'LOCAL_POSITION_NED': 10,
+    'VFR_HUD': 10,
+    'BATTERY_STATUS': 2,
+    'EKF_STATUS_REPORT': 2,
+}
+
+GUIDED_MODE = 4  # custom_mode do ArduCopter
+
+# Todos os bits "OK" do EKF_STATUS_REPORT que is_ekf_ok verifica
+EKF_OK_FLAGS = (
+    mavutil.mavlink.EKF_ATTITUDE | mavutil.mavlink.EKF_VELOCITY_HORIZ | mavutil.mavlink.EKF_VELOCITY_VERT |
+    mavutil.mavlink.EKF_POS_HORIZ_REL | mavutil.mavlink.EKF_POS_HORIZ_ABS | mavutil.mavlink.EKF_POS_VERT_ABS |
+    mavutil.mavlink.EKF_PRED_POS_HORIZ_REL | mavutil.mavlink.EKF_PRED_POS_HORIZ_ABS
+)
+
+
+class UdpWriter:
+    """Objeto "arquivo" para o MAVLink do pymavlink: cada write vira um datagrama"""
+
+    def __init__(self, sock: socket.socket, address: Tuple[str, int]):
+        self.sock = sock
+        self.address = address
+
+    def write(self, buf: bytes) -> None:
+        try:
+            self.sock.sendto(buf, self.address)
+        except OSError:
+            # Ninguém escutando ainda (ICMP port unreachable): o pacote é perdido, como no rádio
+            pass
+
+
+class SyntheticVehicle:
+    """Um veículo falso voando em círculo e enviando telemetria para `address`"""
+
+    def __init__(self, sysid: int, address: Tuple[str, int], epoch: float = None):
+        self.sysid = sysid
+        self.address = address
+        self.epoch = epoch if epoch is not None else time.time()
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.mav = mavutil.mavlink.MAVLink(UdpWriter(self.sock, address), srcSystem=sysid, srcComponent=1)
+
+        self.armed = False
+        self.custom_mode = GUIDED_MODE
+        self.sent: Dict[str, int] = {}
+
+    def time_boot_ms(self) -> int:
+        return int((time.time() - self.epoch) * 1000) & 0xFFFFFFFF
+
+    def base_mode(self) -> int:
+        base_mode = mavutil.mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED
+        if self.armed:
+            base_mode |= mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED
+        return base_mode
+
+    def encode(self, msg_type: str):
+        t = time.time() - self.epoch
+        angle = t * 0.2 + self.sysid
+
+        if msg_type == 'HEARTBEAT':
+            return self.mav.heartbeat_encode(mavutil.mavlink.MAV_TYPE_QUADROTOR,
+                                             mavutil.mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA,
+                                             self.base_mode(), self.custom_mode,
+                                             mavutil.mavlink.MAV_STATE_ACTIVE)
+        if msg_type == 'ATTITUDE':
+            return self.mav.attitude_encode(self.time_boot_ms(), 0.05 * math.sin(t), 0.05 * math.cos(t),
+                                            angle % (2 * math.pi) - math.pi, 0, 0, 0.2)
+        if msg_type == 'LOCAL_POSITION_NED':
+            return self.mav.local_position_ned_encode(self.time_boot_ms(), 10 * math.cos(angle), 10 * math.sin(angle),
+                                                      -10, -2 * math.sin(angle), 2 * math.cos(angle), 0)
+        if msg_type == 'VFR_HUD':
+            return self.mav.vfr_hud_encode(2.0, 2.0, int(math.degrees(angle)) % 360, 45, 10.0, 0.0)
+        if msg_type == 'BATTERY_STATUS':
+            return self.mav.battery_status_encode(0, mavutil.mavlink.MAV_BATTERY_FUNCTION_ALL,
+                                                  mavutil.mavlink.MAV_BATTERY_TYPE_LIPO, 2500,
+                                                  [4000, 4000, 4000, 4000] + [65535] * 6,
+                                                  1500, 100, -1, max(100 - int(t / 10), 0))
+        if msg_type == 'EKF_STATUS_REPORT':
+            return self.mav.ekf_status_report_encode(EKF_OK_FLAGS, 0.1, 0.1, 0.1, 0.1, 0)
+        raise ValueError(f"Unsupported message type: {msg_type}")
+
+    def send(self, msg_type: str) -> None:
+        self.mav.send(self.encode(msg_type))
+        self.sent[msg_type] = self.sent.get(msg_type, 0) + 1
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+class SyntheticFleet:
+    """N veículos nas portas base_port..base_port+N-1, agendados por uma única thread"""
+
+    def __init__(self, count: int, base_port: int = 16000, rates: Dict[str, float] = None,
+                 host: str = '127.0.0.1', epoch: float = None):
+        self.rates = rates or DEFAULT_RATES
+        self.epoch = epoch if epoch is not None else time.time()
+        self.vehicles: List[SyntheticVehicle] = [
+            SyntheticVehicle(i + 1, (host, base_port + i), self.epoch) for i in range(count)
+        ]
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def connection_strings(self) -> List[str]:
+        return [f"{host}:{port}" for host, port in (vehicle.address for vehicle in self.vehicles)]
+
+    def run(self, duration: float = None) -> None:
+        """Envia os streams até stop() ou até `duration` segundos"""
+        now = time.monotonic()
+        deadline = now + duration if duration is not None else math.inf
+
+        # Espalha as fases para os veículos não enviarem todos no mesmo instante
+        schedule = []
+        for i, vehicle in enumerate(self.vehicles):
+            for msg_type, rate in self.rates.items():
+                if rate > 0:
+                    period = 1 / rate
+                    heapq.heappush(schedule, (now + period * (i / len(self.vehicles)), i, msg_type, period))
+
+        while schedule and not self._stop.is_set():
+            due, i, msg_type, period = schedule[0]
+            if due >= deadline:
+                break
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.vehicles[i].send(msg_type)
+            heapq.heapreplace(schedule, (due + period, i, msg_type, period))
+
+    def start(self, duration: float = None) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, args=(duration,), name="synthetic-fleet", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def sent_counts(self) -> List[Dict[str, int]]:
+        return [dict(vehicle.sent) for vehicle in self.vehicles]
+
+    def close(self) -> None:
+        self.stop()
+        for vehicle in self.vehicles:
+            vehicle.close()
+
+
+def run_fleet_process(count: int, base_port: int, rates: Dict[str, float], epoch: float,
+                      duration: float, results) -> None:
+    """Alvo de multiprocessing: roda a frota fora do processo medido e devolve os envios"""
+    fleet = SyntheticFleet(count, base_port, rates, epoch=epoch)
+    try:
+        fleet.run(duration)
+        results.put(fleet.sent_counts())
+    finally:
+        fleet.close()
@@ -0,0 +1,132 @@
+"""
+    Benchmark da exportação de telemetria em memória compartilhada.
+
+    Para N drones com telemetria nova a cada rodada, mede o custo de uma passada do
+    escritor (TelemetryExport.publish), o de um snapshot completo pelo TelemetryReader
+    e o de obter o mesmo estado pela API (GET /drones_info + decodificar o JSON), que é
+    o que um processo local faria sem a exportação.
+
+    Uso (a partir de backend/):
+        python -m benchmarks.telemetry_export --drones 10,100,250 --output telemetry_export.json
+"""
+import os
+import json
+import math
+import time
+import argparse
+import tempfile
+from typing import Dict
+
+from fastapi.testclient import TestClient
+from pymavlink import mavutil
+
+from core.models.drone import Drone
+from core.services.drone_manager import DroneManager
+from core.services.telemetry_export import TelemetryExport
+from core.services.telemetry_reader import TelemetryReader
+from utils.versioning import next_version
+
+
+class BenchmarkConnection:
+    """Conexão falsa: o benchmark mede apenas a publicação e a leitura"""
+    flightmode = 'GUIDED'
+    target_system = 1
+    target_component = 1
+
+    def recv_match(self, *args, **kwargs):
+        return None
+
+
+def timed(action, repeats: int) -> float:
+    best = math.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def create_drones(count: int) -> Dict[str, Drone]:
+    encoder = mavutil.mavlink.MAVLink(None)
+    drones = {}
+    for i in range(count):
+        drone = Drone()
+        drone.connection = BenchmarkConnection()
+        drone.connected = True
+        drone.update_info(encoder.attitude_encode(0, 0.1, -0.2, 1.5, 0, 0, 0))
+        drone.update_info(encoder.vfr_hud_encode(1.2, 1.1, 90, 50, 10.5, 0.2))
+        drone.update_info(encoder.local_position_ned_encode(0, i, -i, -10, 0, 0, 0))
+        drones[f"127.0.0.1:{15000 + i}"] = drone
+    return drones
+
+
+def run(count: int, repeats: int, directory: str) -> dict:
+    manager = DroneManager()
+    drones = create_drones(count)
+    export = TelemetryExport(os.path.join(directory, f"telemetry-{count}"), slots=count, rate=1)
+    for connection_string, drone in drones.items():
+        export.register(drone, connection_string)
+    reader = TelemetryReader(export.path)
+
+    def touch():
+        for drone in drones.values():
+            drone.telemetry_version = next_version()
+
+    def publish():
+        touch()
+        export.publish()
+
+    # O custo de marcar os drones como alterados é descontado da passada do escritor
+    publish_seconds = timed(publish, repeats) - timed(touch, repeats)
+    snapshot_seconds = timed(reader.snapshot, repeats)
+    snapshot = reader.snapshot()
+
+    import main
+    client = TestClient(main.app)
+    manager.drones.clear()
+    manager.drones.update(drones)
+    try:
+        def rest():
+            touch()  # telemetria nova: o cache de resposta por versão não ajuda
+            return client.get("/drones_info").json()
+        rest_seconds = timed(rest, max(1, repeats // 10)) - timed(touch, repeats)
+    finally:
+        manager.drones.clear()
+        reader.close()
+        export.close()
+        os.remove(export.path)
+
+    return {
+        "drones": count,
+        "publish_ms": 1000 * publish_seconds,
+        "publish_us_per_drone": 1e6 * publish_seconds / count,
+        "snapshot_ms": 1000 * snapshot_seconds,
+        "rest_ms": 1000 * rest_seconds,
+        "speedup": rest_seconds / snapshot_seconds if snapshot_seconds else 0.0,
+        "verified": len(snapshot) == count and all(snapshot[cs].y == drone.position.y for cs, drone in drones.items()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", default="10,100,250", help="tamanhos de frota, separados por vírgula")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--output", help="salva os resultados em JSON")
+    args = parser.parse_args()
+
+    results: Dict[str, dict] = {}
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    print(f"{'drones':>7}{'publish ms':>12}{'us/drone':>10}{'snapshot ms':>13}{'REST ms':>10}{'speedup':>9}{'ok':>4}")
+    for count in [int(value) for value in args.drones.split(",")]:
+        row = run(count, args.repeats, directory)
+        results[str(count)] = row
+        print(f"{count:>7}{row['publish_ms']:>12.3f}{row['publish_us_per_drone']:>10.2f}{row['snapshot_ms']:>13.3f}"
+              f"{row['rest_ms']:>10.2f}{row['speedup']:>8.1f}x{'yes' if row['verified'] else 'NO':>4}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"options": vars(args), "results": results}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,11 @@
 import os
 import json
 import gzip
+import time
 from typing import Dict, Any
 from datetime import datetime
 import logging
+from core.services.metrics import Histogram
 
 class LogWriter:
     """Interface base para diferentes estratégias de escrita de logs"""
@@ -44,16 +46,28 @@ class FileLogWriter(LogWriter):
         else:
             self.file = open(self.log_path, 'w')
         
+        # Métricas de escrita (expostas em /metrics)
+        self.writes = 0
+        self.bytes_written = 0
+        self.errors = 0
+        self.write_seconds = Histogram()
+        
         logging.info(f"Flight log initialized at {self.log_path}")
     
     def write_log(self, log_entry: Dict[str, Any]):
         """Escreve uma entrada de log no arquivo"""
+        start = time.perf_counter()
         try:
             # Escreve o objeto JSON seguido por uma quebra de linha (JSON Lines format)
-            self.file.write(json.dumps(log_entry) + "\n")
+            line = json.dumps(log_entry) + "\n"
+            self.file.write(line)
             self.file.flush()
+            self.writes += 1
+            self.bytes_written += len(line)
         except Exception as e:
+            self.errors += 1
             logging.error(f"Error writing to log file: {e}")
+        self.write_seconds.observe(time.perf_counter() - start)
     
     def close(self):
         """Fecha o arquivo de log"""
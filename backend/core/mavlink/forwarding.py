@@ -0,0 +1,289 @@
+import queue
+import random
+import socket
+import logging
+import threading
+from typing import Callable, Dict, List, Tuple
+
+# Saídas no formato "udp:<host>:<porta>" (envia datagramas para um GCS escutando,
+# como o Mission Planner/QGroundControl na 14550) ou "tcp:<host>:<porta>" (conecta
+# em um servidor TCP, como o do Mission Planner)
+FORWARD_PROTOCOLS = ("udp", "tcp")
+
+# Frames guardados por saída; um consumidor lento perde os mais antigos
+FORWARD_QUEUE_SIZE = 500
+
+# Uma saída TCP que cai é reaberta com espera que dobra a cada tentativa até o máximo (com jitter)
+FORWARD_RECONNECT_MIN_DELAY = 1.0
+FORWARD_RECONNECT_MAX_DELAY = 30.0
+
+_SOCKET_TIMEOUT = 0.5  # segundos
+_RECV_SIZE = 4096
+
+_MAVLINK1_STX = 0xFE
+_MAVLINK2_STX = 0xFD
+_MAVLINK2_SIGNED = 0x01
+
+
+def parse_output_address(address: str) -> Tuple[str, str, int]:
+    protocol, _, target = address.partition(':')
+    host, _, port = target.rpartition(':')
+    if protocol not in FORWARD_PROTOCOLS or not host or not port.isdigit():
+        raise ValueError(f"Invalid forwarding output '{address}' (expected udp:<host>:<port> or tcp:<host>:<port>)")
+    return protocol, host, int(port)
+
+
+def split_frames(buffer: bytearray) -> Tuple[List[bytes], bytearray]:
+    """
+        Separa frames MAVLink completos de um fluxo de bytes olhando só o cabeçalho
+        (tamanho do payload e flag de assinatura), sem decodificar. Retorna os frames
+        e o resto incompleto; bytes fora de um frame são descartados.
+    """
+    frames = []
+    start = 0
+    size = len(buffer)
+    while start < size:
+        stx = buffer[start]
+        if stx == _MAVLINK1_STX:
+            header = 6
+        elif stx == _MAVLINK2_STX:
+            header = 10
+        else:
+            start += 1
+            continue
+        if size - start < 3:
+            break
+        length = header + buffer[start + 1] + 2
+        if stx == _MAVLINK2_STX and buffer[start + 2] & _MAVLINK2_SIGNED:
+            length += 13
+        if size - start < length:
+            break
+        frames.append(bytes(buffer[start:start + length]))
+        start += length
+    return frames, buffer[start:]
+
+
+class ForwardOutput:
+    """
+        Uma saída de encaminhamento. Os frames recebidos do drone entram como estão
+        (os bytes originais, sem decodificar nem recodificar) em uma fila limitada que
+        uma thread própria envia; o que o consumidor responde é injetado no enlace do drone.
+        Se uma saída TCP cai, a thread de envio a reabre com espera exponencial.
+    """
+
+    def __init__(self, address: str, inject: Callable[[bytes], None]):
+        self.address = address
+        self.protocol, self.host, self.port = parse_output_address(address)
+        self._inject = inject
+        self._queue: queue.Queue = queue.Queue(FORWARD_QUEUE_SIZE)
+        self._stop = threading.Event()
+        self._socket = None
+        # Trocado pela thread de envio ao reconectar; a de recebimento espera por ele
+        self._socket_lock = threading.Lock()
+        self._connected = threading.Event()
+
+        self.forwarded = 0
+        self.forwarded_bytes = 0
+        self.dropped = 0
+        self.injected = 0
+        self.errors = 0
+        self.reconnects = 0
+
+        self._sender = threading.Thread(target=self._send_loop, name=f"forward-{address}", daemon=True)
+        self._receiver = threading.Thread(target=self._receive_loop, name=f"forward-in-{address}", daemon=True)
+
+    def start(self) -> None:
+        self._socket = self._open()
+        self._connected.set()
+        self._sender.start()
+        self._receiver.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._sender.join(timeout=2)
+        self._receiver.join(timeout=2)
+        with self._socket_lock:
+            if self._socket is not None:
+                self._socket.close()
+
+    def put(self, frame) -> None:
+        """Chamado pela ingestão: nunca bloqueia"""
+        try:
+            self._queue.put_nowait(frame)
+        except queue.Full:
+            try:
+                self._queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(frame)
+            except queue.Full:
+                self.dropped += 1
+
+    def _open(self) -> socket.socket:
+        if self.protocol == "udp":
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.connect((self.host, self.port))
+        else:
+            sock = socket.create_connection((self.host, self.port), timeout=_SOCKET_TIMEOUT)
+        sock.settimeout(_SOCKET_TIMEOUT)
+        return sock
+
+    def _disconnect(self, sock: socket.socket, reason) -> None:
+        """Marca a conexão TCP como caída (uma vez só, venha o erro do envio ou do recebimento)"""
+        with self._socket_lock:
+            if self._socket is not sock:
+                return
+            self._socket = None
+            self._connected.clear()
+        sock.close()
+        logging.warning(f"Forwarding output {self.address} closed: {reason}")
+
+    def _reconnect(self) -> None:
+        delay = FORWARD_RECONNECT_MIN_DELAY
+        while not self._stop.is_set():
+            try:
+                sock = self._open()
+            except OSError as e:
+                self.errors += 1
+                logging.debug(f"Forwarding output {self.address}: reconnect failed: {e}")
+                if self._stop.wait(delay * random.uniform(0.8, 1.2)):
+                    return
+                delay = min(delay * 2, FORWARD_RECONNECT_MAX_DELAY)
+                continue
+            # Frames que esperaram a queda passar já estão velhos para o GCS
+            while True:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    break
+            with self._socket_lock:
+                self._socket = sock
+                self._connected.set()
+            self.reconnects += 1
+            logging.info(f"Forwarding output {self.address}: reconnected")
+            return
+
+    def _send_loop(self) -> None:
+        while not self._stop.is_set():
+            if not self._connected.is_set():
+                self._reconnect()
+                continue
+            try:
+                frame = self._queue.get(timeout=_SOCKET_TIMEOUT)
+            except queue.Empty:
+                continue
+            sock = self._socket
+            if sock is None:
+                continue
+            try:
+                sock.sendall(frame)
+                self.forwarded += 1
+                self.forwarded_bytes += len(frame)
+            except OSError as e:
+                # UDP sem ninguém escutando (ECONNREFUSED) não é fatal; o GCS pode abrir depois
+                self.errors += 1
+                if self.protocol == "tcp":
+                    self._disconnect(sock, e)
+
+    def _receive_loop(self) -> None:
+        pending = bytearray()
+        while not self._stop.is_set():
+            if not self._connected.wait(_SOCKET_TIMEOUT):
+                continue
+            sock = self._socket
+            if sock is None:
+                continue
+            try:
+                data = sock.recv(_RECV_SIZE)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if self.protocol == "tcp":
+                    self._disconnect(sock, e)
+                    pending.clear()
+                continue
+            if not data:
+                # O GCS fechou a conexão TCP
+                self._disconnect(sock, "connection closed by peer")
+                pending.clear()
+                continue
+
+            # Datagramas UDP já trazem frames inteiros; o fluxo TCP precisa ser separado
+            if self.protocol == "udp":
+                frames = [data]
+            else:
+                pending.extend(data)
+                frames, pending = split_frames(pending)
+            for frame in frames:
+                try:
+                    self._inject(frame)
+                    self.injected += 1
+                except Exception as e:
+                    self.errors += 1
+                    logging.warning(f"Error injecting frame from {self.address}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            'output': self.address,
+            'forwarded': self.forwarded,
+            'forwarded_bytes': self.forwarded_bytes,
+            'dropped': self.dropped,
+            'injected': self.injected,
+            'errors': self.errors,
+            'queue_depth': self._queue.qsize(),
+            'reconnects': self.reconnects,
+            'active': self._sender.is_alive() and self._connected.is_set()
+        }
+
+
+class MavlinkForwarder:
+    """
+        Encaminha o tráfego de um drone para saídas externas (outros GCS), para que eles
+        possam usar o mesmo veículo que a PilotStation sem disputar a porta serial.
+    """
+
+    def __init__(self, inject: Callable[[bytes], None]):
+        self._inject = inject
+        self.outputs: Dict[str, ForwardOutput] = {}
+        self._lock = threading.Lock()
+
+    def add_output(self, address: str) -> ForwardOutput:
+        with self._lock:
+            output = self.outputs.get(address)
+            if output is not None:
+                return output
+            output = ForwardOutput(address, self._inject)
+            output.start()
+            self.outputs = {**self.outputs, address: output}
+            return output
+
+    def remove_output(self, address: str) -> bool:
+        with self._lock:
+            output = self.outputs.get(address)
+            if output is None:
+                return False
+            self.outputs = {key: value for key, value in self.outputs.items() if key != address}
+        output.close()
+        return True
+
+    def forward(self, msg) -> None:
+        # O dicionário é substituído (nunca alterado) para ser lido aqui sem lock
+        outputs = self.outputs
+        if not outputs:
+            return
+        frame = msg.get_msgbuf()
+        if not frame:
+            # Mensagem montada localmente e nunca empacotada: não há bytes para encaminhar
+            return
+        for output in outputs.values():
+            output.put(frame)
+
+    def close(self) -> None:
+        for address in list(self.outputs):
+            self.remove_output(address)
+
+    def stats(self) -> List[dict]:
+        return [output.stats() for output in self.outputs.values()]
@@ -0,0 +1,329 @@
+import time
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+from pymavlink import mavutil
+import utils.exceptions as exceptions
+from core.services.events import EventBroadcaster
+
+mavlink = mavutil.mavlink
+
+# Mensagens do protocolo de missão que o Drone repassa para o MissionTransfer
+MISSION_MESSAGES = {
+    'MISSION_REQUEST_INT', 'MISSION_REQUEST', 'MISSION_ACK', 'MISSION_COUNT',
+    'MISSION_ITEM_INT', 'MISSION_ITEM'
+}
+
+# Sem nenhuma mensagem do veículo por esse tempo, a última mensagem é reenviada
+MISSION_ITEM_TIMEOUT = 1.5  # segundos
+MISSION_RETRIES = 5
+
+# Depois que a transferência engrena, o timeout acompanha o ritmo observado por item
+# (MISSION_RETRY_FACTOR vezes a média), para que uma perda não custe o timeout inteiro
+MISSION_RETRY_FACTOR = 4
+MISSION_RETRY_MIN = 0.2  # segundos
+
+# Itens pedidos em paralelo no download (o veículo responde cada pedido independentemente)
+MISSION_DOWNLOAD_WINDOW = 8
+
+_GLOBAL_FRAMES = {
+    mavlink.MAV_FRAME_GLOBAL, mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT, mavlink.MAV_FRAME_GLOBAL_INT,
+    mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT_INT, mavlink.MAV_FRAME_GLOBAL_TERRAIN_ALT,
+    mavlink.MAV_FRAME_GLOBAL_TERRAIN_ALT_INT
+}
+
+
+def _coordinate_scale(frame: int) -> float:
+    """Escala de x/y no MISSION_ITEM_INT: graus * 1e7 em frames globais, metros * 1e4 em locais"""
+    if frame in _GLOBAL_FRAMES:
+        return 1e7
+    if frame == mavlink.MAV_FRAME_MISSION:
+        return 1
+    return 1e4
+
+
+def mission_result_name(result: int) -> str:
+    entry = mavlink.enums['MAV_MISSION_RESULT'].get(result)
+    return entry.name if entry is not None else str(result)
+
+
+@dataclass
+class MissionItem:
+    command: int
+    x: float = 0.0  # latitude em frames globais, metros em frames locais
+    y: float = 0.0  # longitude em frames globais, metros em frames locais
+    z: float = 0.0
+    frame: int = mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT_INT
+    param1: float = 0.0
+    param2: float = 0.0
+    param3: float = 0.0
+    param4: float = 0.0
+    autocontinue: bool = True
+
+    def to_dict(self):
+        return {
+            'command': self.command, 'x': self.x, 'y': self.y, 'z': self.z, 'frame': self.frame,
+            'param1': self.param1, 'param2': self.param2, 'param3': self.param3, 'param4': self.param4,
+            'autocontinue': self.autocontinue
+        }
+
+    def encode(self, mav, target_system: int, target_component: int, seq: int, integer: bool = True):
+        if integer:
+            scale = _coordinate_scale(self.frame)
+            return mav.mission_item_int_encode(
+                target_system, target_component, seq, self.frame, self.command, 0, int(self.autocontinue),
+                self.param1, self.param2, self.param3, self.param4,
+                int(round(self.x * scale)), int(round(self.y * scale)), self.z)
+        return mav.mission_item_encode(
+            target_system, target_component, seq, self.frame, self.command, 0, int(self.autocontinue),
+            self.param1, self.param2, self.param3, self.param4, self.x, self.y, self.z)
+
+    @classmethod
+    def from_message(cls, msg) -> 'MissionItem':
+        x, y = msg.x, msg.y
+        if msg.get_type() == 'MISSION_ITEM_INT':
+            scale = _coordinate_scale(msg.frame)
+            x, y = x / scale, y / scale
+        return cls(msg.command, x, y, msg.z, msg.frame, msg.param1, msg.param2, msg.param3, msg.param4,
+                   bool(msg.autocontinue))
+
+
+class MissionTransfer:
+    """
+        Upload, download e limpeza da missão de um drone (protocolo de missão do MAVLink).
+
+        O veículo conduz a transferência pedindo item por item; as respostas saem direto
+        do worker de ingestão que aplica o pedido (um por drone de cada vez), sem esperar
+        a thread da API. No download vários itens são pedidos em paralelo. A thread que chamou
+        upload/download/clear só cuida de timeout e reenvio.
+    """
+
+    def __init__(self):
+        self.events = EventBroadcaster()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._connection = None
+
+        self.operation: Optional[str] = None  # transferência em andamento
+        self.last_operation: Optional[str] = None
+        self.completed = 0
+        self.total = 0
+        self.retries = 0
+        self.elapsed = 0.0
+        self.state = 'idle'
+        self.error: Optional[str] = None
+
+        self._failure: Optional[Exception] = None
+        self._last_activity = 0.0
+        self._attempts = 0
+        self._started = 0.0
+        self._item_interval: Optional[float] = None
+
+        # upload
+        self._encoded: list = []
+        self._items: List[MissionItem] = []
+        self._requested: Optional[int] = None
+
+        # download
+        self._received: Optional[List[Optional[MissionItem]]] = None
+        self._next_request = 0
+
+    # ---- API ----
+
+    def upload(self, connection, items: List[MissionItem], timeout: float = MISSION_ITEM_TIMEOUT,
+               retries: int = MISSION_RETRIES) -> dict:
+        def prepare():
+            # Codifica tudo antes: responder a um pedido vira só um send
+            self._items = items
+            self._encoded = [item.encode(connection.mav, connection.target_system, connection.target_component, seq)
+                             for seq, item in enumerate(items)]
+            self._requested = None
+
+        def resend():
+            if self._requested is None:
+                self._send_count()
+            else:
+                connection.mav.send(self._encoded[self._requested])
+
+        return self._transfer('upload', connection, len(items), prepare, self._send_count, resend, timeout, retries)
+
+    def download(self, connection, timeout: float = MISSION_ITEM_TIMEOUT,
+                 retries: int = MISSION_RETRIES) -> List[MissionItem]:
+        def prepare():
+            self._received = None
+            self._next_request = 0
+
+        def start():
+            connection.mav.mission_request_list_send(connection.target_system, connection.target_component)
+
+        def resend():
+            if self._received is None:
+                connection.mav.mission_request_list_send(connection.target_system, connection.target_component)
+                return
+            missing = [seq for seq in range(self._next_request) if self._received[seq] is None]
+            for seq in missing[:MISSION_DOWNLOAD_WINDOW]:
+                self._request_item(seq)
+
+        self._transfer('download', connection, 0, prepare, start, resend, timeout, retries)
+        return list(self._received)
+
+    def clear(self, connection, timeout: float = MISSION_ITEM_TIMEOUT, retries: int = MISSION_RETRIES) -> dict:
+        def send():
+            connection.mav.mission_clear_all_send(connection.target_system, connection.target_component)
+
+        return self._transfer('clear', connection, 0, None, send, send, timeout, retries)
+
+    def progress(self) -> dict:
+        elapsed = time.perf_counter() - self._started if self.state == 'running' else self.elapsed
+        return {
+            'type': 'mission_progress',
+            'operation': self.last_operation,
+            'state': self.state,
+            'completed': self.completed,
+            'total': self.total,
+            'retries': self.retries,
+            'elapsed_seconds': elapsed,
+            'error': self.error
+        }
+
+    # ---- workers de ingestão ----
+
+    def handle(self, msg) -> None:
+        """Chamado pelo Drone.update_info para cada mensagem de MISSION_MESSAGES"""
+        operation = self.operation
+        if operation is None or self._done.is_set():
+            return
+        msg_type = msg.get_type()
+
+        if operation == 'upload':
+            if msg_type in ('MISSION_REQUEST_INT', 'MISSION_REQUEST') and 0 <= msg.seq < self.total:
+                self._requested = msg.seq
+                if msg_type == 'MISSION_REQUEST_INT':
+                    self._connection.mav.send(self._encoded[msg.seq])
+                else:
+                    # Veículo antigo, sem suporte a MISSION_ITEM_INT
+                    connection = self._connection
+                    connection.mav.send(self._items[msg.seq].encode(connection.mav, connection.target_system,
+                                                                    connection.target_component, msg.seq, False))
+                self._advance(max(self.completed, msg.seq))
+            elif msg_type == 'MISSION_ACK':
+                self._finish_ack(msg)
+        elif operation == 'download':
+            if msg_type == 'MISSION_COUNT' and self._received is None:
+                self.total = msg.count
+                self._received = [None] * msg.count
+                if msg.count == 0:
+                    self._send_ack()
+                    self._complete()
+                    return
+                for _ in range(min(MISSION_DOWNLOAD_WINDOW, msg.count)):
+                    self._request_next()
+                self._advance(0)
+            elif msg_type in ('MISSION_ITEM_INT', 'MISSION_ITEM') and self._received is not None:
+                if 0 <= msg.seq < self.total and self._received[msg.seq] is None:
+                    self._received[msg.seq] = MissionItem.from_message(msg)
+                    self._request_next()
+                    self._advance(self.completed + 1)
+                    if self.completed == self.total:
+                        self._send_ack()
+                        self._complete()
+        elif operation == 'clear' and msg_type == 'MISSION_ACK':
+            self._finish_ack(msg)
+
+    # ---- internos ----
+
+    def _transfer(self, operation: str, connection, total: int, prepare: Optional[Callable], start: Callable,
+                  resend: Callable, timeout: float, retries: int):
+        with self._lock:
+            if self.operation is not None:
+                raise exceptions.MissionTransferBusyException()
+            self._connection = connection
+            self.last_operation = operation
+            self._done.clear()
+            self._failure = None
+            self.completed = 0
+            self.total = total
+            self.retries = 0
+            self.error = None
+            self.state = 'running'
+            self._attempts = 0
+            self._item_interval = None
+            self._started = time.perf_counter()
+            self._last_activity = time.monotonic()
+            if prepare is not None:
+                prepare()
+            # Por último: é o que libera o handle() nos workers de ingestão
+            self.operation = operation
+
+        try:
+            self.events.publish(self.progress())
+            start()
+            while not self._done.wait(min(timeout, 0.05)):
+                if time.monotonic() - self._last_activity < self._retry_timeout(timeout):
+                    continue
+                self._attempts += 1
+                if self._attempts > retries:
+                    raise exceptions.ACKTimeoutException(f"Timeout during mission {operation}")
+                self.retries += 1
+                self._last_activity = time.monotonic()
+                resend()
+            if self._failure is not None:
+                raise self._failure
+
+            self.elapsed = time.perf_counter() - self._started
+            self.state = 'finished'
+            return {'operation': operation, 'count': self.total, 'retries': self.retries,
+                    'elapsed_seconds': self.elapsed}
+        except Exception as e:
+            self.elapsed = time.perf_counter() - self._started
+            self.state = 'failed'
+            self.error = str(e)
+            raise
+        finally:
+            self.events.publish(self.progress())
+            self._connection = None
+            self.operation = None
+
+    def _retry_timeout(self, timeout: float) -> float:
+        if self._item_interval is None:
+            return timeout
+        return min(timeout, max(MISSION_RETRY_MIN, MISSION_RETRY_FACTOR * self._item_interval))
+
+    def _advance(self, completed: int) -> None:
+        now = time.monotonic()
+        # Intervalos depois de um reenvio incluem o timeout e não entram na média
+        if self._attempts == 0:
+            interval = now - self._last_activity
+            self._item_interval = interval if self._item_interval is None else 0.8 * self._item_interval + 0.2 * interval
+        self.completed = completed
+        self._attempts = 0
+        self._last_activity = now
+        self.events.publish(self.progress())
+
+    def _complete(self) -> None:
+        self.completed = self.total
+        self._done.set()
+
+    def _finish_ack(self, msg) -> None:
+        if msg.type != mavlink.MAV_MISSION_ACCEPTED:
+            self._failure = exceptions.CommandFailedException(
+                f"Mission {self.operation} failed: {mission_result_name(msg.type)}")
+        self._complete()
+
+    def _send_count(self) -> None:
+        connection = self._connection
+        connection.mav.mission_count_send(connection.target_system, connection.target_component, self.total)
+
+    def _send_ack(self) -> None:
+        connection = self._connection
+        connection.mav.mission_ack_send(connection.target_system, connection.target_component,
+                                        mavlink.MAV_MISSION_ACCEPTED)
+
+    def _request_item(self, seq: int) -> None:
+        connection = self._connection
+        connection.mav.mission_request_int_send(connection.target_system, connection.target_component, seq)
+
+    def _request_next(self) -> None:
+        if self._next_request < self.total:
+            self._request_item(self._next_request)
+            self._next_request += 1
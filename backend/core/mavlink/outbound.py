@@ -0,0 +1,298 @@
+import os
+import time
+import logging
+import itertools
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+from pymavlink import mavutil
+from core.services.metrics import Histogram
+from core.services.latency import LATENCY_BUCKETS
+
+# Classes de prioridade do tráfego de saída, da mais urgente para a menos
+SAFETY, FLIGHT, BULK, STREAM = range(4)
+CLASS_NAMES = ("safety", "flight", "params_missions", "stream_config")
+
+# Orçamento padrão do enlace em bytes/s (0 = sem limite). Um rádio de 57600 baud carrega ~5760 B/s
+# nos dois sentidos; reservar parte disso para a subida evita encher o buffer do rádio.
+OUTBOUND_BYTE_BUDGET = float(os.environ.get("OUTBOUND_BYTE_BUDGET", "0"))
+
+# Rajada máxima acumulada pelo orçamento (segundos de banda)
+OUTBOUND_BURST_SECONDS = 0.25
+
+# Modos de voo que contam como comando de segurança (mudar para eles fura a fila)
+SAFETY_MODES = ("LAND", "RTL", "SMART_RTL", "BRAKE", "QLAND", "QRTL")
+
+_mavlink = mavutil.mavlink
+SAFETY_COMMANDS = {_mavlink.MAV_CMD_NAV_LAND, _mavlink.MAV_CMD_NAV_RETURN_TO_LAUNCH,
+                   _mavlink.MAV_CMD_DO_FLIGHTTERMINATION, _mavlink.MAV_CMD_DO_PARACHUTE}
+STREAM_COMMANDS = {_mavlink.MAV_CMD_SET_MESSAGE_INTERVAL, _mavlink.MAV_CMD_REQUEST_MESSAGE}
+
+_writers = itertools.count(1)
+
+
+class OutboundScheduler:
+    """
+        Escritor único de uma conexão MAVLink. Substitui `connection.mav.send`: quem envia
+        só classifica e enfileira, e a thread do escritor empacota e escreve por ordem de
+        prioridade, respeitando o orçamento de bytes do enlace. Assim uma rajada de
+        PARAM_SET não atrasa um LAND, e chamadas concorrentes da API não se intercalam
+        na porta serial. Mensagens de segurança ignoram o orçamento.
+    """
+
+    def __init__(self, connection, budget: float = OUTBOUND_BYTE_BUDGET):
+        self.connection = connection
+        self.mav = connection.mav
+        self.budget = budget
+        self.queue_delay = [Histogram(LATENCY_BUCKETS) for _ in CLASS_NAMES]
+        self.sent = [0] * len(CLASS_NAMES)
+        self.sent_bytes = [0] * len(CLASS_NAMES)
+        self.coalesced = 0
+        self.errors = 0
+        # (target_system, target_component) -> endereço UDP do veículo; definido por enlaces
+        # compartilhados, onde connection.write iria para o último veículo que falou
+        self.address_for: Optional[Callable[[int, int], Optional[tuple]]] = None
+        # target_system -> conexão do veículo (com mav_type e mode_mapping), para enlaces com vários veículos
+        self.vehicle_for: Optional[Callable[[int], object]] = None
+
+        self._send = type(self.mav).send.__get__(self.mav)  # send original do pymavlink
+        self._queues: List[deque] = [deque() for _ in CLASS_NAMES]
+        self._stream_pending: Dict[Tuple, list] = {}
+        # O mapeamento de modos depende do tipo do veículo (Copter, Plane, Rover...)
+        self._safety_modes_by_type: Dict[Optional[int], set] = {}
+        self._tokens = budget * OUTBOUND_BURST_SECONDS
+        self._refilled = time.monotonic()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_loop, name=f"mavlink-writer-{next(_writers)}", daemon=True)
+        self._thread.start()
+        self.mav.send = self.send
+
+    def _safety_modes(self, target_system: int) -> set:
+        """Números dos modos de segurança no mapeamento de modos do veículo de destino"""
+        # Num enlace com vários veículos o tipo da conexão é o do último heartbeat, de qualquer um
+        connection = self.vehicle_for(target_system) if self.vehicle_for is not None else self.connection
+        mav_type = getattr(connection, 'mav_type', None)
+        modes = self._safety_modes_by_type.get(mav_type)
+        if modes is None:
+            try:
+                mapping = connection.mode_mapping() if connection is not None else None
+            except Exception:
+                mapping = None
+            if not mapping:
+                # Veículo ainda sem heartbeat: assume a numeração do ArduCopter (sem guardar)
+                mapping = {name: number for number, name in mavutil.mode_mapping_acm.items()}
+                return {number for name, number in mapping.items() if name in SAFETY_MODES}
+            modes = self._safety_modes_by_type[mav_type] = \
+                {number for name, number in mapping.items() if name in SAFETY_MODES}
+        return modes
+
+    # ---- classificação ----
+
+    def classify(self, msg) -> int:
+        msg_type = msg.get_type()
+        if msg_type in ('COMMAND_LONG', 'COMMAND_INT'):
+            command = msg.command
+            if command in SAFETY_COMMANDS:
+                return SAFETY
+            if command == _mavlink.MAV_CMD_COMPONENT_ARM_DISARM and msg.param1 == 0:
+                return SAFETY  # desarmar
+            if command == _mavlink.MAV_CMD_DO_SET_MODE and int(msg.param2) in self._safety_modes(msg.target_system):
+                return SAFETY
+            if command in STREAM_COMMANDS:
+                return STREAM
+            return FLIGHT
+        if msg_type == 'SET_MODE':
+            return SAFETY if msg.custom_mode in self._safety_modes(msg.target_system) else FLIGHT
+        if msg_type == 'REQUEST_DATA_STREAM':
+            return STREAM
+        if msg_type.startswith('PARAM_') or msg_type.startswith('MISSION_'):
+            return BULK
+        return FLIGHT
+
+    @staticmethod
+    def _stream_key(msg) -> Optional[Tuple]:
+        """Pedidos de taxa repetidos para a mesma mensagem: só o mais recente importa"""
+        if msg.get_type() == 'REQUEST_DATA_STREAM':
+            return ('stream', msg.target_system, msg.req_stream_id)
+        if msg.get_type() == 'COMMAND_LONG' and msg.command == _mavlink.MAV_CMD_SET_MESSAGE_INTERVAL:
+            return ('interval', msg.target_system, int(msg.param1))
+        return None
+
+    # ---- envio ----
+
+    def send(self, msg, force_mavlink1: bool = False) -> None:
+        """Mesma assinatura do MAVLink.send do pymavlink; retorna sem esperar a escrita"""
+        priority = self.classify(msg)
+        now = time.perf_counter()
+        with self._condition:
+            if priority == STREAM:
+                key = self._stream_key(msg)
+                pending = self._stream_pending.get(key) if key is not None else None
+                if pending is not None:
+                    # Mantém a posição na fila e troca pelo pedido novo
+                    pending[1], pending[2] = msg, force_mavlink1
+                    self.coalesced += 1
+                    return
+                entry = [now, msg, force_mavlink1, key, None]
+                if key is not None:
+                    self._stream_pending[key] = entry
+            else:
+                entry = [now, msg, force_mavlink1, None, None]
+            self._queues[priority].append(entry)
+            self._condition.notify()
+
+    def write(self, buf: bytes, priority: int = FLIGHT, target: Optional[Tuple[int, int]] = None) -> None:
+        """
+            Frame já empacotado (ex.: vindo de outro GCS), escrito na vez da sua classe.
+            `target` é o (sysid, compid) do veículo a que o frame se destina.
+        """
+        with self._condition:
+            self._queues[priority].append([time.perf_counter(), bytes(buf), False, None, target])
+            self._condition.notify()
+
+    def _next(self) -> Optional[Tuple[int, list]]:
+        for priority, queue in enumerate(self._queues):
+            if queue:
+                entry = queue.popleft()
+                if entry[3] is not None:
+                    self._stream_pending.pop(entry[3], None)
+                return priority, entry
+        return None
+
+    def _wait_budget(self, priority: int) -> None:
+        """Bloqueia enquanto o enlace está sem orçamento (a segurança passa mesmo em débito)"""
+        if not self.budget or priority == SAFETY:
+            return
+        while not self._closed:
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._refilled) * self.budget,
+                               self.budget * OUTBOUND_BURST_SECONDS)
+            self._refilled = now
+            if self._tokens >= 0:
+                return
+            # Enquanto espera, uma mensagem de segurança que chegar é escrita antes
+            with self._condition:
+                if self._queues[SAFETY]:
+                    return
+                self._condition.wait(-self._tokens / self.budget)
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._condition:
+                item = self._next()
+                while item is None and not self._closed:
+                    self._condition.wait()
+                    item = self._next()
+                if item is None:
+                    return
+            priority, (queued, msg, force_mavlink1, _, target) = item
+
+            self._wait_budget(priority)
+            if self._closed:
+                return
+            if self._queues[SAFETY] and priority != SAFETY:
+                # Uma mensagem de segurança chegou durante a espera: ela vai primeiro
+                with self._condition:
+                    self._queues[priority].appendleft([queued, msg, force_mavlink1, None, target])
+                continue
+
+            try:
+                address = self._address(msg, target)
+                if isinstance(msg, bytes):
+                    if address is not None:
+                        self.connection.port.sendto(msg, address)
+                    else:
+                        self.connection.write(msg)
+                    size = len(msg)
+                elif address is not None:
+                    size = self._send_to(msg, force_mavlink1, address)
+                else:
+                    self._send(msg, force_mavlink1)
+                    size = len(msg.get_msgbuf())
+            except Exception as e:
+                self.errors += 1
+                logging.warning(f"Error writing MAVLink message {getattr(msg, 'get_type', lambda: 'frame')()}: {e}")
+                continue
+
+            self.queue_delay[priority].observe(time.perf_counter() - queued)
+            self.sent[priority] += 1
+            self.sent_bytes[priority] += size
+            if self.budget:
+                self._tokens -= size
+
+    def _address(self, msg, target: Optional[Tuple[int, int]]) -> Optional[tuple]:
+        if self.address_for is None:
+            return None
+        if target is None:
+            target_system = getattr(msg, 'target_system', None)
+            if target_system is None:
+                return None
+            target = (target_system, getattr(msg, 'target_component', 0))
+        return self.address_for(*target)
+
+    def _send_to(self, msg, force_mavlink1: bool, address: tuple) -> int:
+        """O mesmo que MAVLink.send do pymavlink, mas para um endereço UDP específico"""
+        mav = self.mav
+        buf = msg.pack(mav, force_mavlink1=force_mavlink1)
+        self.connection.port.sendto(buf, address)
+        mav.seq = (mav.seq + 1) % 256
+        mav.total_packets_sent += 1
+        mav.total_bytes_sent += len(buf)
+        if mav.send_callback is not None:
+            mav.send_callback(msg, *mav.send_callback_args, **mav.send_callback_kwargs)
+        return len(buf)
+
+    def set_budget(self, budget: float) -> None:
+        with self._condition:
+            self.budget = budget
+            self._tokens = budget * OUTBOUND_BURST_SECONDS
+            self._refilled = time.monotonic()
+            self._condition.notify()
+
+    def close(self) -> None:
+        """Para o escritor (mensagens ainda na fila são descartadas) e devolve o send original"""
+        with self._condition:
+            self._closed = True
+            for queue in self._queues:
+                queue.clear()
+            self._stream_pending.clear()
+            self._condition.notify()
+        if self.mav.__dict__.get('send') == self.send:
+            del self.mav.send
+
+    def depth(self) -> List[int]:
+        return [len(queue) for queue in self._queues]
+
+    def stats(self) -> dict:
+        return {
+            'budget_bytes_per_second': self.budget or None,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'classes': {
+                name: {'queued': len(self._queues[i]), 'sent': self.sent[i], 'sent_bytes': self.sent_bytes[i],
+                       'queue_delay_ms': 1000 * self.queue_delay[i].sum / self.queue_delay[i].count
+                       if self.queue_delay[i].count else None}
+                for i, name in enumerate(CLASS_NAMES)
+            }
+        }
+
+
+def attach_scheduler(connection) -> Optional[OutboundScheduler]:
+    """
+        Instala (ou reaproveita) o escritor da conexão. Veículos de um enlace compartilhado
+        usam o mesmo objeto MAVLink do enlace, então dividem um único escritor.
+    """
+    mav = getattr(connection, 'mav', None)
+    if mav is None or getattr(mav, 'file', None) is None:
+        return None
+    existing = getattr(mav, 'send', None)
+    if getattr(existing, '__self__', None).__class__ is OutboundScheduler:
+        return existing.__self__
+    return OutboundScheduler(connection)
+
+
+def detach_scheduler(connection) -> None:
+    scheduler = getattr(getattr(getattr(connection, 'mav', None), 'send', None), '__self__', None)
+    if isinstance(scheduler, OutboundScheduler):
+        scheduler.close()
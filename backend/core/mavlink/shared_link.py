@@ -0,0 +1,301 @@
+import errno
+import queue
+import socket
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from pymavlink import mavutil
+from core.mavlink.outbound import attach_scheduler
+from core.mavlink.stream_rates import StreamBudget
+
+# Strings de conexão de enlaces compartilhados: "mux:<endereço>", ex.: "mux:0.0.0.0:14550".
+# Cada veículo que aparecer no enlace vira um drone "mux:<endereço>/<sysid>"
+# (ou "mux:<endereço>/<sysid>-<compid>" se o autopiloto não for o componente 1).
+SHARED_LINK_PREFIX = "mux:"
+
+# Mensagens guardadas por veículo enquanto ele ainda está conectando (download de parâmetros)
+VEHICLE_QUEUE_SIZE = 1000
+
+# Um veículo que falhou ao conectar só é tentado de novo depois desta espera, que dobra a
+# cada falha até o máximo (sem isso cada heartbeat dispararia um novo download de parâmetros)
+VEHICLE_RETRY_MIN_DELAY = 5.0
+VEHICLE_RETRY_MAX_DELAY = 300.0
+
+VehicleKey = Tuple[int, int]
+
+
+def is_shared_link(connection_string: str) -> bool:
+    return connection_string.startswith(SHARED_LINK_PREFIX)
+
+
+def split_vehicle_connection_string(connection_string: str) -> Tuple[str, Optional[VehicleKey]]:
+    """Separa "mux:<endereço>/<sysid>[-<compid>]" em (enlace, (sysid, compid))"""
+    link, _, vehicle = connection_string.partition('/')
+    if not vehicle:
+        return link, None
+    sysid, _, compid = vehicle.partition('-')
+    return link, (int(sysid), int(compid or 1))
+
+
+def vehicle_connection_string(link: str, key: VehicleKey) -> str:
+    sysid, compid = key
+    return f"{link}/{sysid}" if compid == 1 else f"{link}/{sysid}-{compid}"
+
+
+class VehicleConnection:
+    """
+        Visão de um único veículo sobre o enlace compartilhado, com a mesma interface
+        da conexão do pymavlink que o Drone usa. O envio sai pelo socket do enlace
+        (com target_system/target_component do veículo), endereçado ao último endereço
+        de onde o veículo falou; o recebimento vem do laço de leitura do enlace, que já
+        decodificou e roteou a mensagem.
+    """
+
+    def __init__(self, link: 'SharedLink', key: VehicleKey):
+        self.link = link
+        self.key = key
+        self.target_system, self.target_component = key
+        self.mav = link.connection.mav
+        self.flightmode = 'UNKNOWN'
+        self.mav_type = None
+        self.muted = False
+        # Endereço de origem dos pacotes do veículo (enlaces UDP); None em serial/TCP
+        self.address = None
+
+        # Até o drone terminar de conectar as mensagens ficam na fila (recv_match, só da thread
+        # que conecta); depois são entregues direto para o handler. A thread de leitura do
+        # DroneManager nunca lê um veículo.
+        self.handler: Optional[Callable] = None
+        self._queue: queue.Queue = queue.Queue(VEHICLE_QUEUE_SIZE)
+        # deliver() e attach() se excluem: a fila é esvaziada antes de qualquer entrega direta
+        self._handoff_lock = threading.Lock()
+
+    def deliver(self, msg, read_start: float = None) -> None:
+        """`read_start` é o perf_counter de antes da leitura do pacote, para o traçado de latência"""
+        if msg.get_type() == 'HEARTBEAT':
+            self.mav_type = msg.type
+            self.flightmode = mavutil.mode_string_v10(msg)
+
+        with self._handoff_lock:
+            if self.handler is not None:
+                self.handler(msg, read_start)
+                return
+            try:
+                self._queue.put_nowait((msg, read_start))
+            except queue.Full:
+                # Descarta a mais antiga: quem está conectando quer as mensagens recentes
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self._queue.put_nowait((msg, read_start))
+
+    def attach(self, handler: Callable) -> None:
+        """
+            Entrega as mensagens ainda na fila, na ordem, e passa a entregar direto para o
+            handler, chamado como handler(msg, read_start)
+        """
+        with self._handoff_lock:
+            while True:
+                try:
+                    handler(*self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self.handler = handler
+
+    def recv_match(self, condition=None, type=None, blocking=False, timeout=None):
+        if isinstance(type, str):
+            type = [type]
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            try:
+                if not blocking:
+                    msg, _ = self._queue.get_nowait()
+                else:
+                    wait = None if deadline is None else max(deadline - time.monotonic(), 0)
+                    msg, _ = self._queue.get(timeout=wait)
+            except queue.Empty:
+                return None
+            if type is None or msg.get_type() in type:
+                return msg
+
+    def wait_heartbeat(self, blocking=True, timeout=None):
+        return self.recv_match(type='HEARTBEAT', blocking=blocking, timeout=timeout)
+
+    def mode_mapping(self):
+        return mavutil.mode_mapping_byname(self.mav_type) if self.mav_type is not None else None
+
+    def set_mode(self, mode) -> None:
+        self.mav.command_long_send(self.target_system, self.target_component,
+                                   mavutil.mavlink.MAV_CMD_DO_SET_MODE, 0,
+                                   mavutil.mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED, mode, 0, 0, 0, 0, 0)
+
+    def param_set_send(self, parm_name, parm_value, parm_type=None) -> None:
+        if parm_type is None:
+            parm_type = mavutil.mavlink.MAVLINK_TYPE_FLOAT
+        self.mav.param_set_send(self.target_system, self.target_component,
+                                parm_name.encode('utf8'), parm_value, parm_type)
+
+    def write(self, buf: bytes) -> None:
+        if self.link.outbound is not None:
+            self.link.outbound.write(buf, target=self.key)
+        else:
+            self.link.connection.write(buf)
+
+    def close(self) -> None:
+        # O socket é do enlace; o veículo só deixa de ser atendido
+        self.handler = None
+        self.muted = True
+
+
+class SharedLink:
+    """
+        Um socket MAVLink compartilhado por vários veículos (bridge de telemetria,
+        rádio mesh). Uma única thread lê e decodifica cada pacote uma vez e roteia
+        a mensagem para o veículo pelo (sysid, compid) de origem.
+    """
+
+    def __init__(self, connection_string: str, on_new_vehicle: Callable[['SharedLink', VehicleConnection], None]):
+        self.connection_string = connection_string
+        self.connection = mavutil.mavlink_connection(connection_string[len(SHARED_LINK_PREFIX):].replace('_', '/'))
+        # Um escritor para o socket inteiro: os veículos dividem a prioridade e o orçamento do enlace
+        self.outbound = attach_scheduler(self.connection)
+        if self.outbound is not None:
+            # Num socket de escuta o pymavlink escreveria para quem falou por último: cada
+            # frame vai para o endereço do veículo de destino
+            self.outbound.address_for = self.address_of
+            # SET_MODE é classificado pelo mapeamento de modos do veículo de destino
+            self.outbound.vehicle_for = lambda target_system: self._vehicle_by_system(target_system, 0)
+        self.vehicles: Dict[VehicleKey, VehicleConnection] = {}
+        # Veículos que falharam ao conectar: (falhas seguidas, próxima tentativa em time.monotonic())
+        self._failed: Dict[VehicleKey, Tuple[int, float]] = {}
+        # A thread do enlace registra veículos; threads de conexão e da API os removem
+        self._lock = threading.Lock()
+        # Os veículos dividem a banda de telemetria do enlace
+        self.stream_budget = StreamBudget(name=connection_string)
+        self.unrouted = 0
+        # Endereço de origem do último pacote lido (o pymavlink não expõe isso por pacote)
+        self.source_address = None
+        if isinstance(self.connection, mavutil.mavudp):
+            self.connection.recv = self._recv_udp
+        # Posição inicial no mundo dos veículos do enlace, definida por quem abre o enlace
+        self.origin = None
+        self._on_new_vehicle = on_new_vehicle
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"shared-link-{connection_string}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=2)
+        for vehicle in self.vehicle_list():
+            vehicle.close()
+        if self.outbound is not None:
+            self.outbound.close()
+        self.connection.close()
+
+    def vehicle(self, key: VehicleKey) -> Optional[VehicleConnection]:
+        with self._lock:
+            return self.vehicles.get(key)
+
+    def vehicle_list(self) -> List[VehicleConnection]:
+        with self._lock:
+            return list(self.vehicles.values())
+
+    def _vehicle_by_system(self, target_system: int, target_component: int) -> Optional[VehicleConnection]:
+        with self._lock:
+            vehicle = self.vehicles.get((target_system, target_component))
+            if vehicle is None:
+                # Comandos para o componente 0 (todos) ou para outro componente do mesmo veículo
+                vehicle = next((v for (sysid, _), v in self.vehicles.items() if sysid == target_system), None)
+        return vehicle
+
+    def address_of(self, target_system: int, target_component: int):
+        """Endereço de onde o veículo de destino falou por último (None se desconhecido)"""
+        vehicle = self._vehicle_by_system(target_system, target_component)
+        return vehicle.address if vehicle is not None else None
+
+    def forget(self, key: VehicleKey) -> None:
+        """Permite que o veículo seja registrado de novo no próximo heartbeat"""
+        with self._lock:
+            self.vehicles.pop(key, None)
+            self._failed.pop(key, None)
+
+    def connect_failed(self, key: VehicleKey) -> float:
+        """
+            O veículo não conectou: sai do enlace e só volta a ser registrado por um heartbeat
+            depois da espera (que dobra a cada falha seguida). Retorna a espera em segundos.
+        """
+        with self._lock:
+            self.vehicles.pop(key, None)
+            failures = self._failed.get(key, (0, 0.0))[0] + 1
+            delay = min(VEHICLE_RETRY_MIN_DELAY * 2 ** (failures - 1), VEHICLE_RETRY_MAX_DELAY)
+            self._failed[key] = (failures, time.monotonic() + delay)
+        return delay
+
+    def connect_succeeded(self, key: VehicleKey) -> None:
+        with self._lock:
+            self._failed.pop(key, None)
+
+    def _recv_udp(self, n=None):
+        """mavudp.recv, guardando de onde veio o pacote"""
+        connection = self.connection
+        try:
+            data, address = connection.port.recvfrom(mavutil.UDP_MAX_PACKET_LEN)
+        except socket.error as e:
+            if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.ECONNREFUSED):
+                return ""
+            raise
+        self.source_address = address
+        # Mantém o que o pymavlink faria, para as escritas sem veículo de destino (ex.: TIMESYNC)
+        if connection.udp_server and hasattr(connection, 'clients'):
+            connection.clients.add(address)
+            connection.clients_last_alive[address] = time.time()
+        elif connection.udp_server or connection.broadcast:
+            connection.last_address = address
+        return data
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                read_start = time.perf_counter()
+                msg = self.connection.recv_match(blocking=True, timeout=0.1)
+                if msg is not None:
+                    self._route(msg, read_start)
+            except Exception as e:
+                logging.error(f"Error reading shared link {self.connection_string}: {e}")
+
+    def _route(self, msg, read_start: float = None) -> None:
+        if msg.get_type() == 'BAD_DATA':
+            self.unrouted += 1
+            return
+
+        key = (msg.get_srcSystem(), msg.get_srcComponent())
+        with self._lock:
+            vehicle = self.vehicles.get(key)
+            if vehicle is None:
+                # Só heartbeats de autopilotos registram veículos (ignora GCS, gimbals, etc.)
+                failed = self._failed.get(key)
+                if (msg.get_type() != 'HEARTBEAT' or msg.autopilot == mavutil.mavlink.MAV_AUTOPILOT_INVALID
+                        or (failed is not None and time.monotonic() < failed[1])):
+                    self.unrouted += 1
+                    return
+                vehicle = VehicleConnection(self, key)
+                vehicle.address = self.source_address
+                self.vehicles[key] = vehicle
+                registered = True
+            else:
+                registered = False
+
+        if registered:
+            vehicle.deliver(msg, read_start)
+            self._on_new_vehicle(self, vehicle)
+            return
+
+        # O veículo pode mudar de endereço (reinício do SITL, troca de rota no mesh)
+        vehicle.address = self.source_address or vehicle.address
+        if not vehicle.muted:
+            vehicle.deliver(msg, read_start)
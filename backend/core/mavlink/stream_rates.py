@@ -0,0 +1,221 @@
+import os
+import math
+import time
+import logging
+import threading
+from typing import Dict, List, Tuple
+from pymavlink import mavutil
+
+# Níveis de demanda: ninguém olhando, aparece na lista/mapa, tela de detalhes aberta
+DEMAND_IDLE = 0
+DEMAND_OVERVIEW = 1
+DEMAND_DETAIL = 2
+DEMAND_LEVELS = {"idle": DEMAND_IDLE, "overview": DEMAND_OVERVIEW, "detail": DEMAND_DETAIL}
+
+# Taxas (Hz) de cada stream por nível de demanda: (idle, overview, detail)
+STREAM_RATES: Dict[str, Tuple[float, float, float]] = {
+    'ATTITUDE': (1, 4, 20),
+    'LOCAL_POSITION_NED': (1, 4, 10),
+    'VFR_HUD': (0.5, 2, 5),
+    'NAV_CONTROLLER_OUTPUT': (0.2, 1, 2),
+    'BATTERY_STATUS': (0.2, 1, 1),
+    'EKF_STATUS_REPORT': (0.2, 0.5, 1),
+}
+
+# Uma demanda expira se o cliente não renovar dentro deste intervalo
+WATCH_TTL = 10.0  # segundos
+
+# Banda do enlace (padrão: rádio SiK a 57600 baud) e a fração reservada para telemetria;
+# o restante fica para parâmetros, comandos e missões
+LINK_BANDWIDTH = int(os.environ.get("STREAM_LINK_BANDWIDTH", "5760"))  # bytes/s
+TELEMETRY_BANDWIDTH_SHARE = 0.6
+
+_MAVLINK_OVERHEAD = 8  # cabeçalho + checksum do MAVLink 1
+
+
+def message_size(msg_type: str) -> int:
+    """Tamanho em bytes de uma mensagem no enlace"""
+    msg_class = mavutil.mavlink.mavlink_map[getattr(mavutil.mavlink, f"MAVLINK_MSG_ID_{msg_type}")]
+    return msg_class.unpacker.size + _MAVLINK_OVERHEAD
+
+
+STREAM_MESSAGE_SIZES = {msg_type: message_size(msg_type) for msg_type in STREAM_RATES}
+
+
+def level_usage(level: int) -> float:
+    """Bytes/s que os streams usam em um nível de demanda, sem redução"""
+    return sum(levels[level] * STREAM_MESSAGE_SIZES[msg_type] for msg_type, levels in STREAM_RATES.items())
+
+
+def rates_for(levels: List[int], bandwidth: float = LINK_BANDWIDTH) -> List[Dict[str, float]]:
+    """
+        Taxas de cada veículo de um enlace, pelo nível de demanda de cada um. Se juntas
+        ultrapassarem a fatia da banda reservada para telemetria, as taxas de idle ficam
+        garantidas e só o que passa delas é reduzido, na mesma proporção para todos.
+    """
+    budget = bandwidth * TELEMETRY_BANDWIDTH_SHARE
+    idle = level_usage(DEMAND_IDLE) * len(levels)
+    usage = sum(level_usage(level) for level in levels)
+    factor = 1.0
+    if usage > budget:
+        factor = max(budget - idle, 0) / (usage - idle) if usage > idle else 0.0
+    rates = []
+    for level in levels:
+        # Arredonda para baixo: a soma não pode passar do orçamento por arredondamento
+        rates.append({msg_type: math.floor(100 * (values[DEMAND_IDLE] + (values[level] - values[DEMAND_IDLE]) * factor)) / 100
+                      for msg_type, values in STREAM_RATES.items()})
+    return rates
+
+
+class StreamBudget:
+    """
+        Banda de telemetria de uma conexão, dividida entre os veículos que a usam (vários
+        veículos num enlace compartilhado disputam o mesmo rádio). A divisão é calculada
+        uma vez para todos os veículos e reaproveitada até alguma demanda mudar ou expirar.
+    """
+
+    def __init__(self, bandwidth: float = LINK_BANDWIDTH, name: str = ''):
+        self.bandwidth = bandwidth
+        self.name = name
+        self.over_budget = False
+        self._controllers: Dict['StreamRateController', None] = {}
+        self._allocation: Dict['StreamRateController', Dict[str, float]] = {}
+        self._valid_until = 0.0     # time.monotonic() em que a divisão precisa ser refeita
+        self._generation = 0        # muda a cada invalidate(), para não guardar uma divisão velha
+        self._lock = threading.Lock()
+
+    def join(self, controller: 'StreamRateController') -> None:
+        with self._lock:
+            self._controllers[controller] = None
+            self._invalidate()
+
+    def leave(self, controller: 'StreamRateController') -> None:
+        with self._lock:
+            if self._controllers.pop(controller, 0) is None:
+                self._invalidate()
+
+    def vehicles(self) -> int:
+        with self._lock:
+            return len(self._controllers)
+
+    def invalidate(self) -> None:
+        """A demanda de algum veículo mudou: a próxima consulta refaz a divisão"""
+        with self._lock:
+            self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._valid_until = 0.0
+        self._generation += 1
+
+    def rates(self, controller: 'StreamRateController') -> Dict[str, float]:
+        """Taxas do veículo considerando a demanda de todos os veículos da conexão"""
+        now = time.monotonic()
+        with self._lock:
+            rates = self._allocation.get(controller)
+            if rates is not None and now < self._valid_until:
+                return rates
+            controllers = list(self._controllers)
+            generation = self._generation
+        if controller not in self._controllers:
+            controllers.append(controller)
+
+        over_budget = level_usage(DEMAND_IDLE) * len(controllers) > self.bandwidth * TELEMETRY_BANDWIDTH_SHARE
+        if over_budget and not self.over_budget:
+            logging.warning(f"Idle telemetry of {len(controllers)} vehicle(s) on {self.name or 'link'} exceeds "
+                            f"{self.bandwidth * TELEMETRY_BANDWIDTH_SHARE:.0f} B/s; the link will be saturated")
+        self.over_budget = over_budget
+
+        levels = [other.demand() for other in controllers]
+        # A divisão vale até a primeira demanda expirar (renovações não mudam os níveis)
+        valid_until = min((other.expires() for other in controllers), default=math.inf)
+        allocation = dict(zip(controllers, rates_for(levels, self.bandwidth)))
+        with self._lock:
+            if generation == self._generation:
+                self._allocation = allocation
+                self._valid_until = valid_until
+        return allocation[controller]
+
+
+class StreamRateController:
+    """
+        Decide as taxas dos streams de telemetria de um drone a partir da demanda dos
+        clientes. Cada cliente "assiste" o drone em um nível e precisa renovar antes de
+        WATCH_TTL; a demanda efetiva é o maior nível ainda válido. A banda é a da conexão,
+        dividida com os outros veículos que a compartilham.
+    """
+
+    def __init__(self, budget: StreamBudget = None):
+        self.budget = budget or StreamBudget()
+        self.budget.join(self)
+        self._watchers: Dict[str, Tuple[int, float]] = {}
+        self._applied: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def share(self, budget: StreamBudget) -> None:
+        """Passa a dividir a banda de `budget` (ex.: a do enlace compartilhado do veículo)"""
+        self.budget.leave(self)
+        self.budget = budget
+        budget.join(self)
+
+    def release(self) -> None:
+        """Deixa de contar na banda da conexão (drone desconectado)"""
+        self.budget.leave(self)
+
+    def watch(self, client_id: str, level: int) -> None:
+        with self._lock:
+            before = self._level()
+            self._watchers[client_id] = (level, time.monotonic() + WATCH_TTL)
+            changed = self._level() != before
+        if changed:
+            self.budget.invalidate()
+
+    def unwatch(self, client_id: str) -> None:
+        with self._lock:
+            before = self._level()
+            self._watchers.pop(client_id, None)
+            changed = self._level() != before
+        if changed:
+            self.budget.invalidate()
+
+    def _level(self) -> int:
+        return max((level for level, _ in self._watchers.values()), default=DEMAND_IDLE)
+
+    def expires(self) -> float:
+        """Quando a primeira demanda ainda válida expira (infinito se não há nenhuma)"""
+        with self._lock:
+            return min((expires for _, expires in self._watchers.values()), default=math.inf)
+
+    def demand(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            for client_id in [client for client, (_, expires) in self._watchers.items() if expires < now]:
+                del self._watchers[client_id]
+            return self._level()
+
+    def changes(self, force: bool = False) -> Dict[str, float]:
+        """Streams cuja taxa precisa mudar para a demanda atual (e marca como aplicadas)"""
+        target = self.budget.rates(self)
+        with self._lock:
+            changed = {msg_type: rate for msg_type, rate in target.items()
+                       if force or self._applied.get(msg_type) != rate}
+            self._applied.update(changed)
+        return changed
+
+    def reset(self) -> None:
+        """Esquece as taxas aplicadas (por exemplo, após reconectar)"""
+        with self._lock:
+            self._applied.clear()
+
+    def status(self) -> dict:
+        level = self.demand()
+        with self._lock:
+            applied = dict(self._applied)
+        return {
+            'demand': next(name for name, value in DEMAND_LEVELS.items() if value == level),
+            'rates': applied,
+            'bandwidth_bytes': sum(rate * STREAM_MESSAGE_SIZES[msg_type] for msg_type, rate in applied.items()),
+            'bandwidth_limit_bytes': self.budget.bandwidth * TELEMETRY_BANDWIDTH_SHARE,
+            'link_vehicles': self.budget.vehicles(),
+            'over_budget': self.budget.over_budget,
+            'watch_ttl': WATCH_TTL
+        }
@@ -1,15 +1,39 @@
-import queue
 import time
 import utils.exceptions as exceptions
 from pymavlink import mavutil
 import core.mavlink.mavlink_commands as mav
 from core.models.geometry import Point
+from core.models.flight_track import FlightTrack
 from core.models.enums import MavResult
 from core.models.telemetry.battery import BatteryStatus
 from core.models.telemetry.system_state import SystemBaseMode
 from core.models.telemetry.vfr_hud import VfrHud
 from core.models.telemetry.ekf_status import EkfStatus
+from core.models.telemetry.telemetry_history import TelemetryHistory
 from core.parameters.drone_parameters import DroneParameters
+from core.services.metrics import IngestStats
+from core.services.latency import LatencyTracer
+from core.services.ingest import MessageQueue
+from core.mavlink.stream_rates import StreamRateController
+from core.mavlink.forwarding import MavlinkForwarder
+from core.mavlink.outbound import OutboundScheduler, attach_scheduler
+from core.mavlink.mission import MISSION_MESSAGES, MissionItem, MissionTransfer
+from utils.versioning import next_version
+
+# Mensagens que alteram o conteúdo de get_drone_info
+TELEMETRY_MESSAGES = {
+    'LOCAL_POSITION_NED', 'NAV_CONTROLLER_OUTPUT', 'BATTERY_STATUS', 'HEARTBEAT',
+    'VFR_HUD', 'ATTITUDE', 'EKF_STATUS_REPORT'
+}
+
+# Tipos de HEARTBEAT que não vêm do veículo e não definem o modo de voo
+NON_VEHICLE_TYPES = {
+    mavutil.mavlink.MAV_TYPE_GCS, mavutil.mavlink.MAV_TYPE_GIMBAL,
+    mavutil.mavlink.MAV_TYPE_ADSB, mavutil.mavlink.MAV_TYPE_ONBOARD_CONTROLLER
+}
+
+# Mensagens que geram uma nova linha no histórico de telemetria
+HISTORY_MESSAGES = {'LOCAL_POSITION_NED', 'BATTERY_STATUS', 'VFR_HUD', 'ATTITUDE'}
 
 class Drone:
     def __init__(self):
@@ -18,10 +42,21 @@ class Drone:
 
         self.system_base_mode = SystemBaseMode()
         self.connected = False
-
-        self.message_queue = queue.Queue(100)
+        # "ok", "degraded" ou "lost", mantido pelo LinkSupervisor
+        self.link_state = 'ok'
+
+        self.message_queue = MessageQueue()
+        self.ingest_stats = IngestStats()
+        self.latency = LatencyTracer()
+        self.stream_rates = StreamRateController()
+        self.forwarding = MavlinkForwarder(self.__inject_frame)
+        # Escritor único da conexão (prioridades e orçamento de bytes), instalado ao conectar
+        self.outbound: OutboundScheduler = None
+        self.mission = MissionTransfer()
 
         self.position : Point = Point(0, 0, 0)  
+        # Posição do drone no mundo quando conectou: o LOCAL_POSITION_NED é relativo a ela
+        self.origin : Point = Point(0, 0, 0)
         self.waypoint_distance = 0
         self._armed = False
         self.mode = 'STABILIZE'
@@ -41,6 +76,14 @@ class Drone:
 
         self.drone_parameters = DroneParameters()
 
+        # muda sempre que algum campo de get_drone_info muda
+        self.telemetry_version : int = next_version()
+
+        self.telemetry_history = TelemetryHistory()
+        # Horário gravado da última linha do histórico num replay (None ao vivo)
+        self.history_clock = None
+        self.flight_track = FlightTrack()
+
         # commands ack
         self.armed_ack : MavResult = MavResult.IDLE
         self.takeoff_ack : MavResult = MavResult.IDLE
@@ -60,40 +103,69 @@ class Drone:
     def __is_heartbeat_from_quadrotor(self, msg):
         return msg.type == mavutil.mavlink.MAV_TYPE_QUADROTOR
 
-    def update_info(self, msg):
-        if msg.get_type() == 'LOCAL_POSITION_NED':
+    def __is_heartbeat_from_vehicle(self, msg):
+        # Mesmo critério do pymavlink para atualizar flightmode (ignora GCS, gimbal, etc.)
+        if msg.get_srcComponent() == mavutil.mavlink.MAV_COMP_ID_GIMBAL:
+            return False
+        return msg.type not in NON_VEHICLE_TYPES and msg.autopilot != mavutil.mavlink.MAV_AUTOPILOT_INVALID
+
+    def to_world(self, x: float, y: float, z: float) -> tuple:
+        """Converte uma posição local (LOCAL_POSITION_NED) para o referencial comum da frota"""
+        origin = self.origin
+        return x + origin.x, y + origin.y, z + origin.z
+
+    def update_info(self, msg, timestamp: float = None):
+        """`timestamp` é o horário gravado da mensagem num replay; ao vivo vale a hora atual"""
+        msg_type = msg.get_type()
+
+        if msg_type == 'LOCAL_POSITION_NED':
             self.position = Point(msg.x, msg.y, msg.z)
-        elif msg.get_type() == 'NAV_CONTROLLER_OUTPUT':
+            self.flight_track.append(msg.x, msg.y, msg.z)
+        elif msg_type == 'NAV_CONTROLLER_OUTPUT':
             self.waypoint_distance = msg.wp_dist
-        elif msg.get_type() == 'BATTERY_STATUS':
+        elif msg_type == 'BATTERY_STATUS':
             self.battery_status.level = msg.battery_remaining
-        elif msg.get_type() == 'HEARTBEAT' and self.__is_heartbeat_from_quadrotor(msg):
-            self._armed = self.__is_armed(msg)
-            self.system_base_mode.update(msg.base_mode)
-        elif msg.get_type() == 'VFR_HUD':
+        elif msg_type == 'HEARTBEAT':
+            if self.__is_heartbeat_from_quadrotor(msg):
+                self._armed = self.__is_armed(msg)
+                self.system_base_mode.update(msg.base_mode)
+            if self.__is_heartbeat_from_vehicle(msg):
+                # O modo vem do heartbeat aplicado, não de connection.flightmode: esta mensagem pode
+                # ter esperado na fila de ingestão enquanto a conexão já lia heartbeats mais novos
+                self.mode = mavutil.mode_string_v10(msg)
+        elif msg_type == 'VFR_HUD':
             self.vfr.update(msg)
-        elif msg.get_type() == 'ATTITUDE':
+        elif msg_type == 'ATTITUDE':
             self.attitude['roll'] = msg.roll
             self.attitude['pitch'] = msg.pitch
             self.attitude['yaw'] = msg.yaw
-        elif msg.get_type() == 'EKF_STATUS_REPORT':
+        elif msg_type == 'EKF_STATUS_REPORT':
             self.ekf_status_report.update(msg)
             self.ekf_ok = self.ekf_status_report.is_ekf_ok(msg)
-        elif msg.get_type() == 'COMMAND_ACK':
+        elif msg_type == 'COMMAND_ACK':
             if msg.command == mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM:
                 self.armed_ack = MavResult(msg.result)
             elif msg.command == mavutil.mavlink.MAV_CMD_NAV_TAKEOFF:
                 self.takeoff_ack =  MavResult(msg.result)
             elif msg.command == mavutil.mavlink.MAV_CMD_DO_SET_MODE:
                 self.set_mode_ack = MavResult(msg.result)
-        elif msg.get_type() == 'PARAM_VALUE':
+        elif msg_type == 'PARAM_VALUE':
             self.drone_parameters.update(msg)
+        elif msg_type in MISSION_MESSAGES:
+            self.mission.handle(msg)
+
+        if msg_type in TELEMETRY_MESSAGES:
+            self.telemetry_version = next_version()
 
-        self.mode = self.connection.flightmode
+        if msg_type in HISTORY_MESSAGES:
+            if timestamp is not None:
+                # O histórico de um replay segue o relógio da gravação, não o da reprodução
+                self.history_clock = timestamp
+            self.__record_history(timestamp if timestamp is not None else time.time())
 
         self.__log_telemetry(msg)
 
-    def __request_data(self, command_id) -> None:
+    def __request_data(self, command_id, interval_us: float = 1000000) -> None:
         self.__check_connection()
 
         message = self.connection.mav.command_long_encode(
@@ -102,7 +174,7 @@ class Drone:
             mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL,  # ID of command to send
             0,  
             command_id,  # param1: Message ID to be streamed
-            1000000, # param2: Interval in microseconds
+            interval_us, # param2: Interval in microseconds (-1 desativa o stream)
             0,       
             0,       
             0,       
@@ -116,18 +188,31 @@ class Drone:
     def request_info(self) -> None:
         self.__check_connection()
 
-        request_messages_id = [
-            mavutil.mavlink.MAVLINK_MSG_ID_LOCAL_POSITION_NED,
-            mavutil.mavlink.MAVLINK_MSG_ID_VFR_HUD,
-            mavutil.mavlink.MAVLINK_MSG_ID_BATTERY_STATUS,
-            mavutil.mavlink.MAVLINK_MSG_ID_NAV_CONTROLLER_OUTPUT,
-            mavutil.mavlink.MAVLINK_MSG_ID_EKF_STATUS_REPORT,
-            mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE
-        ]
-        
-        for message_id in request_messages_id:
-            self.__request_data(message_id)
+        self.stream_rates.reset()
+        self.update_stream_rates(force=True)
+
+    def update_stream_rates(self, force: bool = False) -> None:
+        """Envia SET_MESSAGE_INTERVAL para os streams cuja taxa mudou com a demanda"""
+        self.__check_connection()
+
+        for msg_type, rate in self.stream_rates.changes(force).items():
+            message_id = getattr(mavutil.mavlink, f"MAVLINK_MSG_ID_{msg_type}")
+            self.__request_data(message_id, 1e6 / rate if rate > 0 else -1)
 
+    def watch(self, client_id: str, level: int) -> dict:
+        """Registra (ou renova) a demanda de um cliente e ajusta as taxas imediatamente"""
+        self.stream_rates.watch(client_id, level)
+        self.update_stream_rates()
+        return self.stream_rates.status()
+
+
+    def __inject_frame(self, frame: bytes) -> None:
+        """Escreve no enlace um frame vindo de um GCS externo, sem decodificá-lo"""
+        self.__check_connection()
+        if self.outbound is not None:
+            self.outbound.write(frame)
+        else:
+            self.connection.write(frame)
 
     def connect(self, connection_string: str = '') -> None:
         try:
@@ -139,21 +224,47 @@ class Drone:
                 self.connection = None
                 raise exceptions.ACKTimeoutException("Timeout waiting for heartbeat")
             
+            self.outbound = attach_scheduler(self.connection)
             self.connected = True
         except:
             raise
 
+    def reconnect(self, connection_string: str) -> None:
+        """Reabre um enlace perdido, mantendo parâmetros, log e telemetria do drone"""
+        self.__check_connection()
+
+        # Fecha antes de abrir: numa porta UDP de escuta os dois sockets disputariam os pacotes
+        self.connected = False
+        self.__close_outbound()
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+        self.connection = mavutil.mavlink_connection(connection_string.replace('_','/'))
+        self.outbound = attach_scheduler(self.connection)
+        self.connected = True
+        # As taxas de telemetria só são reenviadas quando o enlace volta (LinkSupervisor): agora
+        # o veículo pode nem estar lá, e num socket UDP de escuta ainda não há para onde escrever
+
     def disconnect(self) -> None:
         if self.flight_logger:
             self.flight_logger.log_connection_event("DISCONNECTED")
             self.flight_logger.close()
 
+        self.forwarding.close()
         self.__check_connection()
     
+        self.__close_outbound()
         self.connection.close()
         self.connection = None
         self.connected = False
 
+    def __close_outbound(self) -> None:
+        # O escritor de um enlace compartilhado é do enlace, não do veículo
+        if self.outbound is not None and self.outbound.connection is self.connection:
+            self.outbound.close()
+        self.outbound = None
+
     def __wait_arm_ack(self, timeout: float = 0.5) -> None:
         start_time = time.time()
         while time.time() - start_time < timeout:
@@ -325,6 +436,53 @@ class Drone:
             )
 
 
+    def upload_mission(self, items: list[MissionItem]) -> dict:
+        self.__check_connection()
+
+        try:
+            result = self.mission.upload(self.connection, items)
+            if self.flight_logger:
+                self.flight_logger.log_command(
+                    "MISSION_UPLOAD", 
+                    {'count': len(items), 'retries': result['retries']}, 
+                    "SUCCESS", 
+                    True
+                )
+            return result
+        except (exceptions.CommandFailedException, exceptions.ACKTimeoutException) as e:
+            if self.flight_logger:
+                self.flight_logger.log_command(
+                    "MISSION_UPLOAD", 
+                    {'count': len(items)}, 
+                    "FAILED", 
+                    False, 
+                    error_type=e.__class__.__name__
+                )
+            raise e
+
+    def download_mission(self) -> list[MissionItem]:
+        self.__check_connection()
+
+        return self.mission.download(self.connection)
+
+    def clear_mission(self) -> None:
+        self.__check_connection()
+
+        try:
+            self.mission.clear(self.connection)
+            if self.flight_logger:
+                self.flight_logger.log_command("MISSION_CLEAR", {}, "SUCCESS", True)
+        except (exceptions.CommandFailedException, exceptions.ACKTimeoutException) as e:
+            if self.flight_logger:
+                self.flight_logger.log_command(
+                    "MISSION_CLEAR", 
+                    {}, 
+                    "FAILED", 
+                    False, 
+                    error_type=e.__class__.__name__
+                )
+            raise e
+
     def get_drone_info(self):
         drone_info = {
             'battery_level': self.battery_status.level,
@@ -334,11 +492,35 @@ class Drone:
             'mode': self.mode,
             'vfr': self.vfr.to_dict(),
             'attitude': self.attitude,
-            'is_ekf_ok': self.ekf_ok
+            'is_ekf_ok': self.ekf_ok,
+            'link': self.link_state
         }
 
         return drone_info
     
+    def __record_history(self, timestamp: float):
+        self.telemetry_history.append(timestamp, (
+            self.vfr.altitude,
+            self.battery_status.level,
+            self.attitude['roll'],
+            self.attitude['pitch'],
+            self.attitude['yaw'],
+            self.position.x,
+            self.position.y,
+            self.position.z,
+            self.vfr.groundspeed,
+            self.vfr.climb
+        ))
+
+    def get_history(self, window: float, points: int, fields: list = None) -> dict:
+        # Num replay o "agora" é o último instante reproduzido
+        now = self.history_clock if self.history_clock is not None else time.time()
+        return {
+            'start': now - window,
+            'end': now,
+            'fields': self.telemetry_history.downsample(now - window, now, points, fields)
+        }
+
     def __log_telemetry(self, msg):
         if self.flight_logger and msg.get_type() in ['LOCAL_POSITION_NED', 'VFR_HUD', 'BATTERY_STATUS', 'ATTITUDE']:
             # Registrar apenas alguns tipos de mensagens para não sobrecarregar os logs
@@ -0,0 +1,97 @@
+import threading
+import numpy as np
+from typing import Dict, List, Tuple
+from utils.downsampling import douglas_peucker
+
+# Pontos mais próximos que isso do último ponto gravado são ignorados (ruído parado no lugar)
+TRACK_MIN_DISTANCE = 0.05  # m
+
+# Tolerância do Douglas–Peucker por zoom: dobra a cada nível de zoom a menos
+TRACK_MAX_ZOOM = 10
+TRACK_BASE_TOLERANCE = 0.02  # m, no zoom máximo
+
+INITIAL_CAPACITY = 1024
+
+def tolerance_for_zoom(zoom: int) -> float:
+    zoom = max(0, min(TRACK_MAX_ZOOM, zoom))
+    return TRACK_BASE_TOLERANCE * 2 ** (TRACK_MAX_ZOOM - zoom)
+
+class FlightTrack:
+    """
+        Trajetória completa do voo (LOCAL_POSITION_NED) com versões simplificadas por zoom.
+        A simplificação é incremental: a cada consulta só o trecho depois do penúltimo
+        ponto mantido é recalculado, então o prefixo já entregue ao cliente não muda.
+    """
+
+    def __init__(self):
+        self._points = np.empty((INITIAL_CAPACITY, 3), dtype=np.float64)
+        self._size = 0
+        # tolerância -> (índices mantidos, quantidade de pontos já processados)
+        self._simplified: Dict[float, Tuple[List[int], int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, x: float, y: float, z: float) -> None:
+        size = self._size
+        if size > 0:
+            last = self._points[size - 1]
+            dx, dy, dz = x - last[0], y - last[1], z - last[2]
+            if dx * dx + dy * dy + dz * dz < TRACK_MIN_DISTANCE * TRACK_MIN_DISTANCE:
+                return
+
+        if size == len(self._points):
+            # Cresce em um novo array; leitores que já pegaram a referência antiga continuam válidos
+            grown = np.empty((len(self._points) * 2, 3), dtype=np.float64)
+            grown[:size] = self._points[:size]
+            self._points = grown
+
+        self._points[size] = (x, y, z)
+        self._size = size + 1
+
+    def simplified(self, tolerance: float) -> Tuple[np.ndarray, List[int]]:
+        """
+            Índices dos pontos mantidos na tolerância pedida, atualizados de forma incremental,
+            junto com o array de pontos em que esses índices são válidos
+        """
+        # O tamanho é lido antes do array: append só publica o tamanho novo depois de crescer,
+        # então o array lido em seguida sempre tem pelo menos `size` pontos
+        size = self._size
+        points = self._points
+
+        with self._lock:
+            kept, processed = self._simplified.get(tolerance, ([], 0))
+            if processed < size:
+                if len(kept) >= 2:
+                    anchor_position = len(kept) - 2
+                else:
+                    anchor_position = 0
+                anchor = kept[anchor_position] if kept else 0
+
+                tail = douglas_peucker(points[anchor:size], tolerance) + anchor
+                kept = kept[:anchor_position] + tail.tolist()
+                self._simplified[tolerance] = (kept, size)
+
+            # Outra consulta pode ter processado mais pontos (com um array mais novo que `points`);
+            # o array atual contém todos os pontos que qualquer resultado guardado referencia
+            return self._points, kept
+
+    def get_track(self, zoom: int, since: int = 0) -> dict:
+        """
+            Trajetória simplificada para o zoom pedido. Com `since` (quantidade de pontos
+            que o cliente já tem), retorna só a partir de `start`, que deve substituir
+            os pontos do cliente a partir dessa posição.
+        """
+        tolerance = tolerance_for_zoom(zoom)
+        points, kept = self.simplified(tolerance)
+
+        start = max(0, min(since, len(kept)) - 1)
+        return {
+            'zoom': zoom,
+            'tolerance': tolerance,
+            'total_points': self._size,
+            'count': len(kept),
+            'start': start,
+            'points': points[kept[start:]].tolist()
+        }
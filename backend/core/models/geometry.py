@@ -1,4 +1,4 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 
 @dataclass
 class Point:
@@ -7,4 +7,5 @@ class Point:
     z: float
     
     def to_dict(self):
-        return asdict(self)
+        # asdict() faz cópia profunda recursiva; aqui os campos são sempre escalares
+        return {'x': self.x, 'y': self.y, 'z': self.z}
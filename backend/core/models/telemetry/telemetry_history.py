@@ -0,0 +1,75 @@
+import numpy as np
+from typing import Dict, List, Optional
+from utils.downsampling import lttb
+
+HISTORY_FIELDS = (
+    'altitude', 'battery', 'roll', 'pitch', 'yaw',
+    'x', 'y', 'z', 'groundspeed', 'climb'
+)
+
+HISTORY_DURATION = 600      # segundos guardados
+# Linhas por segundo guardadas. Acima disso o histórico não segue a taxa de ingestão: fica
+# a última linha de cada intervalo, e o buffer (duration * max_rate) cobre sempre `duration`
+HISTORY_MAX_RATE = 20
+
+class TelemetryHistory:
+    """
+        Ring buffer de tamanho fixo (NumPy) com o histórico recente da telemetria.
+        Cada linha é uma cópia dos campos em HISTORY_FIELDS no instante em que uma
+        mensagem de telemetria foi aplicada. A memória é alocada uma única vez.
+        No máximo uma linha por intervalo de 1/max_rate s é guardada (com o último estado
+        do intervalo), para que o buffer cubra `duration` segundos qualquer que seja a
+        taxa dos streams.
+    """
+
+    def __init__(self, duration: float = HISTORY_DURATION, max_rate: float = HISTORY_MAX_RATE):
+        self.capacity = int(duration * max_rate)
+        self.max_rate = max_rate
+        self._slot = None   # intervalo (timestamp * max_rate arredondado) da última linha
+        self._timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self._values = np.zeros((self.capacity, len(HISTORY_FIELDS)), dtype=np.float32)
+        self._head = 0      # próxima posição a ser escrita
+        self._size = 0
+
+    def append(self, timestamp: float, values: tuple) -> None:
+        slot = int(timestamp * self.max_rate)
+        if slot == self._slot:
+            # Mesmo intervalo: a última linha passa a ter o estado mais recente dele
+            self._values[(self._head - 1) % self.capacity] = values
+            return
+        self._slot = slot
+        head = self._head
+        self._timestamps[head] = timestamp
+        self._values[head] = values
+        self._head = (head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _ordered(self):
+        """Visões (timestamps, valores) em ordem cronológica"""
+        if self._size < self.capacity:
+            return self._timestamps[:self._size], self._values[:self._size]
+
+        order = np.r_[self._head:self.capacity, 0:self._head]
+        return self._timestamps[order], self._values[order]
+
+    def window(self, start: float, end: Optional[float] = None):
+        timestamps, values = self._ordered()
+        first = np.searchsorted(timestamps, start, side='left')
+        last = len(timestamps) if end is None else np.searchsorted(timestamps, end, side='right')
+        return timestamps[first:last], values[first:last]
+
+    def downsample(self, start: float, end: Optional[float] = None, points: int = 500,
+                   fields: Optional[List[str]] = None) -> Dict[str, dict]:
+        """Série de cada campo no intervalo, reduzida a `points` pontos com LTTB"""
+        timestamps, values = self.window(start, end)
+
+        series = {}
+        for field in fields or HISTORY_FIELDS:
+            column = values[:, HISTORY_FIELDS.index(field)]
+            indexes = lttb(timestamps, column, points)
+            series[field] = {'t': timestamps[indexes], 'v': column[indexes]}
+        return series
@@ -1,9 +1,18 @@
+from utils.versioning import next_version
+
 class DroneParameters:
     def __init__(self):
         self.parameters : dict = dict()
+        self.version : int = next_version()
 
     def update(self, msg):
-        self.parameters[msg.param_id] = msg.param_value
+        if msg.param_id not in self.parameters or self.parameters[msg.param_id] != msg.param_value:
+            self.parameters[msg.param_id] = msg.param_value
+            self.version = next_version()
+
+    def set_parameters(self, parameters: dict):
+        self.parameters = parameters
+        self.version = next_version()
 
     def param_count(self):
         return len(self.parameters)
@@ -16,4 +25,4 @@ class DroneParameters:
 
     def get_parameters(self):
         return self.parameters
-    
\ No newline at end of file
+    
@@ -0,0 +1,269 @@
+import os
+import re
+import json
+import bisect
+import logging
+import threading
+from typing import Dict, List, Optional, Iterable, Tuple
+
+DEFAULT_DEFINITIONS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "..", "..", "pilot-frontend", "src", "assets", "parameter_definitions.json"
+)
+
+# Pesos usados para ordenar os resultados da busca
+EXACT_SCORE = 100
+PREFIX_SCORE = 80
+TITLE_TOKEN_SCORE = 60
+TOKEN_SCORE = 45
+TOKEN_PREFIX_SCORE = 30
+FUZZY_SCORE = 20
+
+FUZZY_MIN_SIMILARITY = 0.3
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ParameterDefinition:
+    __slots__ = ('name', 'display_name', 'description', 'unit', 'range', 'values',
+                 'bitmask', 'increment', 'reboot_required', 'read_only', 'user')
+
+    def __init__(self, name: str, definition: dict):
+        self.name = name
+        self.display_name = definition.get('DisplayName') or name
+        self.description = definition.get('Description') or "No description available"
+        self.unit = definition.get('Units')
+        self.values = definition.get('Values')
+        self.bitmask = definition.get('Bitmask')
+        self.user = definition.get('User')
+        self.reboot_required = definition.get('RebootRequired') == 'True'
+        self.read_only = definition.get('ReadOnly') == 'True'
+
+        self.range = None
+        if 'Range' in definition:
+            self.range = [float(definition['Range']['low']), float(definition['Range']['high'])]
+
+        self.increment = float(definition['Increment']) if 'Increment' in definition else None
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'display_name': self.display_name,
+            'description': self.description,
+            'unit': self.unit,
+            'range': self.range,
+            'values': self.values,
+            'bitmask': self.bitmask,
+            'increment': self.increment,
+            'reboot_required': self.reboot_required,
+            'read_only': self.read_only,
+            'user': self.user
+        }
+
+
+class _TrieNode:
+    __slots__ = ('children', 'names')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.names: List[str] = []
+
+
+class ParameterDefinitionIndex:
+    """
+        Índice de busca pré-calculado sobre as definições de parâmetros do ArduPilot:
+        trie de prefixos dos nomes, índice de tokens (nome, nome de exibição e descrição)
+        e trigramas para busca aproximada. Tokens do nome e do nome de exibição
+        ("título") pesam mais do que tokens que aparecem só na descrição.
+    """
+
+    def __init__(self, raw_definitions: dict):
+        self.definitions: Dict[str, ParameterDefinition] = {}
+
+        # Primeiro nível - categorias; segundo nível - parâmetros
+        for category_params in raw_definitions.values():
+            if not isinstance(category_params, dict):
+                continue
+            for name, definition in category_params.items():
+                if isinstance(definition, dict):
+                    self.definitions[name] = ParameterDefinition(name, definition)
+
+        self._trie = _TrieNode()
+        self._tokens: Dict[str, set] = {}
+        self._title_tokens: Dict[str, set] = {}
+        self._title_token_count: Dict[str, int] = {}
+        self._trigrams: Dict[str, set] = {}
+        self._name_trigram_count: Dict[str, int] = {}
+
+        for name, definition in self.definitions.items():
+            self.__index(name, definition)
+
+        self._sorted_tokens = sorted(self._tokens)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'ParameterDefinitionIndex':
+        with open(path, 'r') as file:
+            return cls(json.load(file))
+
+    def __index(self, name: str, definition: ParameterDefinition) -> None:
+        node = self._trie
+        for char in name.upper():
+            node = node.children.setdefault(char, _TrieNode())
+        node.names.append(name)
+
+        title_tokens = set(_tokenize(name.replace('_', ' ')) + _tokenize(definition.display_name))
+        self._title_token_count[name] = len(title_tokens)
+        for token in title_tokens:
+            self._title_tokens.setdefault(token, set()).add(name)
+        for token in title_tokens.union(_tokenize(definition.description)):
+            self._tokens.setdefault(token, set()).add(name)
+
+        trigrams = _trigrams(name)
+        self._name_trigram_count[name] = len(trigrams)
+        for trigram in trigrams:
+            self._trigrams.setdefault(trigram, set()).add(name)
+
+    def get(self, name: str) -> Optional[ParameterDefinition]:
+        return self.definitions.get(name)
+
+    def prefix(self, prefix: str) -> List[str]:
+        """Nomes que começam com o prefixo, em ordem alfabética"""
+        node = self._trie
+        for char in prefix.upper():
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        names, stack = [], [node]
+        while stack:
+            current = stack.pop()
+            names.extend(current.names)
+            stack.extend(current.children.values())
+        names.sort()
+        return names
+
+    def __token_matches(self, token: str) -> Tuple[set, set]:
+        """Retorna (nomes com o token exato, nomes com tokens que começam pelo token)"""
+        exact = self._tokens.get(token, set())
+        prefixed = set()
+        i = bisect.bisect_left(self._sorted_tokens, token)
+        while i < len(self._sorted_tokens) and self._sorted_tokens[i].startswith(token):
+            if self._sorted_tokens[i] != token:
+                prefixed |= self._tokens[self._sorted_tokens[i]]
+            i += 1
+        return exact, prefixed
+
+    def fuzzy(self, query: str) -> Dict[str, float]:
+        """Similaridade (Jaccard de trigramas) entre a consulta e os nomes"""
+        query_trigrams = _trigrams(query)
+        overlaps: Dict[str, int] = {}
+        for trigram in query_trigrams:
+            for name in self._trigrams.get(trigram, ()):
+                overlaps[name] = overlaps.get(name, 0) + 1
+
+        similarities = {}
+        for name, overlap in overlaps.items():
+            similarity = overlap / (len(query_trigrams) + self._name_trigram_count[name] - overlap)
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                similarities[name] = similarity
+        return similarities
+
+    def search(self, query: str, mode: str = "auto") -> Dict[str, float]:
+        """
+            Busca parâmetros e retorna {nome: pontuação}.
+            mode: "prefix" (apenas prefixo do nome), "fuzzy" (apenas trigramas) ou "auto" (tudo)
+        """
+        query = query.strip()
+        scores: Dict[str, float] = {}
+
+        def add(names: Iterable[str], score: float):
+            for name in names:
+                if scores.get(name, 0) < score:
+                    scores[name] = score
+
+        if mode in ("prefix", "auto"):
+            add(self.prefix(query), PREFIX_SCORE)
+            if query.upper() in self.definitions:
+                add([query.upper()], EXACT_SCORE)
+
+        if mode == "auto":
+            tokens = _tokenize(query)
+            if tokens:
+                # Todos os tokens da consulta precisam aparecer (interseção dos conjuntos)
+                title_names, exact_names, any_names = None, None, None
+                for token in tokens:
+                    exact, prefixed = self.__token_matches(token)
+                    title = self._title_tokens.get(token, set())
+                    title_names = title if title_names is None else title_names & title
+                    exact_names = exact if exact_names is None else exact_names & exact
+                    any_names = (exact | prefixed) if any_names is None else any_names & (exact | prefixed)
+                add(any_names, TOKEN_PREFIX_SCORE)
+                add(exact_names, TOKEN_SCORE)
+                # Desempate: títulos mais curtos (mais focados na consulta) primeiro
+                for name in title_names:
+                    add([name], TITLE_TOKEN_SCORE + 10 * len(tokens) / self._title_token_count[name])
+
+        if mode in ("fuzzy", "auto") and query:
+            for name, similarity in self.fuzzy(query).items():
+                add([name], FUZZY_SCORE * similarity)
+
+        return scores
+
+    def rank(self, parameters: Iterable[str], query: str, mode: str = "auto") -> List[str]:
+        """
+            Ordena os parâmetros (por exemplo, os lidos do drone) pela relevância para a consulta.
+            Parâmetros sem definição conhecida são comparados apenas pelo nome.
+        """
+        if not query.strip():
+            return sorted(parameters)
+
+        scores = self.search(query, mode)
+        upper_query = query.strip().upper()
+
+        ranked = []
+        for name in parameters:
+            score = scores.get(name)
+            if score is None and name not in self.definitions and upper_query in name.upper():
+                score = PREFIX_SCORE if name.upper().startswith(upper_query) else FUZZY_SCORE
+            if score is not None:
+                ranked.append((-score, len(name), name))
+        ranked.sort()
+        return [name for _, _, name in ranked]
+
+    def describe(self, name: str, value=None) -> dict:
+        """Junta o valor atual do parâmetro com a sua definição"""
+        definition = self.definitions.get(name)
+        if definition is not None:
+            entry = definition.to_dict()
+        else:
+            entry = ParameterDefinition(name, {}).to_dict()
+        entry['value'] = value
+        return entry
+
+
+_index: Optional[ParameterDefinitionIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_parameter_definition_index() -> ParameterDefinitionIndex:
+    """Carrega o índice uma única vez; o caminho pode ser trocado por PARAMETER_DEFINITIONS_PATH"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            path = os.environ.get("PARAMETER_DEFINITIONS_PATH", DEFAULT_DEFINITIONS_PATH)
+            try:
+                _index = ParameterDefinitionIndex.from_file(path)
+                logging.info(f"Loaded {len(_index.definitions)} parameter definitions from {path}")
+            except (OSError, ValueError) as e:
+                logging.error(f"Could not load parameter definitions from {path}: {e}")
+                _index = ParameterDefinitionIndex({})
+        return _index
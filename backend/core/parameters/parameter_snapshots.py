@@ -0,0 +1,217 @@
+import os
+import json
+import uuid
+import zlib
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Número fixo de buckets: um parâmetro sempre cai no mesmo bucket, então
+# snapshots consecutivos compartilham todos os buckets que não mudaram
+BUCKET_COUNT = 64
+
+_bucket_index_cache: Dict[str, int] = {}
+
+
+def _bucket_index(param_id: str) -> int:
+    index = _bucket_index_cache.get(param_id)
+    if index is None:
+        index = zlib.crc32(param_id.encode()) % BUCKET_COUNT
+        _bucket_index_cache[param_id] = index
+    return index
+
+
+def _split_in_buckets(parameters: dict) -> List[dict]:
+    buckets = [dict() for _ in range(BUCKET_COUNT)]
+    for param_id, value in parameters.items():
+        buckets[_bucket_index(param_id)][param_id] = value
+    return buckets
+
+
+class ParameterSnapshot:
+    """
+        Cópia imutável dos parâmetros de um drone em um instante.
+        Os parâmetros são divididos em buckets por hash do nome e os buckets
+        iguais aos do snapshot anterior são reaproveitados (compartilhamento
+        estrutural), então só os valores alterados ocupam memória nova.
+    """
+    __slots__ = ('snapshot_id', 'connection_string', 'session_id', 'timestamp', 'label', 'base_id', 'buckets')
+
+    def __init__(self, buckets: Tuple[dict, ...], connection_string: str, snapshot_id: str = None,
+                 session_id: str = None, timestamp: str = None, label: str = None, base_id: str = None):
+        self.snapshot_id = snapshot_id or str(uuid.uuid4())
+        self.connection_string = connection_string
+        self.session_id = session_id
+        self.timestamp = timestamp or datetime.now().isoformat()
+        self.label = label
+        self.base_id = base_id
+        self.buckets = buckets
+
+    @classmethod
+    def from_parameters(cls, parameters: dict, connection_string: str,
+                        previous: Optional['ParameterSnapshot'] = None, **metadata) -> 'ParameterSnapshot':
+        """Cria um snapshot reaproveitando os buckets inalterados do snapshot anterior"""
+        buckets = _split_in_buckets(parameters)
+        if previous is not None:
+            for i, bucket in enumerate(buckets):
+                if bucket == previous.buckets[i]:
+                    buckets[i] = previous.buckets[i]
+
+        return cls(tuple(buckets), connection_string,
+                   base_id=previous.snapshot_id if previous else None, **metadata)
+
+    def param_count(self) -> int:
+        return sum(len(bucket) for bucket in self.buckets)
+
+    def to_parameters(self) -> dict:
+        parameters = {}
+        for bucket in self.buckets:
+            parameters.update(bucket)
+        return parameters
+
+    def changes_from(self, previous: Optional['ParameterSnapshot']) -> Tuple[dict, list]:
+        """Retorna (valores alterados/novos, parâmetros removidos) em relação a outro snapshot"""
+        if previous is None:
+            return self.to_parameters(), []
+
+        changed, removed = {}, []
+        for bucket, old_bucket in zip(self.buckets, previous.buckets):
+            if bucket is old_bucket:
+                continue
+            for param_id, value in bucket.items():
+                if param_id not in old_bucket or old_bucket[param_id] != value:
+                    changed[param_id] = value
+            removed.extend(param_id for param_id in old_bucket if param_id not in bucket)
+        return changed, removed
+
+    def metadata(self) -> dict:
+        return {
+            'snapshot_id': self.snapshot_id,
+            'connection_string': self.connection_string,
+            'session_id': self.session_id,
+            'timestamp': self.timestamp,
+            'label': self.label,
+            'base_id': self.base_id,
+            'param_count': self.param_count()
+        }
+
+
+def diff_snapshots(a: ParameterSnapshot, b: ParameterSnapshot) -> dict:
+    """
+        Compara dois snapshots em uma única passada pelos buckets.
+        Buckets compartilhados (mesmo objeto) são pulados sem comparar valores.
+    """
+    changed, only_a, only_b = {}, {}, {}
+
+    for bucket_a, bucket_b in zip(a.buckets, b.buckets):
+        if bucket_a is bucket_b:
+            continue
+        for param_id, value_a in bucket_a.items():
+            if param_id in bucket_b:
+                value_b = bucket_b[param_id]
+                if value_a != value_b:
+                    changed[param_id] = {'a': value_a, 'b': value_b}
+            else:
+                only_a[param_id] = value_a
+        for param_id, value_b in bucket_b.items():
+            if param_id not in bucket_a:
+                only_b[param_id] = value_b
+
+    return {
+        'changed': changed,
+        'only_in_a': only_a,
+        'only_in_b': only_b,
+        'difference_count': len(changed) + len(only_a) + len(only_b)
+    }
+
+
+class ParameterSnapshotStore:
+    """
+        Guarda o histórico de snapshots de parâmetros de cada drone.
+        Cada connection_string tem um arquivo JSONL onde cada linha guarda apenas
+        as diferenças em relação ao snapshot anterior.
+    """
+
+    def __init__(self, snapshot_dir: str = None):
+        self.snapshot_dir = snapshot_dir or os.path.join(os.getcwd(), "parameter_snapshots")
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+
+        self._snapshots: Dict[str, List[ParameterSnapshot]] = {}
+        self._lock = threading.Lock()
+
+    def _snapshot_path(self, connection_string: str) -> str:
+        safe_conn_str = connection_string.replace(':', '_').replace('/', '_')
+        return os.path.join(self.snapshot_dir, f"{safe_conn_str}.jsonl")
+
+    def _load(self, connection_string: str) -> List[ParameterSnapshot]:
+        """Carrega (uma única vez) o histórico do disco, reconstruindo o compartilhamento de buckets"""
+        if connection_string in self._snapshots:
+            return self._snapshots[connection_string]
+
+        snapshots = []
+        path = self._snapshot_path(connection_string)
+        if os.path.exists(path):
+            parameters = {}
+            with open(path, 'r') as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    for param_id in entry['removed']:
+                        parameters.pop(param_id, None)
+                    parameters.update(entry['changed'])
+
+                    snapshots.append(ParameterSnapshot.from_parameters(
+                        parameters, connection_string,
+                        previous=snapshots[-1] if snapshots else None,
+                        snapshot_id=entry['snapshot_id'],
+                        session_id=entry['session_id'],
+                        timestamp=entry['timestamp'],
+                        label=entry['label']
+                    ))
+
+        self._snapshots[connection_string] = snapshots
+        return snapshots
+
+    def take(self, connection_string: str, parameters: dict, session_id: str = None,
+             label: str = None) -> ParameterSnapshot:
+        """Registra um novo snapshot e persiste somente o que mudou"""
+        with self._lock:
+            snapshots = self._load(connection_string)
+            previous = snapshots[-1] if snapshots else None
+
+            snapshot = ParameterSnapshot.from_parameters(
+                dict(parameters), connection_string, previous=previous,
+                session_id=session_id, label=label
+            )
+            changed, removed = snapshot.changes_from(previous)
+
+            with open(self._snapshot_path(connection_string), 'a') as file:
+                file.write(json.dumps({
+                    'snapshot_id': snapshot.snapshot_id,
+                    'session_id': snapshot.session_id,
+                    'timestamp': snapshot.timestamp,
+                    'label': snapshot.label,
+                    'base_id': snapshot.base_id,
+                    'changed': changed,
+                    'removed': removed
+                }) + "\n")
+
+            snapshots.append(snapshot)
+            return snapshot
+
+    def latest(self, connection_string: str) -> Optional[ParameterSnapshot]:
+        with self._lock:
+            snapshots = self._load(connection_string)
+            return snapshots[-1] if snapshots else None
+
+    def get(self, connection_string: str, snapshot_id: str) -> Optional[ParameterSnapshot]:
+        with self._lock:
+            for snapshot in self._load(connection_string):
+                if snapshot.snapshot_id == snapshot_id:
+                    return snapshot
+            return None
+
+    def list(self, connection_string: str) -> List[dict]:
+        with self._lock:
+            return [snapshot.metadata() for snapshot in reversed(self._load(connection_string))]
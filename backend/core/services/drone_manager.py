@@ -1,12 +1,31 @@
+import os
 import logging
 import threading
 import time
 from typing import Dict
 from core.logging.flight_logger import FlightLogger
-from core.models.drone import Drone
+from core.logging.log_writer import FileLogWriter
+from core.services.metrics import Histogram, MetricsWriter, metrics_registry
+from core.services.profiler import READER_THREAD_NAME
+from core.services.events import EventBroadcaster
+from core.services.proximity import ProximityMonitor
+from core.services.geofence import GeofenceMonitor
+from core.services.fleet_health import FleetHealth
+from core.services.ingest import IngestPool
+from core.services.link_supervisor import LINK_STATES, LinkSupervisor
+from core.services.telemetry_export import create_telemetry_export
+from core.services.replay import ReplaySession, is_replay, parse_replay_connection_string
+from core.mavlink.outbound import CLASS_NAMES
+from core.mavlink.shared_link import (SharedLink, VehicleConnection, is_shared_link,
+                                      split_vehicle_connection_string, vehicle_connection_string)
+from core.models.drone import Drone, TELEMETRY_MESSAGES
+from core.models.geometry import Point
+from core.parameters.parameter_snapshots import ParameterSnapshotStore
 import core.parameters.parameter_retrieval as parameter_retrieval
+import utils.exceptions as exceptions
 
 READ_FREQUENCY = 4000  # Hz
+STREAM_UPDATE_INTERVAL = 1.0  # segundos entre revisões das taxas de telemetria
 
 class DroneManager:
     _instance = None
@@ -17,34 +36,236 @@ class DroneManager:
             if cls._instance is None:
                 cls._instance = super(DroneManager, cls).__new__(cls)
                 cls._instance.drones = {}
+                cls._instance.snapshot_store = ParameterSnapshotStore()
+                cls._instance.replays = {}
+                cls._instance.links = {}
+                # Eventos da frota (alertas de separação, etc.) para o stream da UI
+                cls._instance.fleet_events = EventBroadcaster()
+                cls._instance.proximity = ProximityMonitor(cls._instance.fleet_events)
+                cls._instance.geofences = GeofenceMonitor(cls._instance.fleet_events)
+                cls._instance.health = FleetHealth()
+                cls._instance.link_supervisor = LinkSupervisor(cls._instance.fleet_events)
+                cls._instance.replay_dir = os.path.join(os.getcwd(), "flight_logs")
+                cls._instance._loop_seconds = Histogram()
+                cls._instance.ingest = IngestPool(cls._instance._handle_message)
+                # Exportação opcional da telemetria em memória compartilhada (TELEMETRY_EXPORT_PATH)
+                cls._instance.telemetry_export = create_telemetry_export()
+                metrics_registry.register(cls._instance._collect_metrics)
                 cls._instance._initiate_mavlink_thread()
             return cls._instance
     
     def _initiate_mavlink_thread(self):
         """Inicia a thread que lê as mensagens MAVLink de todos os drones"""
         self._stop_thread = False
-        self._mavlink_thread = threading.Thread(target=self._read_mavlink)
+        self._mavlink_thread = threading.Thread(target=self._read_mavlink, name=READER_THREAD_NAME)
         self._mavlink_thread.daemon = True
         self._mavlink_thread.start()
     
     def _read_mavlink(self):
         """Thread que lê continuamente as mensagens MAVLink de todos os drones"""
+        next_stream_update = time.monotonic() + STREAM_UPDATE_INTERVAL
         while not self._stop_thread:
             time.sleep(1 / READ_FREQUENCY)
             
+            pass_start = time.perf_counter()
             with self._lock:
                 drone_list = list(self.drones.values())
             
             for drone in drone_list:
+                # Veículos de enlace compartilhado nunca são lidos aqui: até o attach() as mensagens
+                # esperam na fila do veículo (ou vão para o download de parâmetros), depois disso a
+                # thread do enlace as entrega direto. Ler aqui disputaria a fila com o attach.
+                if isinstance(drone.connection, VehicleConnection):
+                    continue
                 if drone.connected and drone.drone_parameters.param_count() != 0:
                     try:
+                        read_start = time.perf_counter()
                         msg = drone.connection.recv_match()
                         if msg is not None:
-                            drone.update_info(msg)
+                            self._receive(drone, msg, read_start)
                     except (AttributeError, IOError) as e:
+                        drone.ingest_stats.count_error(e.__class__.__name__)
                         logging.warning(f"Error reading MAVLink message for drone {drone}: {e}")
                     except Exception as e:
+                        drone.ingest_stats.count_error(e.__class__.__name__)
                         logging.error(f"Unexpected error in MAVLink message reading for drone {drone}: {e}")    
+            
+            # Todas as posições recebidas nesta passada são avaliadas contra as cercas de uma vez
+            try:
+                self.geofences.evaluate()
+            except Exception as e:
+                logging.error(f"Error evaluating geofences: {e}")
+            
+            self._loop_seconds.observe(time.perf_counter() - pass_start)
+            
+            if time.monotonic() >= next_stream_update:
+                next_stream_update = time.monotonic() + STREAM_UPDATE_INTERVAL
+                self._update_stream_rates(drone_list)
+    
+    def _update_stream_rates(self, drone_list: list):
+        """Reduz as taxas dos drones cuja demanda expirou (ninguém mais assistindo)"""
+        for drone in drone_list:
+            if drone.connected and drone.connection is not None:
+                try:
+                    drone.update_stream_rates()
+                except Exception as e:
+                    logging.warning(f"Error updating stream rates for drone {drone}: {e}")
+    
+    def _receive(self, drone: Drone, msg, read_start: float = None):
+        """
+            Mensagem recém-lida do enlace: conta para a qualidade do enlace e vai para a fila do drone.
+            O frame é encaminhado aqui, antes da fila, para que os GCS externos não sofram com
+            descartes ou atrasos da ingestão.
+        """
+        self.link_supervisor.observe(drone, msg)
+        if msg.get_type() != 'BAD_DATA':
+            drone.forwarding.forward(msg)
+        self.ingest.submit(drone, msg, read_start)
+    
+    def _handle_message(self, drone: Drone, msg, read_start: float = None, received: float = None,
+                        timestamp: float = None):
+        """
+            Aplica uma mensagem recebida ao drone, registrando as métricas de ingestão e latência.
+            Roda nos workers de ingestão (mensagens lidas ao vivo) ou na thread do replay, que
+            passa em `timestamp` o horário gravado da mensagem.
+        """
+        stats = drone.ingest_stats
+        msg_type = msg.get_type()
+        stats.count_message(msg_type)
+        
+        if msg_type == 'BAD_DATA':
+            stats.count_error('BAD_DATA')
+            return
+        
+        start = time.perf_counter()
+        drone.update_info(msg, timestamp)
+        applied = time.perf_counter()
+        stats.update_seconds.observe(applied - start)
+        
+        self.health.observe(drone, msg_type, msg)
+        if msg_type == 'LOCAL_POSITION_NED':
+            # Índice espacial e cercas são da frota inteira: usam a posição no mundo, não a local
+            x, y, z = drone.to_world(msg.x, msg.y, msg.z)
+            self.proximity.update(drone, x, y, z)
+            self.geofences.update(drone, x, y, z)
+        
+        tracer = drone.latency
+        if msg_type in TELEMETRY_MESSAGES:
+            tracer.last_applied = applied
+        if read_start is not None and tracer.should_sample():
+            tracer.record(msg, read_start, received, start, applied)
+    
+    def _collect_metrics(self, writer: MetricsWriter):
+        """Exporta as métricas de ingestão de todos os drones"""
+        with self._lock:
+            drones = list(self.drones.items())
+        
+        writer.gauge("pilotstation_drones_connected", "Drones registered in the manager", [({}, len(drones))])
+        writer.histogram("pilotstation_reader_loop_seconds", "Duration of one MAVLink reader loop pass",
+                         [({}, self._loop_seconds)])
+        
+        writer.counter("pilotstation_mavlink_messages_total", "MAVLink messages received by type",
+                       [({"drone": cs, "type": msg_type}, count)
+                        for cs, drone in drones for msg_type, count in list(drone.ingest_stats.message_counts.items())])
+        writer.counter("pilotstation_mavlink_errors_total", "Errors while reading or parsing MAVLink messages",
+                       [({"drone": cs, "kind": kind}, count)
+                        for cs, drone in drones for kind, count in list(drone.ingest_stats.errors.items())])
+        queues = [(cs, drone.message_queue) for cs, drone in drones]
+        writer.gauge("pilotstation_ingest_queue_depth", "Messages waiting in a drone's ingest queue",
+                     [({"drone": cs}, len(messages)) for cs, messages in queues])
+        writer.gauge("pilotstation_ingest_queue_high_water", "Largest depth a drone's ingest queue has reached",
+                     [({"drone": cs}, messages.high_water) for cs, messages in queues])
+        writer.counter("pilotstation_ingest_dropped_total", "Messages dropped because a drone's ingest queue was full",
+                       [({"drone": cs, "type": msg_type}, count)
+                        for cs, messages in queues for msg_type, count in list(messages.dropped.items())])
+        writer.gauge("pilotstation_ingest_pending_drones", "Drones with queued messages waiting for a free ingest worker",
+                     [({}, self.ingest.pending())])
+        writer.histogram("pilotstation_update_info_seconds", "Time spent applying a message in Drone.update_info",
+                         [({"drone": cs}, drone.ingest_stats.update_seconds) for cs, drone in drones])
+        writer.histogram("pilotstation_telemetry_latency_seconds", 
+                         "Sampled telemetry latency by pipeline stage and message type (or serving channel)",
+                         [({"drone": cs, "stage": stage, "type": msg_type}, histogram)
+                          for cs, drone in drones 
+                          for (stage, msg_type), histogram in list(drone.latency.histograms.items())])
+        
+        mav_stats = [(cs, drone.connection.mav) for cs, drone in drones
+                     if drone.connection is not None and hasattr(drone.connection, 'mav')]
+        writer.counter("pilotstation_mavlink_packets_received_total", "Packets decoded by the MAVLink parser",
+                       [({"drone": cs}, mav.total_packets_received) for cs, mav in mav_stats])
+        writer.counter("pilotstation_mavlink_receive_errors_total", "Bad packets (CRC/length) seen by the MAVLink parser",
+                       [({"drone": cs}, mav.total_receive_errors) for cs, mav in mav_stats])
+        
+        schedulers = [(cs, drone.outbound) for cs, drone in drones if drone.outbound is not None]
+        writer.counter("pilotstation_outbound_messages_total", "MAVLink messages written to the link by priority class",
+                       [({"drone": cs, "class": name}, scheduler.sent[i])
+                        for cs, scheduler in schedulers for i, name in enumerate(CLASS_NAMES)])
+        writer.counter("pilotstation_outbound_bytes_total", "Bytes written to the link by priority class",
+                       [({"drone": cs, "class": name}, scheduler.sent_bytes[i])
+                        for cs, scheduler in schedulers for i, name in enumerate(CLASS_NAMES)])
+        writer.gauge("pilotstation_outbound_queue_depth", "Messages waiting for the link writer by priority class",
+                     [({"drone": cs, "class": name}, depth)
+                      for cs, scheduler in schedulers for name, depth in zip(CLASS_NAMES, scheduler.depth())])
+        writer.counter("pilotstation_outbound_coalesced_total", "Stream rate requests replaced by a newer one still in the queue",
+                       [({"drone": cs}, scheduler.coalesced) for cs, scheduler in schedulers])
+        writer.histogram("pilotstation_outbound_queue_delay_seconds", "Time a message waited before being written, by priority class",
+                         [({"drone": cs, "class": name}, scheduler.queue_delay[i])
+                          for cs, scheduler in schedulers for i, name in enumerate(CLASS_NAMES)])
+        
+        outputs = [(cs, output) for cs, drone in drones for output in list(drone.forwarding.outputs.values())]
+        writer.counter("pilotstation_forward_frames_total", "Raw MAVLink frames forwarded to external outputs",
+                       [({"drone": cs, "output": output.address}, output.forwarded) for cs, output in outputs])
+        writer.counter("pilotstation_forward_dropped_total", "Frames dropped because an output queue was full",
+                       [({"drone": cs, "output": output.address}, output.dropped) for cs, output in outputs])
+        writer.counter("pilotstation_forward_injected_total", "Frames from external outputs injected into the link",
+                       [({"drone": cs, "output": output.address}, output.injected) for cs, output in outputs])
+        
+        writer.histogram("pilotstation_proximity_update_seconds", "Time spent updating the spatial index and separation checks",
+                         [({}, self.proximity.update_seconds)])
+        writer.gauge("pilotstation_separation_alerts", "Pairs of drones currently closer than the separation distance",
+                     [({}, len(self.proximity.alerts()))])
+        writer.counter("pilotstation_separation_alerts_total", "Separation alerts raised",
+                       [({}, self.proximity.alerts_raised)])
+        
+        writer.histogram("pilotstation_geofence_evaluate_seconds", "Time spent evaluating one batch of positions against all geofences",
+                         [({}, self.geofences.evaluate_seconds)])
+        writer.gauge("pilotstation_geofence_breaches", "Drones currently breaching a geofence (per fence)",
+                     [({}, len(self.geofences.breaches()))])
+        writer.counter("pilotstation_geofence_breaches_total", "Geofence breaches raised",
+                       [({}, self.geofences.breaches_raised)])
+        
+        links = self.link_supervisor.links()
+        writer.gauge("pilotstation_link_state", "Link state per drone (0 = ok, 1 = degraded, 2 = lost)",
+                     [({"drone": link["connection_string"]}, LINK_STATES.index(link["state"])) for link in links])
+        writer.counter("pilotstation_link_packets_lost_total", "Packets lost on each link, from MAVLink sequence numbers",
+                       [({"drone": link["connection_string"]}, link["packets_lost"]) for link in links])
+        writer.gauge("pilotstation_link_rtt_seconds", "Smoothed TIMESYNC round-trip time per link",
+                     [({"drone": link["connection_string"]}, link["rtt_ms"] / 1000) for link in links
+                      if link["rtt_ms"] is not None])
+        writer.counter("pilotstation_link_reconnects_total", "Times a lost link was reopened",
+                       [({"drone": link["connection_string"]}, link["reconnects"]) for link in links])
+        
+        writer.histogram("pilotstation_health_evaluate_seconds", "Time spent evaluating the health rules for the whole fleet",
+                         [({}, self.health.evaluate_seconds)])
+        
+        export = self.telemetry_export
+        if export is not None:
+            writer.gauge("pilotstation_telemetry_export_slots_used", "Drones published in the shared-memory telemetry export",
+                         [({}, export.stats()['used_slots'])])
+            writer.counter("pilotstation_telemetry_export_writes_total", "Drone states written to the shared-memory export",
+                           [({}, export.published)])
+            writer.histogram("pilotstation_telemetry_export_publish_seconds", "Duration of one shared-memory export pass",
+                             [({}, export.publish_seconds)])
+        
+        writers = [(cs, drone.flight_logger.writer) for cs, drone in drones
+                   if drone.flight_logger is not None and isinstance(drone.flight_logger.writer, FileLogWriter)]
+        writer.counter("pilotstation_log_writes_total", "Flight log entries written",
+                       [({"drone": cs}, log_writer.writes) for cs, log_writer in writers])
+        writer.counter("pilotstation_log_bytes_total", "Flight log bytes written (before compression)",
+                       [({"drone": cs}, log_writer.bytes_written) for cs, log_writer in writers])
+        writer.counter("pilotstation_log_errors_total", "Flight log write errors",
+                       [({"drone": cs}, log_writer.errors) for cs, log_writer in writers])
+        writer.histogram("pilotstation_log_write_seconds", "Time spent writing one flight log entry",
+                         [({"drone": cs}, log_writer.write_seconds) for cs, log_writer in writers])
     
     def get_drone(self, connection_string: str) -> Drone:
         """Obtém um drone pelo connection_string, ou None se não existir"""
@@ -56,13 +277,26 @@ class DroneManager:
         with self._lock:
             if connection_string not in self.drones:
                 self.drones[connection_string] = Drone()
+                self.proximity.register(self.drones[connection_string], connection_string)
+                self.geofences.register(self.drones[connection_string], connection_string)
+                self.health.register(self.drones[connection_string], connection_string)
+                if self.telemetry_export is not None:
+                    self.telemetry_export.register(self.drones[connection_string], connection_string)
             return self.drones[connection_string]
     
     def remove_drone(self, connection_string: str) -> bool:
         """Remove um drone da coleção"""
         with self._lock:
             if connection_string in self.drones:
-                self.drones.pop(connection_string)
+                drone = self.drones.pop(connection_string)
+                self.proximity.unregister(drone)
+                self.geofences.unregister(drone)
+                self.health.unregister(drone)
+                self.link_supervisor.unregister(drone)
+                drone.stream_rates.release()
+                if self.telemetry_export is not None:
+                    self.telemetry_export.unregister(drone)
+                self.replays.pop(connection_string, None)
                 return True
             return False
     
@@ -74,9 +308,28 @@ class DroneManager:
                 drones_info[connection_string] = drone.get_drone_info()
         return drones_info
     
-    def connect_drone(self, connection_string: str):
-        """Conecta a um drone e carrega seus parâmetros"""
+    def get_telemetry_versions(self) -> tuple:
+        """Versões de telemetria de todos os drones; muda quando qualquer um deles muda"""
+        with self._lock:
+            return tuple((connection_string, drone.telemetry_version) 
+                         for connection_string, drone in self.drones.items())
+    
+    def connect_drone(self, connection_string: str, origin: Point = None):
+        """
+            Conecta a um drone e carrega seus parâmetros. `origin` é a posição inicial do
+            drone no mundo; nos enlaces compartilhados vale para todos os veículos do enlace.
+        """
+        origin = origin or Point(0, 0, 0)
+        if is_replay(connection_string):
+            return self.start_replay(connection_string, origin)
+        if is_shared_link(connection_string):
+            return self.open_shared_link(connection_string, origin)
+
         drone = self.add_drone(connection_string)
+        drone.origin = origin
+        self._connect(drone, connection_string)
+    
+    def _connect(self, drone: Drone, connection_string: str):
         try:
             drone.connect(connection_string)
 
@@ -86,15 +339,144 @@ class DroneManager:
             drone.request_info()
 
             if len(drone.drone_parameters.parameters) == 0:
-                drone.drone_parameters.parameters, _ = parameter_retrieval.retrieve_all_params(drone.connection)
+                parameters, _ = parameter_retrieval.retrieve_all_params(drone.connection)
+                drone.drone_parameters.set_parameters(parameters)
+
+            # Snapshot de início de sessão, para auditoria de parâmetros entre voos
+            self.snapshot_store.take(
+                connection_string,
+                drone.drone_parameters.get_parameters(),
+                session_id=drone.flight_logger.session_id,
+                label="SESSION_START"
+            )
+            
+            # Veículos de um enlace compartilhado não são reabertos um a um: o socket é do enlace
+            reconnect = None if isinstance(drone.connection, VehicleConnection) \
+                else lambda: drone.reconnect(connection_string)
+            self.link_supervisor.register(drone, connection_string, reconnect)
         except Exception as e:
-            if hasattr(drone, 'flight_logger'):
+            if drone.flight_logger is not None:
                 drone.flight_logger.log_error("CONNECTION_FAILED", str(e))
                 drone.flight_logger.close()
 
             self.remove_drone(connection_string)
             raise e
     
+    def open_shared_link(self, connection_string: str, origin: Point = None) -> SharedLink:
+        """
+            Abre um enlace compartilhado ("mux:<endereço>"). Os veículos são registrados
+            sozinhos quando o primeiro heartbeat de cada (sysid, compid) chega.
+        """
+        link_connection_string, key = split_vehicle_connection_string(connection_string)
+        with self._lock:
+            link = self.links.get(link_connection_string)
+            if key is not None:
+                # Um veículo desconectado volta a ser registrado no próximo heartbeat
+                if link is None or link.vehicle(key) is None:
+                    raise exceptions.DroneNotConnectedException()
+                if connection_string not in self.drones:
+                    link.forget(key)
+                return link
+            if link is not None:
+                return link
+            link = SharedLink(link_connection_string, self._register_shared_vehicle)
+            link.origin = origin or Point(0, 0, 0)
+            self.links[link_connection_string] = link
+
+        link.start()
+        return link
+    
+    def _register_shared_vehicle(self, link: SharedLink, vehicle: VehicleConnection):
+        # Chamado pela thread do enlace: o download de parâmetros roda em outra thread
+        connection_string = vehicle_connection_string(link.connection_string, vehicle.key)
+        threading.Thread(target=self._connect_shared_vehicle, args=(link, vehicle, connection_string),
+                         name=f"connect-{connection_string}", daemon=True).start()
+    
+    def _connect_shared_vehicle(self, link: SharedLink, vehicle: VehicleConnection, connection_string: str):
+        drone = self.add_drone(connection_string)
+        drone.origin = link.origin
+        drone.connection = vehicle
+        drone.stream_rates.share(link.stream_budget)
+        try:
+            self._connect(drone, connection_string)
+        except Exception as e:
+            delay = link.connect_failed(vehicle.key)
+            logging.warning(f"Could not connect vehicle {connection_string}: {e} (next attempt in {delay:.0f}s)")
+            return
+        link.connect_succeeded(vehicle.key)
+        
+        # A partir daqui o enlace entrega as mensagens direto para a fila de ingestão do drone
+        vehicle.attach(lambda msg, read_start: self._receive(drone, msg, read_start))
+        logging.info(f"Vehicle {connection_string} registered on shared link")
+    
+    def close_shared_link(self, connection_string: str) -> bool:
+        """Fecha um enlace compartilhado e desconecta todos os seus veículos"""
+        with self._lock:
+            link = self.links.pop(connection_string, None)
+            if link is None:
+                return False
+            prefix = connection_string + '/'
+            vehicles = [(cs, drone) for cs, drone in self.drones.items() if cs.startswith(prefix)]
+        
+        link.close()
+        for cs, drone in vehicles:
+            try:
+                drone.disconnect()
+            except Exception as e:
+                logging.warning(f"Error disconnecting vehicle {cs}: {e}")
+            self.remove_drone(cs)
+        return True
+    
+    def get_links(self) -> list:
+        """Enlaces compartilhados abertos e os veículos de cada um"""
+        with self._lock:
+            links = list(self.links.values())
+        return [{
+            'connection_string': link.connection_string,
+            'vehicles': [vehicle_connection_string(link.connection_string, vehicle.key) 
+                         for vehicle in link.vehicle_list() if not vehicle.muted],
+            'unrouted_messages': link.unrouted
+        } for link in links]
+    
+    def start_replay(self, connection_string: str, origin: Point = None) -> ReplaySession:
+        """Cria um drone virtual que reproduz um voo gravado ("replay:<arquivo>[@<velocidade>]")"""
+        filename, speed = parse_replay_connection_string(connection_string)
+        path = os.path.join(self.replay_dir, filename)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Replay file not found: {filename}")
+
+        with self._lock:
+            if connection_string in self.drones:
+                return self.replays.get(connection_string)
+            drone = Drone()
+            drone.origin = origin or Point(0, 0, 0)
+            session = ReplaySession(connection_string, path, speed, drone, self._handle_message)
+            drone.connected = True
+            self.drones[connection_string] = drone
+            self.replays[connection_string] = session
+            self.proximity.register(drone, connection_string)
+            self.geofences.register(drone, connection_string)
+            self.health.register(drone, connection_string)
+            if self.telemetry_export is not None:
+                self.telemetry_export.register(drone, connection_string)
+
+        session.start()
+        return session
+    
+    def get_proximity(self, connection_string: str, radius: float) -> list:
+        """Drones a até `radius` metros do drone (pelo índice espacial, em coordenadas do mundo)"""
+        drone = self.get_drone(connection_string)
+        position = self.proximity.position_of(drone) if drone is not None else None
+        if position is None:
+            raise exceptions.DroneNotConnectedException()
+        return self.proximity.near(*position, radius, exclude=drone)
+    
+    def get_replays(self) -> list:
+        """Estatísticas dos replays em andamento ou concluídos"""
+        with self._lock:
+            sessions = list(self.replays.values())
+        return [session.stats() for session in sessions]
+    
     def disconnect_drone(self, connection_string: str):
         """Disconnects a drone and closes its logger"""
         drone = self.get_drone(connection_string)
@@ -0,0 +1,49 @@
+import queue
+import threading
+from typing import List
+
+# Eventos guardados por assinante; quem não consome perde os mais antigos
+EVENT_QUEUE_SIZE = 256
+
+
+class EventBroadcaster:
+    """
+        Distribui eventos (dicts) para vários assinantes, cada um com a sua fila
+        limitada. Publicar nunca bloqueia: é chamado de dentro da ingestão.
+    """
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self) -> queue.Queue:
+        subscriber = queue.Queue(self.queue_size)
+        with self._lock:
+            self._subscribers = self._subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        with self._lock:
+            self._subscribers = [other for other in self._subscribers if other is not subscriber]
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: dict) -> None:
+        self.published += 1
+        for subscriber in self._subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    self.dropped += 1
@@ -0,0 +1,267 @@
+import math
+import time
+import threading
+import numpy as np
+from dataclasses import dataclass, asdict
+from typing import Dict, Hashable, List, Optional
+from pymavlink import mavutil
+from core.services.metrics import Histogram
+
+# Colunas guardadas por drone (uma linha por drone, uma coluna por medida)
+COLUMNS = (
+    'velocity_variance', 'pos_horiz_variance', 'pos_vert_variance', 'compass_variance',
+    'battery', 'ekf_ok', 'armed', 'ack_failures', 'last_message', 'last_heartbeat'
+)
+_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+
+# Colunas derivadas na avaliação (idade em segundos da última mensagem / do último heartbeat)
+DERIVED_COLUMNS = ('link_age', 'heartbeat_age')
+RULE_COLUMNS = tuple(name for name in COLUMNS if not name.startswith('last_')) + DERIVED_COLUMNS
+
+SEVERITIES = {'ok': 0, 'warning': 1, 'critical': 2}
+SEVERITY_NAMES = {level: name for name, level in SEVERITIES.items()}
+OPERATORS = {
+    '<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+    '==': np.equal, '!=': np.not_equal
+}
+
+# A tabela é reavaliada no máximo uma vez por intervalo, por mais clientes que consultem
+HEALTH_CACHE_SECONDS = 0.5
+INITIAL_CAPACITY = 64
+
+_ACK_OK = (mavutil.mavlink.MAV_RESULT_ACCEPTED, mavutil.mavlink.MAV_RESULT_IN_PROGRESS)
+
+
+@dataclass
+class HealthRule:
+    column: str
+    operator: str
+    threshold: float
+    severity: str
+    message: str
+
+    def validate(self) -> None:
+        if self.column not in RULE_COLUMNS:
+            raise ValueError(f"Unknown health column '{self.column}'")
+        if self.operator not in OPERATORS:
+            raise ValueError(f"Unknown operator '{self.operator}'")
+        if self.severity not in ('warning', 'critical'):
+            raise ValueError(f"Invalid severity '{self.severity}'")
+
+
+# Limites de variância do EKF seguem o FS_EKF_THRESH padrão do ArduPilot (0.8)
+DEFAULT_HEALTH_RULES = [
+    HealthRule('battery', '<', 30, 'warning', 'Battery low'),
+    HealthRule('battery', '<', 15, 'critical', 'Battery critical'),
+    HealthRule('link_age', '>', 2, 'warning', 'Link degraded'),
+    HealthRule('link_age', '>', 5, 'critical', 'Link lost'),
+    HealthRule('heartbeat_age', '>', 3, 'critical', 'No heartbeat'),
+    HealthRule('ekf_ok', '==', 0, 'warning', 'EKF not healthy'),
+    HealthRule('velocity_variance', '>', 0.8, 'warning', 'EKF velocity variance high'),
+    HealthRule('pos_horiz_variance', '>', 0.8, 'warning', 'EKF horizontal position variance high'),
+    HealthRule('pos_vert_variance', '>', 0.8, 'warning', 'EKF vertical position variance high'),
+    HealthRule('compass_variance', '>', 0.8, 'warning', 'EKF compass variance high'),
+    HealthRule('ack_failures', '>=', 3, 'warning', 'Repeated command failures'),
+]
+
+SORT_KEYS = ('severity', 'connection_string', 'mode') + RULE_COLUMNS
+
+
+class FleetHealth:
+    """
+        Saúde da frota em formato colunar: cada drone é uma linha de uma matriz NumPy,
+        escrita diretamente pela ingestão (uma atribuição por medida). A avaliação aplica
+        cada regra à coluna inteira de uma vez, então o custo cresce com o número de
+        regras, não com drones x regras em Python.
+    """
+
+    def __init__(self, rules: List[HealthRule] = None):
+        self.rules = list(rules or DEFAULT_HEALTH_RULES)
+        self.evaluate_seconds = Histogram()
+        self._data = np.full((INITIAL_CAPACITY, len(COLUMNS)), np.nan)
+        self._active = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self._names: List[Optional[str]] = [None] * INITIAL_CAPACITY
+        self._modes: List[str] = [''] * INITIAL_CAPACITY
+        self._slots: Dict[Hashable, int] = {}
+        self._free: List[int] = list(range(INITIAL_CAPACITY - 1, -1, -1))
+        self._lock = threading.Lock()
+        self._cache: Optional[tuple] = None
+
+    # ---- drones ----
+
+    def register(self, drone, name: str) -> None:
+        with self._lock:
+            if drone in self._slots:
+                return
+            if not self._free:
+                self._grow()
+            slot = self._free.pop()
+            self._data[slot] = np.nan
+            self._data[slot, _INDEX['ack_failures']] = 0
+            self._data[slot, _INDEX['last_message']] = time.monotonic()
+            self._active[slot] = True
+            self._names[slot] = name
+            self._modes[slot] = ''
+            self._slots[drone] = slot
+            self._cache = None
+
+    def unregister(self, drone) -> None:
+        with self._lock:
+            slot = self._slots.pop(drone, None)
+            if slot is None:
+                return
+            self._active[slot] = False
+            self._names[slot] = None
+            self._free.append(slot)
+            self._cache = None
+
+    def _grow(self) -> None:
+        capacity = len(self._active)
+        data = np.full((capacity * 2, len(COLUMNS)), np.nan)
+        data[:capacity] = self._data
+        active = np.zeros(capacity * 2, dtype=bool)
+        active[:capacity] = self._active
+        self._data, self._active = data, active
+        self._names.extend([None] * capacity)
+        self._modes.extend([''] * capacity)
+        self._free = list(range(capacity * 2 - 1, capacity - 1, -1))
+
+    # ---- ingestão ----
+
+    def observe(self, drone, msg_type: str, msg) -> None:
+        """Chamado para cada mensagem aplicada; só escreve as colunas que a mensagem afeta"""
+        # Com o lock: register pode trocar _data por um array maior (_grow), e uma escrita
+        # na linha do array antigo se perderia
+        with self._lock:
+            slot = self._slots.get(drone)
+            if slot is None:
+                return
+            row = self._data[slot]
+            now = time.monotonic()
+            row[_INDEX['last_message']] = now
+
+            if msg_type == 'HEARTBEAT':
+                if msg.autopilot == mavutil.mavlink.MAV_AUTOPILOT_INVALID:
+                    return
+                row[_INDEX['last_heartbeat']] = now
+                row[_INDEX['armed']] = bool(msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED)
+                self._modes[slot] = drone.mode
+            elif msg_type == 'EKF_STATUS_REPORT':
+                row[_INDEX['velocity_variance']] = msg.velocity_variance
+                row[_INDEX['pos_horiz_variance']] = msg.pos_horiz_variance
+                row[_INDEX['pos_vert_variance']] = msg.pos_vert_variance
+                row[_INDEX['compass_variance']] = msg.compass_variance
+                row[_INDEX['ekf_ok']] = drone.ekf_ok
+            elif msg_type == 'BATTERY_STATUS':
+                row[_INDEX['battery']] = msg.battery_remaining if msg.battery_remaining >= 0 else np.nan
+            elif msg_type == 'COMMAND_ACK':
+                # Conta falhas seguidas: um comando aceito zera, senão o aviso nunca sairia
+                if msg.result == mavutil.mavlink.MAV_RESULT_ACCEPTED:
+                    row[_INDEX['ack_failures']] = 0
+                elif msg.result not in _ACK_OK:
+                    row[_INDEX['ack_failures']] += 1
+
+    # ---- regras ----
+
+    def set_rules(self, rules: List[HealthRule]) -> None:
+        for rule in rules:
+            rule.validate()
+        with self._lock:
+            self.rules = list(rules)
+            self._cache = None
+
+    # ---- avaliação ----
+
+    def _evaluate(self) -> tuple:
+        """(nomes, modos, colunas por nome, severidade, regras disparadas com suas máscaras) dos drones ativos"""
+        now = time.monotonic()
+        cache = self._cache
+        if cache is not None and now - cache[0] < HEALTH_CACHE_SECONDS:
+            return cache[1]
+
+        start = time.perf_counter()
+        with self._lock:
+            slots = np.flatnonzero(self._active)
+            data = self._data[slots]
+            names = [self._names[slot] for slot in slots]
+            modes = [self._modes[slot] for slot in slots]
+            rules = list(self.rules)
+
+        columns = {name: data[:, i] for i, name in enumerate(COLUMNS)}
+        columns['link_age'] = now - columns['last_message']
+        columns['heartbeat_age'] = now - np.nan_to_num(columns['last_heartbeat'], nan=columns['last_message'])
+
+        severity = np.zeros(len(slots), dtype=np.int8)
+        hits = []
+        for rule in rules:
+            # NaN (medida ainda não recebida) nunca dispara regra: comparações com NaN são falsas
+            with np.errstate(invalid='ignore'):
+                mask = OPERATORS[rule.operator](columns[rule.column], rule.threshold)
+            if mask.any():
+                np.maximum(severity, np.where(mask, SEVERITIES[rule.severity], 0), out=severity)
+                hits.append((rule, mask))
+
+        result = (names, modes, columns, severity, hits)
+        self.evaluate_seconds.observe(time.perf_counter() - start)
+        self._cache = (now, result)
+        return result
+
+    def table(self, sort: str = 'severity', descending: bool = True, status: Optional[str] = None,
+              search: Optional[str] = None, limit: Optional[int] = None) -> dict:
+        """Tabela de saúde ordenada e filtrada"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{sort}'")
+        names, modes, columns, severity, hits = self._evaluate()
+
+        selected = np.ones(len(names), dtype=bool)
+        if status is not None:
+            if status not in SEVERITIES:
+                raise ValueError(f"Unknown status '{status}'")
+            selected &= severity == SEVERITIES[status]
+        if search:
+            needle = search.lower()
+            selected &= np.array([needle in name.lower() for name in names], dtype=bool)
+        rows = np.flatnonzero(selected)
+
+        if sort == 'severity':
+            # Empate em severidade: o link mais antigo primeiro
+            keys = (columns['link_age'][rows], severity[rows])
+            order = np.lexsort(keys)
+        elif sort in ('connection_string', 'mode'):
+            labels = names if sort == 'connection_string' else modes
+            order = np.argsort(np.array([labels[row] for row in rows], dtype=object), kind='stable')
+        else:
+            # Negar em vez de inverter mantém as medidas ausentes (NaN) no fim nas duas direções
+            values = columns[sort][rows]
+            order = np.argsort(-values if descending else values, kind='stable')
+        if descending and sort in ('severity', 'connection_string', 'mode'):
+            order = order[::-1]
+        rows = rows[order][:limit] if limit else rows[order]
+
+        counts = np.bincount(severity, minlength=len(SEVERITIES))
+        return {
+            'summary': {name: int(counts[level]) for name, level in SEVERITIES.items()},
+            'drones': self._rows(names, modes, columns, severity, hits, rows)
+        }
+
+    @staticmethod
+    def _rows(names, modes, columns, severity, hits, rows: np.ndarray) -> List[dict]:
+        """Serializa só as linhas selecionadas; os problemas de cada uma saem das máscaras das regras"""
+        # NaN (medida ainda não recebida) vira None no JSON
+        values = {column: [None if math.isnan(value) else value for value in columns[column][rows].tolist()]
+                  for column in RULE_COLUMNS}
+        masks = [(rule, mask[rows].tolist(), columns[rule.column][rows].tolist()) for rule, mask in hits]
+        table = []
+        for i, row in enumerate(rows.tolist()):
+            table.append({
+                'connection_string': names[row],
+                'status': SEVERITY_NAMES[int(severity[row])],
+                'mode': modes[row],
+                **{column: values[column][i] for column in RULE_COLUMNS},
+                'issues': [{'column': rule.column, 'value': measured[i], 'severity': rule.severity,
+                            'message': rule.message} for rule, mask, measured in masks if mask[i]]
+            })
+        return table
+
+    def rules_as_dicts(self) -> List[dict]:
+        return [asdict(rule) for rule in self.rules]
@@ -0,0 +1,262 @@
+import math
+import time
+import itertools
+import threading
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Optional, Tuple
+from core.services.events import EventBroadcaster
+from core.services.metrics import Histogram
+
+# Cercas usam o referencial do mundo (LOCAL_POSITION_NED somado à origem de cada drone):
+# x/y em metros e altitude = -z
+FENCE_KINDS = ("inclusion", "exclusion")
+FENCE_SHAPES = ("polygon", "cylinder")
+
+
+@dataclass
+class Geofence:
+    name: str
+    kind: str  # "inclusion": o drone precisa ficar dentro; "exclusion": precisa ficar fora
+    shape: str
+    vertices: List[Tuple[float, float]] = field(default_factory=list)  # polígono
+    center: Tuple[float, float] = (0.0, 0.0)  # cilindro
+    radius: float = 0.0
+    min_altitude: float = -math.inf
+    max_altitude: float = math.inf
+    id: int = 0
+
+    def validate(self) -> None:
+        if self.kind not in FENCE_KINDS:
+            raise ValueError(f"Invalid fence kind '{self.kind}'")
+        if self.shape == "polygon" and len(self.vertices) < 3:
+            raise ValueError("A polygon fence needs at least 3 vertices")
+        if self.shape == "cylinder" and self.radius <= 0:
+            raise ValueError("A cylinder fence needs a positive radius")
+        if self.shape not in FENCE_SHAPES:
+            raise ValueError(f"Invalid fence shape '{self.shape}'")
+        if self.min_altitude > self.max_altitude:
+            raise ValueError("min_altitude is above max_altitude")
+
+    def contains(self, x: float, y: float, altitude: float) -> bool:
+        """Teste escalar (referência para o caminho vetorizado)"""
+        if not self.min_altitude <= altitude <= self.max_altitude:
+            return False
+        if self.shape == "cylinder":
+            return (x - self.center[0]) ** 2 + (y - self.center[1]) ** 2 <= self.radius ** 2
+        inside = False
+        vertices = self.vertices
+        for (x1, y1), (x2, y2) in zip(vertices, vertices[1:] + vertices[:1]):
+            if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                inside = not inside
+        return inside
+
+    def breached(self, x: float, y: float, altitude: float) -> bool:
+        return self.contains(x, y, altitude) != (self.kind == "inclusion")
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id, 'name': self.name, 'kind': self.kind, 'shape': self.shape,
+            'vertices': [list(vertex) for vertex in self.vertices], 'center': list(self.center),
+            'radius': self.radius,
+            'min_altitude': None if math.isinf(self.min_altitude) else self.min_altitude,
+            'max_altitude': None if math.isinf(self.max_altitude) else self.max_altitude
+        }
+
+
+class PreparedFences:
+    """
+        Geometria das cercas pronta para avaliação em lote: caixas envolventes, limites
+        de altitude e a tabela de arestas de todos os polígonos concatenada (agrupada por
+        polígono, para somar os cruzamentos com reduceat).
+    """
+
+    def __init__(self, fences: List[Geofence]):
+        self.fences = fences
+        self.ids = np.array([fence.id for fence in fences], dtype=np.int64)
+        count = len(fences)
+        self.bbox = np.empty((count, 4))  # xmin, xmax, ymin, ymax
+        self.altitude = np.array([(fence.min_altitude, fence.max_altitude) for fence in fences]).reshape(count, 2)
+        self.inclusion = np.array([fence.kind == "inclusion" for fence in fences], dtype=bool)
+
+        self.cylinders = np.array([i for i, fence in enumerate(fences) if fence.shape == "cylinder"], dtype=np.int64)
+        self.cylinder_geometry = np.array([(*fences[i].center, fences[i].radius ** 2) for i in self.cylinders]).reshape(-1, 3)
+
+        self.polygons = np.array([i for i, fence in enumerate(fences) if fence.shape == "polygon"], dtype=np.int64)
+        edges, starts = [], []
+        for i in self.polygons:
+            vertices = fences[i].vertices
+            starts.append(len(edges))
+            edges.extend((x1, y1, x2, y2) for (x1, y1), (x2, y2) in zip(vertices, vertices[1:] + vertices[:1]))
+        edges = np.array(edges, dtype=np.float64).reshape(-1, 4)
+        self.edge_starts = np.array(starts, dtype=np.int64)
+        self.edge_x1, self.edge_y1 = edges[:, 0], edges[:, 1]
+        self.edge_y2 = edges[:, 3]
+        # Inclinação inversa pré-calculada: o teste de cruzamento vira uma multiplicação
+        dy = edges[:, 3] - edges[:, 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.edge_slope = np.where(dy != 0, (edges[:, 2] - edges[:, 0]) / dy, 0.0)
+
+        for i, fence in enumerate(fences):
+            if fence.shape == "cylinder":
+                cx, cy = fence.center
+                self.bbox[i] = (cx - fence.radius, cx + fence.radius, cy - fence.radius, cy + fence.radius)
+            else:
+                xs, ys = zip(*fence.vertices)
+                self.bbox[i] = (min(xs), max(xs), min(ys), max(ys))
+
+    def breaches(self, positions: np.ndarray) -> np.ndarray:
+        """Matriz (drones x cercas) indicando quais cercas cada posição viola"""
+        x, y, altitude = positions[:, 0:1], positions[:, 1:2], -positions[:, 2:3]
+        bbox = self.bbox
+        inside = ((x >= bbox[:, 0]) & (x <= bbox[:, 1]) & (y >= bbox[:, 2]) & (y <= bbox[:, 3]) &
+                  (altitude >= self.altitude[:, 0]) & (altitude <= self.altitude[:, 1]))
+
+        if len(self.cylinders):
+            geometry = self.cylinder_geometry
+            rows = inside[:, self.cylinders]
+            distance = (x - geometry[:, 0]) ** 2 + (y - geometry[:, 1]) ** 2
+            inside[:, self.cylinders] = rows & (distance <= geometry[:, 2])
+
+        if len(self.polygons):
+            candidates = inside[:, self.polygons]
+            rows = np.flatnonzero(candidates.any(axis=1))
+            if len(rows):
+                # Ray casting só para os drones que passaram pela caixa de algum polígono
+                px, py = x[rows], y[rows]
+                crosses = ((self.edge_y1 > py) != (self.edge_y2 > py)) & \
+                          (px < (py - self.edge_y1) * self.edge_slope + self.edge_x1)
+                parity = np.add.reduceat(crosses, self.edge_starts, axis=1, dtype=np.int64) % 2 == 1
+                candidates[rows] &= parity
+            inside[:, self.polygons] = candidates
+
+        return inside != self.inclusion
+
+
+class GeofenceMonitor:
+    """
+        Avalia todas as cercas para as posições recebidas desde a última passada da
+        thread de leitura, em um único lote NumPy. Violações novas e encerradas viram
+        eventos da frota e entradas no log de voo do drone.
+    """
+
+    def __init__(self, events: EventBroadcaster):
+        self.events = events
+        self.evaluate_seconds = Histogram()
+        self.breaches_raised = 0
+        self._ids = itertools.count(1)
+        self._fences: Dict[int, Geofence] = {}
+        self._prepared: Optional[PreparedFences] = None
+        self._pending: Dict[Hashable, Tuple[float, float, float]] = {}
+        self._names: Dict[Hashable, str] = {}
+        self._breaches: Dict[Hashable, bytes] = {}
+        self._active: Dict[Tuple[str, int], dict] = {}
+        self._lock = threading.Lock()
+
+    # ---- cercas ----
+
+    def add(self, fence: Geofence) -> Geofence:
+        fence.validate()
+        with self._lock:
+            fence.id = next(self._ids)
+            self._fences[fence.id] = fence
+            self._prepare()
+        return fence
+
+    def remove(self, fence_id: int) -> bool:
+        with self._lock:
+            if self._fences.pop(fence_id, None) is None:
+                return False
+            self._prepare()
+        return True
+
+    def fences(self) -> List[Geofence]:
+        return list(self._fences.values())
+
+    def _prepare(self) -> None:
+        self._prepared = PreparedFences(list(self._fences.values())) if self._fences else None
+        # As linhas guardadas seguem a ordem antiga das cercas; as violações ativas de cercas
+        # que continuam existindo são mantidas e conferidas na próxima posição
+        self._breaches.clear()
+        for key in [key for key in self._active if key[1] not in self._fences]:
+            alert = self._active.pop(key)
+            self.events.publish({'type': 'geofence_cleared', **alert})
+
+    # ---- drones ----
+
+    def register(self, drone, name: str) -> None:
+        with self._lock:
+            self._names[drone] = name
+
+    def unregister(self, drone) -> None:
+        with self._lock:
+            name = self._names.pop(drone, None)
+            self._pending.pop(drone, None)
+            self._breaches.pop(drone, None)
+            # Os clientes tiram o aviso da tela com o geofence_cleared, como nos alertas de separação
+            for key in [key for key in self._active if key[0] == name]:
+                alert = self._active.pop(key)
+                self.events.publish({'type': 'geofence_cleared', **alert})
+
+    def update(self, drone, x: float, y: float, z: float) -> None:
+        """Chamado na ingestão com a posição no mundo de cada LOCAL_POSITION_NED; a avaliação fica para evaluate()"""
+        if self._prepared is not None:
+            # Sob o lock: sem ele a posição pode cair no dict que evaluate() acabou de trocar
+            with self._lock:
+                self._pending[drone] = (x, y, z)
+
+    def evaluate(self) -> int:
+        """Avalia em lote as posições pendentes (uma vez por passada da thread de leitura)"""
+        if not self._pending:
+            return 0
+        start = time.perf_counter()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            prepared = self._prepared
+            if prepared is None:
+                return 0
+            drones = [drone for drone in pending if drone in self._names]
+            if not drones:
+                return 0
+            positions = np.array([pending[drone] for drone in drones], dtype=np.float64)
+            breaches = prepared.breaches(positions)
+
+            for drone, row, position in zip(drones, breaches, positions):
+                packed = row.tobytes()
+                previous = self._breaches.get(drone)
+                if packed == previous:
+                    continue
+                self._breaches[drone] = packed
+                self._apply(drone, prepared, row, position)
+        self.evaluate_seconds.observe(time.perf_counter() - start)
+        return len(drones)
+
+    def _apply(self, drone, prepared: PreparedFences, row: np.ndarray, position: np.ndarray) -> None:
+        name = self._names[drone]
+        breached = {int(prepared.ids[i]) for i in np.flatnonzero(row)}
+        active = {fence_id for (drone_name, fence_id) in self._active if drone_name == name}
+        x, y, z = (float(value) for value in position)
+
+        for fence_id in breached - active:
+            fence = self._fences[fence_id]
+            alert = {'connection_string': name, 'fence_id': fence_id, 'fence': fence.name, 'kind': fence.kind,
+                     'position': {'x': x, 'y': y, 'z': z}, 'since': time.time()}
+            self._active[(name, fence_id)] = alert
+            self.breaches_raised += 1
+            self.events.publish({'type': 'geofence_breach', **alert})
+            if getattr(drone, 'flight_logger', None) is not None:
+                drone.flight_logger.log_event("GEOFENCE_BREACH", {
+                    'fence_id': fence_id, 'fence': fence.name, 'kind': fence.kind, 'position': alert['position']
+                })
+
+        for fence_id in active - breached:
+            alert = self._active.pop((name, fence_id))
+            self.events.publish({'type': 'geofence_cleared', **alert, 'position': {'x': x, 'y': y, 'z': z}})
+            if getattr(drone, 'flight_logger', None) is not None:
+                drone.flight_logger.log_event("GEOFENCE_CLEARED", {
+                    'fence_id': fence_id, 'fence': alert['fence'], 'position': {'x': x, 'y': y, 'z': z}
+                })
+
+    def breaches(self) -> List[dict]:
+        with self._lock:
+            return [dict(alert) for alert in self._active.values()]
@@ -0,0 +1,146 @@
+import os
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Tuple
+from core.mavlink.mission import MISSION_MESSAGES
+from core.services.profiler import INGEST_THREAD_PREFIX
+
+# Tamanho da fila de mensagens de cada drone e política quando ela enche:
+# "drop_oldest" descarta a telemetria mais antiga da fila; "drop_newest" descarta a que chegou
+INGEST_QUEUE_SIZE = int(os.environ.get("INGEST_QUEUE_SIZE", "100"))
+INGEST_OVERFLOW_POLICY = os.environ.get("INGEST_OVERFLOW_POLICY", "drop_oldest")
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+# Threads que aplicam as mensagens (Drone.update_info, log, monitores da frota)
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "4"))
+
+# Mensagens aplicadas de uma vez antes de o worker passar para o próximo drone
+INGEST_BATCH = 32
+
+# Respostas que alguém está esperando: nunca são descartadas, mesmo com a fila cheia
+PROTECTED_MESSAGES = frozenset({'COMMAND_ACK', 'PARAM_VALUE'} | MISSION_MESSAGES)
+
+# (mensagem, início da leitura, fim da leitura) em time.perf_counter()
+QueuedMessage = Tuple[object, float, float]
+
+
+class MessageQueue:
+    """
+        Fila de mensagens recebidas de um drone, entre a thread de leitura e os workers.
+        Limitada a `maxsize`: quando cheia, a política descarta telemetria (que logo é
+        substituída por uma mensagem mais nova) e nunca ACKs ou parâmetros.
+    """
+
+    def __init__(self, maxsize: int = INGEST_QUEUE_SIZE, policy: str = INGEST_OVERFLOW_POLICY):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid overflow policy '{policy}'")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.high_water = 0
+        self.dropped: Dict[str, int] = {}
+        self._items: deque = deque()
+        self._scheduled = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item: QueuedMessage, msg_type: str) -> bool:
+        """Enfileira; retorna True se o drone precisa ser entregue a um worker"""
+        with self._lock:
+            items = self._items
+            if len(items) >= self.maxsize and msg_type not in PROTECTED_MESSAGES:
+                if self.policy == "drop_newest" or not self._drop_oldest():
+                    self._count_drop(msg_type)
+                    return False
+            items.append(item)
+            if len(items) > self.high_water:
+                self.high_water = len(items)
+            if self._scheduled:
+                return False
+            self._scheduled = True
+            return True
+
+    def _drop_oldest(self) -> bool:
+        for index, (msg, _, _) in enumerate(self._items):
+            msg_type = msg.get_type()
+            if msg_type not in PROTECTED_MESSAGES:
+                del self._items[index]
+                self._count_drop(msg_type)
+                return True
+        return False
+
+    def _count_drop(self, msg_type: str) -> None:
+        self.dropped[msg_type] = self.dropped.get(msg_type, 0) + 1
+
+    def take(self, count: int) -> List[QueuedMessage]:
+        with self._lock:
+            items = self._items
+            return [items.popleft() for _ in range(min(count, len(items)))]
+
+    def finish(self) -> bool:
+        """Chamado pelo worker depois de um lote; True se ainda há mensagens (continua agendado)"""
+        with self._lock:
+            if self._items:
+                return True
+            self._scheduled = False
+            return False
+
+    def stats(self) -> dict:
+        return {'depth': len(self._items), 'maxsize': self.maxsize, 'policy': self.policy,
+                'high_water': self.high_water, 'dropped': dict(self.dropped),
+                'dropped_total': sum(self.dropped.values())}
+
+
+class IngestPool:
+    """
+        Workers que aplicam as mensagens enfileiradas pela thread de leitura. Um drone com
+        mensagens pendentes entra uma única vez na fila de prontos e só um worker o atende
+        por vez, então a ordem das mensagens de cada drone é preservada; drones diferentes
+        são aplicados em paralelo. Um drone lento só enche (e descarta) a própria fila.
+    """
+
+    def __init__(self, handler: Callable, workers: int = INGEST_WORKERS):
+        self.handler = handler
+        self._ready: queue.SimpleQueue = queue.SimpleQueue()
+        self._threads = [threading.Thread(target=self._work, name=f"{INGEST_THREAD_PREFIX}-{i}", daemon=True)
+                         for i in range(max(workers, 1))]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def workers(self) -> int:
+        return len(self._threads)
+
+    def submit(self, drone, msg, read_start: float = None) -> None:
+        """Chamado pela thread de leitura (ou do enlace) para cada mensagem recebida"""
+        received = time.perf_counter()
+        if drone.message_queue.put((msg, read_start, received), msg.get_type()):
+            self._ready.put(drone)
+
+    def pending(self) -> int:
+        """Drones com mensagens esperando um worker livre"""
+        return self._ready.qsize()
+
+    def _work(self) -> None:
+        while True:
+            drone = self._ready.get()
+            if drone is None:
+                return
+            messages = drone.message_queue
+            for msg, read_start, received in messages.take(INGEST_BATCH):
+                try:
+                    self.handler(drone, msg, read_start, received)
+                except Exception as e:
+                    drone.ingest_stats.count_error(e.__class__.__name__)
+                    logging.error(f"Unexpected error applying MAVLink message for drone {drone}: {e}")
+            # Volta para o fim da fila: um drone muito ativo não monopoliza o worker
+            if messages.finish():
+                self._ready.put(drone)
+
+    def stop(self) -> None:
+        for _ in self._threads:
+            self._ready.put(None)
@@ -0,0 +1,86 @@
+import os
+import time
+import threading
+from typing import Dict, Optional, Tuple
+from core.services.metrics import Histogram
+
+# Amostra 1 a cada N mensagens por drone (0 desliga o rastreamento)
+LATENCY_SAMPLE_EVERY = int(os.environ.get("LATENCY_SAMPLE_EVERY", "16"))
+
+# Limites (em segundos) dos buckets dos histogramas de latência
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Etapas medidas por mensagem amostrada
+STAGE_RECEIVE = "receive"      # recv_match: leitura do socket + decodificação
+STAGE_QUEUE = "queue"          # espera na fila do drone até um worker aplicar a mensagem
+STAGE_APPLY = "apply"          # Drone.update_info
+STAGE_AUTOPILOT = "autopilot"  # atraso em relação ao time_boot_ms do autopiloto (ver record)
+STAGE_SERVED = "served"        # idade do dado mais recente quando é entregue ao cliente
+
+
+class LatencyTracer:
+    """
+        Latências ponta a ponta amostradas de um drone, por etapa e tipo de mensagem.
+
+        Sem relógio sincronizado com o autopiloto, a etapa "autopilot" mede o atraso
+        relativo: (hora de chegada - time_boot_ms) menos o menor valor já visto. A
+        mensagem mais rápida vira a referência, e o resultado é o tempo extra que as
+        outras passaram no enlace, no buffer do socket ou esperando a thread de leitura.
+    """
+    __slots__ = ('sample_every', '_countdown', 'histograms', 'last_applied', '_clock_offset', '_last_boot_ms',
+                 '_served_lock')
+
+    def __init__(self, sample_every: int = LATENCY_SAMPLE_EVERY):
+        self.sample_every = sample_every
+        self._countdown = sample_every
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.last_applied: Optional[float] = None
+
+        self._clock_offset: Optional[float] = None
+        self._last_boot_ms = 0
+        # As etapas da ingestão têm um escritor (o worker que atende o drone); "served" é
+        # escrito ao mesmo tempo por threads da API e pelo loop dos streams
+        self._served_lock = threading.Lock()
+
+    def should_sample(self) -> bool:
+        """Decide se a próxima mensagem será rastreada (chamado pelo worker que atende o drone)"""
+        if not self.sample_every:
+            return False
+        self._countdown -= 1
+        if self._countdown > 0:
+            return False
+        self._countdown = self.sample_every
+        return True
+
+    def _observe(self, stage: str, msg_type: str, seconds: float) -> None:
+        histogram = self.histograms.get((stage, msg_type))
+        if histogram is None:
+            histogram = self.histograms[(stage, msg_type)] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+
+    def record(self, msg, read_start: float, received: float, started: float, applied: float) -> None:
+        """Registra as etapas de uma mensagem amostrada (tempos de time.perf_counter())"""
+        msg_type = msg.get_type()
+        self._observe(STAGE_RECEIVE, msg_type, received - read_start)
+        self._observe(STAGE_QUEUE, msg_type, started - received)
+        self._observe(STAGE_APPLY, msg_type, applied - started)
+
+        boot_ms = getattr(msg, 'time_boot_ms', None)
+        if boot_ms is None:
+            return
+        if boot_ms < self._last_boot_ms:
+            # Autopiloto reiniciou: a referência antiga não vale mais
+            self._clock_offset = None
+        self._last_boot_ms = boot_ms
+
+        offset = getattr(msg, '_timestamp', time.time()) - boot_ms / 1000
+        if self._clock_offset is None or offset < self._clock_offset:
+            self._clock_offset = offset
+        self._observe(STAGE_AUTOPILOT, msg_type, offset - self._clock_offset)
+
+    def record_served(self, channel: str) -> None:
+        """Registra a idade dos dados entregues por um endpoint ou stream"""
+        if self.sample_every and self.last_applied is not None:
+            age = time.perf_counter() - self.last_applied
+            with self._served_lock:
+                self._observe(STAGE_SERVED, channel, age)
@@ -0,0 +1,371 @@
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional
+from core.services.events import EventBroadcaster
+from utils.versioning import next_version
+
+# Sem nenhum pacote por LINK_DEGRADED_TIMEOUT segundos o enlace fica "degraded"; por
+# LINK_LOST_TIMEOUT, "lost". Sem HEARTBEAT por LINK_HEARTBEAT_TIMEOUT também degrada
+# (o veículo pode estar mandando só parte das mensagens).
+LINK_DEGRADED_TIMEOUT = float(os.environ.get("LINK_DEGRADED_TIMEOUT", "2.0"))
+LINK_LOST_TIMEOUT = float(os.environ.get("LINK_LOST_TIMEOUT", "5.0"))
+LINK_HEARTBEAT_TIMEOUT = 3.0
+
+# Perda de pacotes (pelos números de sequência) acima disso degrada o enlace; volta a "ok" só
+# abaixo da metade. A perda é medida em janelas de pelo menos LOSS_WINDOW_PACKETS pacotes.
+LINK_DEGRADED_LOSS = 0.2
+LOSS_WINDOW_PACKETS = 20
+
+# Intervalo entre TIMESYNCs para medir o RTT (0 desliga)
+LINK_RTT_INTERVAL = float(os.environ.get("LINK_RTT_INTERVAL", "2.0"))
+RTT_SMOOTHING = 0.2
+
+# Reconexão de enlaces perdidos: espera dobra a cada tentativa até o máximo (com jitter)
+LINK_RECONNECT = os.environ.get("LINK_RECONNECT", "1") != "0"
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+RECONNECT_WORKERS = 4
+
+# Roda de timers: resolução e número de posições (uma volta = TIMER_TICK * TIMER_SLOTS segundos)
+TIMER_TICK = 0.1
+TIMER_SLOTS = 512
+
+LINK_STATES = ("ok", "degraded", "lost")
+
+
+class Timer:
+    __slots__ = ('rounds', 'callback', 'args', 'cancelled')
+
+    def __init__(self, rounds: int, callback: Callable, args: tuple):
+        self.rounds = rounds
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+        Roda de timers com hash (hashed timing wheel): agendar e cancelar custam O(1) e
+        cada tick só olha a posição da vez. Timers mais longos que uma volta guardam
+        quantas voltas ainda faltam. Não é thread-safe por si só: quem usa protege com lock.
+    """
+
+    def __init__(self, tick: float = TIMER_TICK, slots: int = TIMER_SLOTS):
+        self.tick = tick
+        self._slots: List[List[Timer]] = [[] for _ in range(slots)]
+        self._position = 0
+        self._started = time.monotonic()
+        self._ticks_done = 0
+        self.pending = 0
+
+    def schedule(self, delay: float, callback: Callable, *args) -> Timer:
+        ticks = max(1, int(round(delay / self.tick)))
+        slots = len(self._slots)
+        timer = Timer((ticks - 1) // slots, callback, args)
+        self._slots[(self._position + ticks) % slots].append(timer)
+        self.pending += 1
+        return timer
+
+    def advance(self, now: float) -> List[Timer]:
+        """Avança até `now` e devolve os timers vencidos (o chamador executa fora do lock)"""
+        due = []
+        target = int((now - self._started) / self.tick)
+        slots = len(self._slots)
+        while self._ticks_done < target:
+            self._ticks_done += 1
+            self._position = (self._position + 1) % slots
+            bucket = self._slots[self._position]
+            if not bucket:
+                continue
+            remaining = []
+            for timer in bucket:
+                if timer.cancelled:
+                    self.pending -= 1
+                elif timer.rounds > 0:
+                    timer.rounds -= 1
+                    remaining.append(timer)
+                else:
+                    self.pending -= 1
+                    due.append(timer)
+            self._slots[self._position] = remaining
+        return due
+
+
+class LinkState:
+    """Qualidade do enlace de um drone; o caminho quente (observe) só atribui campos"""
+    __slots__ = ('name', 'drone', 'reconnect', 'state', 'since', 'last_packet', 'last_heartbeat',
+                 'sequences', 'received', 'lost', 'window_received', 'window_lost', 'loss',
+                 'rtt', 'rtt_pending', 'reconnects', 'reconnect_attempts', 'reconnect_delay',
+                 'next_reconnect', 'reconnecting', 'check', 'probe', 'retry')
+
+    def __init__(self, name: str, drone, reconnect: Optional[Callable]):
+        now = time.monotonic()
+        self.name = name
+        self.drone = drone
+        self.reconnect = reconnect
+        self.state = "ok"
+        self.since = time.time()
+        self.last_packet = now
+        self.last_heartbeat = now
+        self.sequences: Dict[int, int] = {}  # último número de sequência por componente de origem
+        self.received = 0
+        self.lost = 0
+        self.window_received = 0
+        self.window_lost = 0
+        self.loss = 0.0
+        self.rtt: Optional[float] = None
+        self.rtt_pending: Optional[int] = None  # ts1 do último TIMESYNC enviado
+        self.reconnects = 0
+        self.reconnect_attempts = 0
+        self.reconnect_delay = RECONNECT_MIN_DELAY
+        self.next_reconnect: Optional[float] = None
+        self.reconnecting = False
+        self.check: Optional[Timer] = None
+        self.probe: Optional[Timer] = None
+        self.retry: Optional[Timer] = None
+
+    def to_dict(self) -> dict:
+        now = time.monotonic()
+        total = self.received + self.lost
+        return {
+            'connection_string': self.name, 'state': self.state, 'since': self.since,
+            'last_packet_age': now - self.last_packet, 'last_heartbeat_age': now - self.last_heartbeat,
+            'packets_received': self.received, 'packets_lost': self.lost,
+            'loss_percent': 100 * self.lost / total if total else 0.0,
+            'recent_loss_percent': 100 * self.loss,
+            'rtt_ms': None if self.rtt is None else 1000 * self.rtt,
+            'reconnects': self.reconnects, 'reconnect_attempts': self.reconnect_attempts,
+            'next_reconnect_in': None if self.next_reconnect is None else max(self.next_reconnect - now, 0.0),
+            'reconnectable': self.reconnect is not None
+        }
+
+
+class LinkSupervisor:
+    """
+        Supervisiona os enlaces de todos os drones com uma única thread e uma roda de
+        timers. Cada drone tem um timer de checagem rearmado preguiçosamente: receber um
+        pacote só atualiza o horário do último pacote, e quando o timer vence ele confere
+        a idade real e se reagenda para o próximo limite. Mudanças de estado viram eventos
+        da frota; enlaces perdidos são reabertos com espera exponencial.
+    """
+
+    def __init__(self, events: EventBroadcaster):
+        self.events = events
+        self.wheel = TimerWheel()
+        self._links: Dict[Hashable, LinkState] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=RECONNECT_WORKERS, thread_name_prefix="link-reconnect")
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="link-supervisor", daemon=True)
+        self._thread.start()
+
+    # ---- drones ----
+
+    def register(self, drone, name: str, reconnect: Optional[Callable] = None) -> None:
+        """`reconnect` reabre o enlace do drone (None para enlaces que não dá para reabrir)"""
+        with self._lock:
+            if drone in self._links:
+                self._links[drone].reconnect = reconnect
+                return
+            link = self._links[drone] = LinkState(name, drone, reconnect)
+            link.check = self.wheel.schedule(LINK_DEGRADED_TIMEOUT, self._check, link)
+            if LINK_RTT_INTERVAL:
+                link.probe = self.wheel.schedule(random.uniform(0, LINK_RTT_INTERVAL), self._probe, link)
+        drone.link_state = "ok"
+
+    def unregister(self, drone) -> None:
+        with self._lock:
+            link = self._links.pop(drone, None)
+            if link is None:
+                return
+            for timer in (link.check, link.probe, link.retry):
+                if timer is not None:
+                    timer.cancel()
+
+    # ---- ingestão ----
+
+    def observe(self, drone, msg) -> None:
+        """Chamado pela thread de leitura para cada mensagem recebida, antes da fila de ingestão"""
+        link = self._links.get(drone)
+        if link is None:
+            return
+        now = time.monotonic()
+        link.last_packet = now
+        msg_type = msg.get_type()
+        if msg_type == 'BAD_DATA':
+            return
+
+        # Perda pelo número de sequência (8 bits, por componente de origem)
+        component = msg.get_srcComponent()
+        seq = msg.get_seq()
+        last = link.sequences.get(component)
+        link.sequences[component] = seq
+        link.received += 1
+        link.window_received += 1
+        if last is not None:
+            gap = (seq - last - 1) & 0xFF
+            # Saltos enormes são reordenação, duplicata ou reinício do autopiloto, não perda
+            if gap < 128:
+                link.lost += gap
+                link.window_lost += gap
+
+        if msg_type == 'HEARTBEAT':
+            link.last_heartbeat = now
+        elif msg_type == 'TIMESYNC' and msg.tc1 != 0 and msg.ts1 == link.rtt_pending:
+            link.rtt_pending = None
+            rtt = (time.monotonic_ns() - msg.ts1) / 1e9
+            # Resposta de um TIMESYNC que ficou parado durante uma queda não é RTT
+            if rtt < LINK_LOST_TIMEOUT:
+                link.rtt = rtt if link.rtt is None else link.rtt + RTT_SMOOTHING * (rtt - link.rtt)
+
+        if link.state != "ok":
+            self._evaluate(link, now)
+
+    # ---- timers ----
+
+    def _run(self) -> None:
+        while not self._stop:
+            time.sleep(self.wheel.tick)
+            with self._lock:
+                due = self.wheel.advance(time.monotonic())
+            for timer in due:
+                try:
+                    timer.callback(*timer.args)
+                except Exception as e:
+                    logging.error(f"Error in link supervisor timer: {e}")
+
+    def _schedule(self, delay: float, callback: Callable, *args) -> Timer:
+        with self._lock:
+            return self.wheel.schedule(delay, callback, *args)
+
+    def _check(self, link: LinkState) -> None:
+        if link.drone not in self._links:
+            return
+        now = time.monotonic()
+        received, lost = link.window_received, link.window_lost
+        if received + lost >= LOSS_WINDOW_PACKETS:
+            link.window_received = link.window_lost = 0
+            link.loss = lost / (received + lost)
+        state = self._evaluate(link, now)
+
+        # Próxima checagem no próximo limite que o enlace pode cruzar
+        age = now - link.last_packet
+        if state == "ok":
+            delay = LINK_DEGRADED_TIMEOUT - age
+        elif state == "degraded":
+            delay = min(LINK_LOST_TIMEOUT - age, LINK_DEGRADED_TIMEOUT) if age < LINK_LOST_TIMEOUT else LINK_DEGRADED_TIMEOUT
+        else:
+            delay = LINK_DEGRADED_TIMEOUT
+        link.check = self._schedule(max(delay, self.wheel.tick), self._check, link)
+
+    def _evaluate(self, link: LinkState, now: float) -> str:
+        age = now - link.last_packet
+        if age >= LINK_LOST_TIMEOUT:
+            state = "lost"
+        elif (age >= LINK_DEGRADED_TIMEOUT or now - link.last_heartbeat >= LINK_HEARTBEAT_TIMEOUT
+              or link.loss > (LINK_DEGRADED_LOSS if link.state == "ok" else LINK_DEGRADED_LOSS / 2)):
+            state = "degraded"
+        else:
+            state = "ok"
+        if state != link.state:
+            self._transition(link, state, age)
+        return state
+
+    def _transition(self, link: LinkState, state: str, age: float) -> None:
+        with self._lock:
+            if link.state == state:
+                return
+            previous, link.state = link.state, state
+            link.since = time.time()
+            if state == "lost":
+                link.rtt_pending = None
+            if state == "lost" and link.reconnect is not None and LINK_RECONNECT:
+                link.reconnect_delay = RECONNECT_MIN_DELAY
+                self._arm_reconnect(link)
+            elif state != "lost" and link.retry is not None:
+                link.retry.cancel()
+                link.retry = link.next_reconnect = None
+
+        drone = link.drone
+        drone.link_state = state
+        # get_drone_info inclui o estado do enlace: as respostas em cache precisam mudar
+        drone.telemetry_version = next_version()
+        logging.info(f"Link {link.name}: {previous} -> {state}")
+        if state == "ok":
+            # O veículo pode ter reiniciado (causa comum de uma queda) e voltado às taxas padrão
+            try:
+                drone.request_info()
+            except Exception as e:
+                logging.warning(f"Link {link.name}: could not restore stream rates: {e}")
+        event = "link_restored" if state == "ok" else f"link_{state}"
+        self.events.publish({'type': event, 'connection_string': link.name, 'previous': previous,
+                             'last_packet_age': age, 'loss_percent': 100 * link.loss})
+        if drone.flight_logger is not None:
+            drone.flight_logger.log_event(f"LINK_{state.upper()}", {'previous': previous, 'last_packet_age': age})
+
+    # ---- RTT ----
+
+    def _probe(self, link: LinkState) -> None:
+        if link.drone not in self._links:
+            return
+        connection = link.drone.connection
+        if link.state != "lost" and connection is not None and hasattr(connection, 'mav'):
+            # O autopiloto responde com tc1 preenchido e o nosso ts1 de volta
+            link.rtt_pending = time.monotonic_ns()
+            try:
+                connection.mav.timesync_send(0, link.rtt_pending)
+            except Exception as e:
+                logging.debug(f"Could not send TIMESYNC to {link.name}: {e}")
+        link.probe = self._schedule(LINK_RTT_INTERVAL, self._probe, link)
+
+    # ---- reconexão ----
+
+    def _arm_reconnect(self, link: LinkState) -> None:
+        # Chamado com o lock
+        if link.retry is not None:
+            link.retry.cancel()
+        delay = link.reconnect_delay * random.uniform(0.8, 1.2)
+        link.next_reconnect = time.monotonic() + delay
+        link.retry = self.wheel.schedule(delay, self._start_reconnect, link)
+
+    def _start_reconnect(self, link: LinkState) -> None:
+        if link.drone not in self._links or link.state != "lost" or link.reconnecting:
+            return
+        link.reconnecting = True
+        link.reconnect_attempts += 1
+        # Abrir a conexão pode bloquear (TCP, serial): roda fora da thread dos timers
+        self._executor.submit(self._reconnect, link)
+
+    def _reconnect(self, link: LinkState) -> None:
+        try:
+            link.reconnect()
+            link.reconnects += 1
+            link.sequences.clear()
+            logging.info(f"Link {link.name}: reopened after {link.reconnect_attempts} attempt(s)")
+        except Exception as e:
+            logging.warning(f"Link {link.name}: reconnect failed: {e}")
+        finally:
+            link.reconnecting = False
+        with self._lock:
+            if link.drone in self._links and link.state == "lost":
+                # Continua perdido até chegar um pacote: tenta de novo com espera maior
+                link.reconnect_delay = min(link.reconnect_delay * 2, RECONNECT_MAX_DELAY)
+                self._arm_reconnect(link)
+
+    # ---- consultas ----
+
+    def status(self, drone) -> Optional[dict]:
+        link = self._links.get(drone)
+        return None if link is None else link.to_dict()
+
+    def links(self) -> List[dict]:
+        with self._lock:
+            links = list(self._links.values())
+        return [link.to_dict() for link in links]
@@ -0,0 +1,127 @@
+import bisect
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Limites (em segundos) dos buckets dos histogramas de duração
+DURATION_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+Labels = Dict[str, str]
+
+
+class Histogram:
+    """
+        Histograma de buckets fixos. Pensado para um único escritor (a thread de leitura),
+        então observe() não usa lock nem aloca nada além do incremento dos inteiros.
+    """
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...] = DURATION_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class IngestStats:
+    """Contadores de ingestão de um drone, escritos por um worker de ingestão de cada vez"""
+    __slots__ = ('message_counts', 'errors', 'update_seconds')
+
+    def __init__(self):
+        self.message_counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.update_seconds = Histogram()
+
+    def count_message(self, msg_type: str) -> None:
+        counts = self.message_counts
+        counts[msg_type] = counts.get(msg_type, 0) + 1
+
+    def count_error(self, kind: str) -> None:
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+class MetricsWriter:
+    """Monta o texto no formato de exposição do Prometheus (versão 0.0.4)"""
+
+    def __init__(self):
+        self._lines: List[str] = []
+        self._declared = set()
+
+    def _declare(self, name: str, metric_type: str, help_text: str) -> None:
+        if name in self._declared:
+            return
+        self._declared.add(name)
+        self._lines.append(f'# HELP {name} {help_text}')
+        self._lines.append(f'# TYPE {name} {metric_type}')
+
+    def counter(self, name: str, help_text: str, samples: Iterable[Tuple[Labels, float]]) -> None:
+        self._declare(name, 'counter', help_text)
+        for labels, value in samples:
+            self._lines.append(f'{name}{_format_labels(labels)} {value}')
+
+    def gauge(self, name: str, help_text: str, samples: Iterable[Tuple[Labels, float]]) -> None:
+        self._declare(name, 'gauge', help_text)
+        for labels, value in samples:
+            self._lines.append(f'{name}{_format_labels(labels)} {value}')
+
+    def histogram(self, name: str, help_text: str, samples: Iterable[Tuple[Labels, Histogram]]) -> None:
+        self._declare(name, 'histogram', help_text)
+        for labels, histogram in samples:
+            # Cópia rápida: o escritor pode estar incrementando enquanto lemos
+            counts = list(histogram.counts)
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, counts):
+                cumulative += count
+                self._lines.append(f'{name}_bucket{_format_labels({**labels, "le": bound})} {cumulative}')
+            cumulative += counts[-1]
+            self._lines.append(f'{name}_bucket{_format_labels({**labels, "le": "+Inf"})} {cumulative}')
+            self._lines.append(f'{name}_sum{_format_labels(labels)} {histogram.sum}')
+            self._lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+
+    def render(self) -> str:
+        return '\n'.join(self._lines) + '\n'
+
+
+class MetricsRegistry:
+    """
+        Registro central de métricas. Os componentes guardam seus próprios contadores e
+        registram um coletor, que só é chamado quando as métricas são lidas.
+    """
+
+    def __init__(self):
+        self._collectors: List[Callable[[MetricsWriter], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, collector: Callable[[MetricsWriter], None]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        writer = MetricsWriter()
+        with self._lock:
+            collectors = list(self._collectors)
+
+        for collector in collectors:
+            try:
+                collector(writer)
+            except Exception as e:
+                logging.error(f"Error collecting metrics from {collector}: {e}")
+        return writer.render()
+
+
+metrics_registry = MetricsRegistry()
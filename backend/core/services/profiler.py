@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import linecache
+import threading
+from typing import Callable, Dict, List
+import utils.exceptions as exceptions
+
+READER_THREAD_NAME = "mavlink-reader"
+INGEST_THREAD_PREFIX = "mavlink-ingest"
+
+PROFILE_MAX_DURATION = 60.0  # segundos
+PROFILE_DEFAULT_INTERVAL = 0.005  # segundos entre amostras
+
+# Frames no topo da pilha que indicam uma thread ociosa (esperando trabalho)
+_IDLE_MODULES = ("threading.py", "queue.py", "selectors.py")
+# time.sleep não tem frame Python: a thread dormindo para na linha que o chama
+_IDLE_CALLS = ("time.sleep(",)
+
+
+def _is_reader(thread: threading.Thread) -> bool:
+    # A leitura e os workers que aplicam as mensagens formam o caminho da ingestão
+    return thread.name == READER_THREAD_NAME or thread.name.startswith(INGEST_THREAD_PREFIX)
+
+
+def _is_api(thread: threading.Thread) -> bool:
+    # Loop de eventos do uvicorn, threadpool do Starlette (anyio) e pool de comandos da frota
+    return (thread is threading.main_thread() or thread.name == "AnyIO worker thread"
+            or thread.name.startswith("fleet-command"))
+
+
+PROFILE_TARGETS: Dict[str, Callable[[threading.Thread], bool]] = {
+    "reader": _is_reader,
+    "api": _is_api,
+    "all": lambda thread: _is_reader(thread) or _is_api(thread),
+}
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    if code.co_filename.endswith(_IDLE_MODULES):
+        return True
+    return linecache.getline(code.co_filename, frame.f_lineno).lstrip().startswith(_IDLE_CALLS)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _collapse(frame) -> List[str]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class SamplingProfiler:
+    """
+        Profiler por amostragem: a thread que pede o perfil lê periodicamente as pilhas
+        (sys._current_frames) das threads alvo. Não instala hooks no interpretador,
+        então quando não há perfil em andamento o custo é zero.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def profile(self, target: str = "all", duration: float = 5.0,
+                interval: float = PROFILE_DEFAULT_INTERVAL, include_idle: bool = False) -> str:
+        """
+            Amostra as threads do alvo por `duration` segundos e retorna as pilhas no
+            formato "collapsed" (uma pilha por linha, frames separados por ';' e a contagem
+            no final), aceito pelo flamegraph.pl, speedscope e similares.
+        """
+        matches = PROFILE_TARGETS[target]
+        duration = min(duration, PROFILE_MAX_DURATION)
+
+        if not self._lock.acquire(blocking=False):
+            raise exceptions.ProfilerBusyException()
+        try:
+            return self.__sample(matches, duration, interval, include_idle)
+        finally:
+            self._lock.release()
+
+    def __sample(self, matches, duration: float, interval: float, include_idle: bool) -> str:
+        counts: Dict[str, int] = {}
+        me = threading.get_ident()
+        deadline = time.monotonic() + duration
+
+        while time.monotonic() < deadline:
+            threads = {thread.ident: thread for thread in threading.enumerate() if matches(thread)}
+            for ident, frame in sys._current_frames().items():
+                thread = threads.get(ident)
+                if thread is None or ident == me:
+                    continue
+                if not include_idle and _is_idle(frame):
+                    continue
+
+                key = ";".join([thread.name] + _collapse(frame))
+                counts[key] = counts.get(key, 0) + 1
+            time.sleep(interval)
+
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,220 @@
+import os
+import math
+import time
+import heapq
+import threading
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+from core.services.events import EventBroadcaster
+from core.services.metrics import Histogram
+
+# Distância mínima (m) entre dois drones; abaixo disso é emitido um alerta de separação.
+# O alerta só é encerrado quando a distância passa de SEPARATION_DISTANCE + SEPARATION_HYSTERESIS,
+# para não oscilar com o ruído da posição.
+SEPARATION_DISTANCE = float(os.environ.get("SEPARATION_DISTANCE", "5.0"))
+SEPARATION_HYSTERESIS = 1.0
+
+# A busca do mais próximo expande anéis de células até esse limite; além dele varre todos
+NEAREST_MAX_RINGS = 8
+
+# Maior raio aceito nas consultas de proximidade da API (m)
+PROXIMITY_MAX_RADIUS = 1000.0
+
+Position = Tuple[float, float, float]
+Cell = Tuple[int, int, int]
+
+
+class SpatialGrid:
+    """
+        Hash espacial uniforme em 3D: cada célula é um cubo de `cell_size` metros.
+        Atualizar a posição de um item custa O(1) (só muda de célula quando cruza uma
+        fronteira) e as consultas olham apenas as células que o raio alcança.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.positions: Dict[Hashable, Position] = {}
+        self._cell_of: Dict[Hashable, Cell] = {}
+        self._cells: Dict[Cell, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _cell(self, x: float, y: float, z: float) -> Cell:
+        size = self.cell_size
+        return (math.floor(x / size), math.floor(y / size), math.floor(z / size))
+
+    def update(self, key: Hashable, x: float, y: float, z: float) -> None:
+        cell = self._cell(x, y, z)
+        old = self._cell_of.get(key)
+        if old != cell:
+            if old is not None:
+                members = self._cells[old]
+                members.discard(key)
+                if not members:
+                    del self._cells[old]
+            self._cells.setdefault(cell, set()).add(key)
+            self._cell_of[key] = cell
+        self.positions[key] = (x, y, z)
+
+    def remove(self, key: Hashable) -> None:
+        cell = self._cell_of.pop(key, None)
+        if cell is None:
+            return
+        members = self._cells[cell]
+        members.discard(key)
+        if not members:
+            del self._cells[cell]
+        del self.positions[key]
+
+    def within(self, x: float, y: float, z: float, radius: float,
+               exclude: Hashable = None) -> List[Tuple[Hashable, float]]:
+        """Itens a até `radius` metros do ponto, com a distância"""
+        reach = math.ceil(radius / self.cell_size)
+        cx, cy, cz = self._cell(x, y, z)
+        cells = self._cells
+        positions = self.positions
+        limit = radius * radius
+        found = []
+        if (2 * reach + 1) ** 3 > len(cells):
+            # Raio grande: sai mais barato varrer só as células ocupadas (custo cúbico no raio)
+            candidates = (key for (i, j, k), members in cells.items()
+                          if abs(i - cx) <= reach and abs(j - cy) <= reach and abs(k - cz) <= reach
+                          for key in members)
+        else:
+            candidates = (key for i in range(cx - reach, cx + reach + 1)
+                          for j in range(cy - reach, cy + reach + 1)
+                          for k in range(cz - reach, cz + reach + 1)
+                          for key in cells.get((i, j, k), ()))
+        for key in candidates:
+            if key is exclude:
+                continue
+            px, py, pz = positions[key]
+            distance = (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2
+            if distance <= limit:
+                found.append((key, math.sqrt(distance)))
+        return found
+
+    def nearest(self, x: float, y: float, z: float, k: int = 1,
+                exclude: Hashable = None) -> List[Tuple[Hashable, float]]:
+        """Os `k` itens mais próximos do ponto, do mais próximo para o mais distante"""
+        available = len(self.positions) - (1 if exclude in self.positions else 0)
+        k = min(k, available)
+        if k <= 0:
+            return []
+
+        # Anéis crescentes: depois do anel r, tudo que falta está a mais de r * cell_size
+        for ring in range(NEAREST_MAX_RINGS + 1):
+            found = self.within(x, y, z, (ring + 1) * self.cell_size, exclude)
+            if len(found) >= k:
+                return sorted(found, key=lambda item: item[1])[:k]
+
+        candidates = ((key, math.dist((x, y, z), position)) for key, position in self.positions.items()
+                      if key is not exclude)
+        return heapq.nsmallest(k, candidates, key=lambda item: item[1])
+
+
+class ProximityMonitor:
+    """
+        Mantém o índice espacial da frota a partir do LOCAL_POSITION_NED e emite alertas
+        quando dois drones ficam a menos de `separation` metros. Cada atualização só
+        compara o drone com os vizinhos das células próximas, nunca com a frota inteira.
+    """
+
+    def __init__(self, events: EventBroadcaster, separation: float = SEPARATION_DISTANCE,
+                 hysteresis: float = SEPARATION_HYSTERESIS):
+        self.separation = separation
+        self.hysteresis = hysteresis
+        self.events = events
+        self.grid = SpatialGrid(separation + hysteresis)
+        self.update_seconds = Histogram()
+        self.alerts_raised = 0
+
+        self._names: Dict[Hashable, str] = {}
+        self._conflicts: Dict[Hashable, Set[Hashable]] = {}
+        self._alerts: Dict[frozenset, dict] = {}
+        self._lock = threading.Lock()
+
+    def register(self, drone, name: str) -> None:
+        with self._lock:
+            self._names[drone] = name
+
+    def unregister(self, drone) -> None:
+        with self._lock:
+            self._names.pop(drone, None)
+            self.grid.remove(drone)
+            for other in self._conflicts.pop(drone, set()):
+                self._clear(drone, other, None)
+
+    def update(self, drone, x: float, y: float, z: float) -> None:
+        """Chamado na ingestão para cada LOCAL_POSITION_NED"""
+        start = time.perf_counter()
+        with self._lock:
+            if drone not in self._names:
+                return
+            self.grid.update(drone, x, y, z)
+            clear_distance = self.separation + self.hysteresis
+            neighbors = self.grid.within(x, y, z, clear_distance, exclude=drone)
+
+            conflicts = self._conflicts.get(drone, set())
+            near = set()
+            for other, distance in neighbors:
+                near.add(other)
+                if distance < self.separation and other not in conflicts:
+                    self._raise(drone, other, distance)
+                elif other in conflicts:
+                    self._alerts[frozenset((drone, other))]['distance'] = distance
+            for other in conflicts - near:
+                self._clear(drone, other, self._distance(drone, other))
+            # Dentro do lock: o Histogram tem um único escritor e update roda em vários workers
+            self.update_seconds.observe(time.perf_counter() - start)
+
+    def _distance(self, a, b) -> Optional[float]:
+        positions = self.grid.positions
+        if a not in positions or b not in positions:
+            return None
+        return math.dist(positions[a], positions[b])
+
+    def _raise(self, drone, other, distance: float) -> None:
+        self._conflicts.setdefault(drone, set()).add(other)
+        self._conflicts.setdefault(other, set()).add(drone)
+        alert = {'drones': sorted((self._names[drone], self._names.get(other, '?'))),
+                 'distance': distance, 'separation': self.separation, 'since': time.time()}
+        self._alerts[frozenset((drone, other))] = alert
+        self.alerts_raised += 1
+        self.events.publish({'type': 'separation_alert', **alert})
+
+    def _clear(self, drone, other, distance: Optional[float]) -> None:
+        self._conflicts.get(drone, set()).discard(other)
+        others = self._conflicts.get(other)
+        if others is not None:
+            others.discard(drone)
+            if not others:
+                del self._conflicts[other]
+        if drone in self._conflicts and not self._conflicts[drone]:
+            del self._conflicts[drone]
+        alert = self._alerts.pop(frozenset((drone, other)), None)
+        if alert is not None:
+            self.events.publish({'type': 'separation_cleared', 'drones': alert['drones'], 'distance': distance})
+
+    # ---- consultas ----
+
+    def _named(self, found: List[Tuple[Hashable, float]]) -> List[dict]:
+        names = self._names
+        return [{'connection_string': names[key], 'distance': distance,
+                 'position': dict(zip('xyz', self.grid.positions[key]))}
+                for key, distance in sorted(found, key=lambda item: item[1]) if key in names]
+
+    def position_of(self, drone) -> Optional[Position]:
+        return self.grid.positions.get(drone)
+
+    def near(self, x: float, y: float, z: float, radius: float, exclude=None) -> List[dict]:
+        with self._lock:
+            return self._named(self.grid.within(x, y, z, radius, exclude))
+
+    def nearest(self, x: float, y: float, z: float, k: int = 1, exclude=None) -> List[dict]:
+        with self._lock:
+            return self._named(self.grid.nearest(x, y, z, k, exclude))
+
+    def alerts(self) -> List[dict]:
+        with self._lock:
+            return [dict(alert) for alert in self._alerts.values()]
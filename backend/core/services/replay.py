@@ -0,0 +1,232 @@
+import os
+import gzip
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Iterator, Optional, Tuple
+import orjson
+from pymavlink import mavutil
+
+# Strings de conexão no formato "replay:<arquivo>[@<velocidade>]", ex.: "replay:voo.tlog@10".
+# Velocidade 1 = tempo real, N = N vezes mais rápido, "max" = o mais rápido possível.
+REPLAY_PREFIX = "replay:"
+REPLAY_MAX_SPEED = "max"
+
+ReplayMessage = Tuple[float, object, Optional[str]]  # (timestamp, mensagem, modo de voo)
+
+
+def is_replay(connection_string: str) -> bool:
+    return connection_string.startswith(REPLAY_PREFIX)
+
+
+def parse_replay_connection_string(connection_string: str) -> Tuple[str, float]:
+    """Retorna (nome do arquivo, velocidade); velocidade 0 significa sem espera"""
+    target = connection_string[len(REPLAY_PREFIX):]
+    filename, speed = target, 1.0
+    if '@' in target:
+        filename, speed_str = target.rsplit('@', 1)
+        speed = 0.0 if speed_str == REPLAY_MAX_SPEED else float(speed_str)
+        if speed < 0:
+            raise ValueError(f"Invalid replay speed '{speed_str}'")
+
+    if not filename or os.path.basename(filename) != filename:
+        raise ValueError(f"Invalid replay file '{filename}'")
+    return filename, speed
+
+
+def iter_tlog(path: str) -> Iterator[ReplayMessage]:
+    """Mensagens de uma telemetry log do MAVLink (.tlog), com os timestamps gravados"""
+    log = mavutil.mavlink_connection(path)
+    try:
+        while True:
+            msg = log.recv_match()
+            if msg is None:
+                return
+            yield msg._timestamp, msg, log.flightmode
+    finally:
+        log.close()
+
+
+def iter_flight_log(path: str) -> Iterator[ReplayMessage]:
+    """
+        Reconstrói mensagens MAVLink a partir dos eventos TELEMETRY de um log de voo
+        (flight_logs/*.jsonl[.gz]). Esses logs guardam o estado ~1x por segundo, então
+        o replay tem essa resolução.
+    """
+    encoder = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+
+    def packed(msg):
+        # *_encode só monta a mensagem; o frame binário (get_msgbuf) é o que o forwarding envia
+        msg.pack(encoder)
+        return msg
+
+    mode_numbers = {name: number for number, name in mavutil.mode_mapping_acm.items()}
+    start = None
+
+    with gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = orjson.loads(line)
+            if entry.get('event_type') != 'TELEMETRY':
+                continue
+
+            timestamp = datetime.fromisoformat(entry['timestamp']).timestamp()
+            start = timestamp if start is None else start
+            boot_ms = int((timestamp - start) * 1000)
+            data = entry['data']
+            mode = data.get('mode')
+
+            base_mode = mavutil.mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED
+            if data.get('armed'):
+                base_mode |= mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED
+            yield timestamp, packed(encoder.heartbeat_encode(
+                mavutil.mavlink.MAV_TYPE_QUADROTOR, mavutil.mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA,
+                base_mode, mode_numbers.get(mode, 0), mavutil.mavlink.MAV_STATE_ACTIVE)), mode
+
+            if data.get('position'):
+                position = data['position']
+                yield timestamp, packed(encoder.local_position_ned_encode(
+                    boot_ms, position['x'], position['y'], position['z'], 0, 0, 0)), mode
+            if data.get('attitude'):
+                attitude = data['attitude']
+                yield timestamp, packed(encoder.attitude_encode(
+                    boot_ms, attitude['roll'], attitude['pitch'], attitude['yaw'], 0, 0, 0)), mode
+            if data.get('vfr'):
+                vfr = data['vfr']
+                yield timestamp, packed(encoder.vfr_hud_encode(
+                    vfr['airspeed'], vfr['groundspeed'], int(vfr['heading']), int(vfr['throttle']),
+                    vfr['altitude'], vfr['climb'])), mode
+            if data.get('battery') is not None:
+                yield timestamp, packed(encoder.battery_status_encode(
+                    0, 0, 0, 0, [65535] * 10, -1, -1, -1, int(data['battery']))), mode
+            if data.get('ekf_ok') is not None:
+                flags = 0
+                if data['ekf_ok']:
+                    flags = (mavutil.mavlink.EKF_ATTITUDE | mavutil.mavlink.EKF_VELOCITY_HORIZ |
+                             mavutil.mavlink.EKF_VELOCITY_VERT | mavutil.mavlink.EKF_POS_HORIZ_REL |
+                             mavutil.mavlink.EKF_PRED_POS_HORIZ_REL)
+                yield timestamp, packed(encoder.ekf_status_report_encode(flags, 0, 0, 0, 0, 0)), mode
+
+
+def open_replay_source(path: str) -> Iterator[ReplayMessage]:
+    if path.endswith('.tlog'):
+        return iter_tlog(path)
+    if path.endswith('.jsonl') or path.endswith('.jsonl.gz'):
+        return iter_flight_log(path)
+    raise ValueError(f"Unsupported replay file '{os.path.basename(path)}' (expected .tlog or .jsonl[.gz])")
+
+
+class _NullWriter:
+    def write(self, buf: bytes) -> None:
+        pass
+
+
+class ReplayConnection:
+    """
+        Substitui a conexão do pymavlink em um drone virtual. Comandos são descartados
+        (o replay não tem quem responda), então eles terminam em timeout de ACK.
+    """
+    target_system = 1
+    target_component = 1
+
+    def __init__(self, on_close: Callable[[], None]):
+        self.flightmode = 'UNKNOWN'
+        self.mav = mavutil.mavlink.MAVLink(_NullWriter())
+        self._on_close = on_close
+
+    def recv_match(self, *args, **kwargs):
+        # As mensagens são entregues pela thread do replay, não pela thread de leitura
+        return None
+
+    def mode_mapping(self):
+        return {name: number for number, name in mavutil.mode_mapping_acm.items()}
+
+    def set_mode(self, mode) -> None:
+        pass
+
+    def param_set_send(self, parm_name, parm_value, parm_type=None) -> None:
+        pass
+
+    def write(self, buf: bytes) -> None:
+        pass
+
+    def close(self) -> None:
+        self._on_close()
+
+
+class ReplaySession:
+    """
+        Reproduz um voo gravado em um drone virtual, passando cada mensagem pelo mesmo
+        caminho da ingestão ao vivo (DroneManager._handle_message -> Drone.update_info).
+    """
+
+    def __init__(self, connection_string: str, path: str, speed: float, drone, handle_message):
+        self.connection_string = connection_string
+        self.path = path
+        self.speed = speed
+        self.drone = drone
+        self._handle_message = handle_message
+        self._source = open_replay_source(path)
+
+        self.messages = 0
+        self.errors = 0
+        self.started_at: Optional[float] = None
+        self.elapsed = 0.0
+        self.finished = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        drone.connection = ReplayConnection(self.stop)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name=f"replay-{os.path.basename(self.path)}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def _run(self) -> None:
+        first_timestamp = None
+        self.started_at = time.perf_counter()
+        try:
+            for timestamp, msg, flightmode in self._source:
+                if self._stop.is_set():
+                    break
+
+                if self.speed > 0:
+                    first_timestamp = timestamp if first_timestamp is None else first_timestamp
+                    delay = (timestamp - first_timestamp) / self.speed - (time.perf_counter() - self.started_at)
+                    if delay > 0 and self._stop.wait(delay):
+                        break
+
+                if flightmode is not None:
+                    self.drone.connection.flightmode = flightmode
+                try:
+                    self.drone.forwarding.forward(msg)
+                    self._handle_message(self.drone, msg, timestamp=timestamp)
+                    self.messages += 1
+                except Exception as e:
+                    self.errors += 1
+                    logging.warning(f"Error replaying message {msg.get_type()} from {self.path}: {e}")
+        except Exception as e:
+            logging.error(f"Error reading replay file {self.path}: {e}")
+        finally:
+            self.elapsed = time.perf_counter() - self.started_at
+            self.finished = True
+
+    def stats(self) -> dict:
+        elapsed = self.elapsed if self.finished else time.perf_counter() - (self.started_at or time.perf_counter())
+        return {
+            'connection_string': self.connection_string,
+            'file': os.path.basename(self.path),
+            'speed': self.speed or REPLAY_MAX_SPEED,
+            'messages': self.messages,
+            'errors': self.errors,
+            'elapsed_seconds': elapsed,
+            'messages_per_second': self.messages / elapsed if elapsed > 0 else 0.0,
+            'finished': self.finished
+        }
@@ -0,0 +1,185 @@
+import os
+import mmap
+import time
+import struct
+import logging
+import threading
+from typing import Dict, List, Optional
+from core.services.metrics import Histogram
+from core.services.link_supervisor import LINK_STATES
+from core.services.telemetry_reader import (FLAG_ARMED, FLAG_EKF_OK, GENERATION_OFFSET, HEADER_FORMAT, HEADER_SIZE,
+                                            LAYOUT_VERSION, MAGIC, SEQUENCE_FORMAT, SEQUENCE_SIZE, SLOT_FORMAT,
+                                            SLOT_SIZE, WRITER_PID_OFFSET)
+
+# Arquivo da região compartilhada (vazio = exportação desligada). Em Linux, use /dev/shm
+# para que a região fique só em memória.
+TELEMETRY_EXPORT_PATH = os.environ.get("TELEMETRY_EXPORT_PATH", "")
+TELEMETRY_EXPORT_SLOTS = int(os.environ.get("TELEMETRY_EXPORT_SLOTS", "256"))
+TELEMETRY_EXPORT_RATE = float(os.environ.get("TELEMETRY_EXPORT_RATE", "100"))  # Hz
+
+_NAN = float('nan')
+
+
+def _number(value) -> float:
+    return _NAN if value is None else float(value)
+
+
+class _Slot:
+    __slots__ = ('index', 'name', 'sequence', 'version')
+
+    def __init__(self, index: int, name: bytes):
+        self.index = index
+        self.name = name
+        self.sequence = 0
+        self.version = None
+
+
+class TelemetryExport:
+    """
+        Publica o último estado de cada drone numa região mapeada em memória com layout
+        fixo (ver telemetry_reader), para processos locais lerem sem REST nem JSON.
+        Uma única thread escreve: a cada 1/TELEMETRY_EXPORT_RATE segundos reescreve os
+        slots dos drones cujo telemetry_version mudou, sob o seqlock de cada slot.
+    """
+
+    def __init__(self, path: str, slots: int = TELEMETRY_EXPORT_SLOTS, rate: float = TELEMETRY_EXPORT_RATE):
+        self.path = path
+        self.slots = slots
+        self.rate = rate
+        self.published = 0
+        self.publish_seconds = Histogram()
+
+        size = HEADER_SIZE + slots * SLOT_SIZE
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            self._buffer = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._generation = 0
+        struct.pack_into(HEADER_FORMAT, self._buffer, 0, MAGIC, LAYOUT_VERSION, slots, SLOT_SIZE, os.getpid(), 0)
+
+        self._slot_struct = struct.Struct(SLOT_FORMAT)
+        self._sequence_struct = struct.Struct(SEQUENCE_FORMAT)
+        self._drones: Dict[object, _Slot] = {}
+        self._free: List[int] = list(range(slots - 1, -1, -1))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry-export", daemon=True)
+        self._thread.start()
+
+    # ---- registro ----
+
+    def register(self, drone, connection_string: str) -> None:
+        name = connection_string.encode()[:64]
+        with self._lock:
+            if drone in self._drones or self._buffer.closed:
+                return
+            if not self._free:
+                logging.warning(f"Telemetry export is full ({self.slots} slots); {connection_string} is not exported")
+                return
+            slot = _Slot(self._free.pop(), name)
+            # O contador continua de onde o ocupante anterior parou: leitores em curso percebem a troca
+            slot.sequence = self._sequence_struct.unpack_from(self._buffer, self._offset(slot.index))[0]
+            self._drones[drone] = slot
+            self._write(drone, slot)
+            self._bump_generation()
+
+    def unregister(self, drone) -> None:
+        with self._lock:
+            slot = self._drones.pop(drone, None)
+            if slot is None or self._buffer.closed:
+                return
+            offset = self._offset(slot.index)
+            self._begin(slot, offset)
+            self._buffer[offset + SEQUENCE_SIZE:offset + SLOT_SIZE] = bytes(SLOT_SIZE - SEQUENCE_SIZE)
+            self._end(slot, offset)
+            self._free.append(slot.index)
+            self._bump_generation()
+
+    def _bump_generation(self) -> None:
+        self._generation += 1
+        struct.pack_into("<Q", self._buffer, GENERATION_OFFSET, self._generation)
+
+    # ---- escrita ----
+
+    @staticmethod
+    def _offset(index: int) -> int:
+        return HEADER_SIZE + index * SLOT_SIZE
+
+    def _begin(self, slot: _Slot, offset: int) -> None:
+        slot.sequence += 1  # ímpar: escrita em andamento
+        self._sequence_struct.pack_into(self._buffer, offset, slot.sequence)
+
+    def _end(self, slot: _Slot, offset: int) -> None:
+        slot.sequence += 1
+        self._sequence_struct.pack_into(self._buffer, offset, slot.sequence)
+
+    def _write(self, drone, slot: _Slot) -> None:
+        version = drone.telemetry_version
+        position, attitude, vfr = drone.position, drone.attitude, drone.vfr
+        flags = (FLAG_ARMED if drone.armed else 0) | (FLAG_EKF_OK if drone.ekf_ok else 0)
+        link = LINK_STATES.index(drone.link_state) if drone.link_state in LINK_STATES else 255
+        values = (slot.name, time.time(), version,
+                  _number(position.x), _number(position.y), _number(position.z),
+                  _number(attitude['roll']), _number(attitude['pitch']), _number(attitude['yaw']),
+                  _number(vfr.altitude), _number(vfr.airspeed), _number(vfr.groundspeed), _number(vfr.climb),
+                  _number(vfr.heading), _number(vfr.throttle),
+                  _number(drone.battery_status.level), _number(drone.waypoint_distance),
+                  flags, link, (drone.mode or "").encode()[:16])
+
+        offset = self._offset(slot.index)
+        self._begin(slot, offset)
+        self._slot_struct.pack_into(self._buffer, offset + SEQUENCE_SIZE, *values)
+        self._end(slot, offset)
+        slot.version = version
+        self.published += 1
+
+    def publish(self) -> int:
+        """Reescreve os slots dos drones com telemetria nova; retorna quantos foram escritos"""
+        written = 0
+        with self._lock:
+            if self._buffer.closed:
+                return 0
+            for drone, slot in self._drones.items():
+                if drone.telemetry_version != slot.version:
+                    try:
+                        self._write(drone, slot)
+                        written += 1
+                    except Exception as e:
+                        logging.error(f"Error exporting telemetry of {slot.name.decode()}: {e}")
+                        slot.version = drone.telemetry_version  # não tenta de novo até mudar
+        return written
+
+    def _run(self) -> None:
+        interval = 1 / self.rate
+        while not self._stop.wait(interval):
+            start = time.perf_counter()
+            if self.publish():
+                self.publish_seconds.observe(time.perf_counter() - start)
+
+    def close(self) -> None:
+        """Para o escritor; a região fica no disco com pid 0 para os leitores saberem que parou"""
+        self._stop.set()
+        self._thread.join()
+        with self._lock:
+            if not self._buffer.closed:
+                struct.pack_into("<I", self._buffer, WRITER_PID_OFFSET, 0)
+                self._buffer.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            used = len(self._drones)
+        return {'path': self.path, 'slots': self.slots, 'slot_size': SLOT_SIZE, 'used_slots': used,
+                'rate_hz': self.rate, 'generation': self._generation, 'published': self.published}
+
+
+def create_telemetry_export() -> Optional[TelemetryExport]:
+    """Exportação configurada por TELEMETRY_EXPORT_PATH, ou None se estiver desligada"""
+    if not TELEMETRY_EXPORT_PATH:
+        return None
+    try:
+        return TelemetryExport(TELEMETRY_EXPORT_PATH)
+    except OSError as e:
+        logging.error(f"Could not create telemetry export at {TELEMETRY_EXPORT_PATH}: {e}")
+        return None
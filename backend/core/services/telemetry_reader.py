@@ -0,0 +1,173 @@
+"""
+    Leitura da telemetria exportada em memória compartilhada (ver telemetry_export).
+
+    Só usa a biblioteca padrão, para que outros processos da estação (overlay de vídeo,
+    planejador, análises) possam importar ou copiar este arquivo sem as dependências
+    do backend:
+
+        reader = TelemetryReader("/dev/shm/pilotstation-telemetry")
+        for connection_string, telemetry in reader.snapshot().items():
+            print(connection_string, telemetry.altitude, telemetry.link)
+
+    Layout (little-endian, sem alinhamento implícito):
+        cabeçalho (HEADER_SIZE bytes): magic, versão do layout, número de slots, tamanho
+            do slot, pid do escritor e a geração, que muda quando um drone entra ou sai;
+        slots (slot_size bytes cada): contador de sequência (u64) seguido dos campos
+            de SLOT_FIELDS no formato SLOT_FORMAT. Slot com connection_string vazia está livre.
+
+    O contador de sequência funciona como um seqlock: o escritor o deixa ímpar enquanto
+    reescreve o slot e par ao terminar. O leitor copia os campos e só aceita a cópia se
+    o contador era par e não mudou durante a leitura; não há locks nem chamadas de sistema
+    (a não ser quando o leitor precisa esperar uma escrita em andamento).
+"""
+import mmap
+import time
+import struct
+from typing import Dict, NamedTuple, Optional
+
+MAGIC = b"PSTELEM1"
+LAYOUT_VERSION = 1
+
+HEADER_FORMAT = "<8sIIIIQ"  # magic, versão, slots, tamanho do slot, pid do escritor, geração
+HEADER_SIZE = 64
+WRITER_PID_OFFSET = struct.calcsize("<8sIII")
+GENERATION_OFFSET = struct.calcsize("<8sIIII")
+
+SEQUENCE_FORMAT = "<Q"
+SEQUENCE_SIZE = struct.calcsize(SEQUENCE_FORMAT)
+SLOT_FORMAT = "<64sdQ14dIB16s"
+SLOT_FIELDS = ('connection_string', 'updated_at', 'telemetry_version',
+               'x', 'y', 'z', 'roll', 'pitch', 'yaw',
+               'altitude', 'airspeed', 'groundspeed', 'climb', 'heading', 'throttle',
+               'battery', 'waypoint_distance', 'flags', 'link', 'mode')
+# Slots ocupam linhas de cache inteiras, para que dois drones nunca dividam uma linha
+SLOT_SIZE = -(-(SEQUENCE_SIZE + struct.calcsize(SLOT_FORMAT)) // 64) * 64
+
+FLAG_ARMED = 1
+FLAG_EKF_OK = 2
+
+# Mesma ordem de link_supervisor.LINK_STATES
+LINK_STATES = ("ok", "degraded", "lost")
+
+# Tentativas sem ceder a CPU; depois disso o leitor cede a vez até READ_TIMEOUT segundos
+# (a thread escritora pode perder o GIL no meio de um slot e deixá-lo ímpar por alguns ms)
+READ_SPINS = 100
+READ_TIMEOUT = 0.1
+
+
+class Telemetry(NamedTuple):
+    """Último estado publicado de um drone. Valores desconhecidos são NaN"""
+    connection_string: str
+    updated_at: float  # time.time() da publicação
+    telemetry_version: int
+    x: float
+    y: float
+    z: float
+    roll: float
+    pitch: float
+    yaw: float
+    altitude: float
+    airspeed: float
+    groundspeed: float
+    climb: float
+    heading: float
+    throttle: float
+    battery: float
+    waypoint_distance: float
+    armed: bool
+    ekf_ok: bool
+    link: str
+    mode: str
+
+
+class TelemetryReader:
+    """Leitor da região de telemetria; cada processo consumidor abre a sua instância"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, slots, slot_size, _, _ = struct.unpack_from(HEADER_FORMAT, self._buffer)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            self._buffer.close()
+            raise ValueError(f"{path} is not a PilotStation telemetry export (layout {LAYOUT_VERSION})")
+        self.slots = slots
+        self.slot_size = slot_size
+        self._slot_struct = struct.Struct(SLOT_FORMAT)
+        self._sequence_struct = struct.Struct(SEQUENCE_FORMAT)
+        self._generation = None
+        self._index: Dict[str, int] = {}
+
+    @property
+    def writer_pid(self) -> int:
+        """Pid do backend que escreve a região (0 depois que ele encerra a exportação)"""
+        return struct.unpack_from("<I", self._buffer, WRITER_PID_OFFSET)[0]
+
+    @property
+    def generation(self) -> int:
+        """Muda sempre que um drone é adicionado ou removido da exportação"""
+        return struct.unpack_from("<Q", self._buffer, GENERATION_OFFSET)[0]
+
+    def read_raw(self, slot: int) -> Optional[tuple]:
+        """Cópia consistente dos campos do slot (na ordem de SLOT_FIELDS), ou None se livre"""
+        offset = HEADER_SIZE + slot * self.slot_size
+        buffer = self._buffer
+        sequence = self._sequence_struct.unpack_from
+        fields = self._slot_struct.unpack_from
+        spins, deadline = 0, None
+        while True:
+            before = sequence(buffer, offset)[0]
+            if not before & 1:  # ímpar: escrita em andamento
+                values = fields(buffer, offset + SEQUENCE_SIZE)
+                if sequence(buffer, offset)[0] == before:
+                    return values if values[0][0] else None
+            spins += 1
+            if spins >= READ_SPINS:
+                now = time.monotonic()
+                if deadline is None:
+                    deadline = now + READ_TIMEOUT
+                elif now > deadline:
+                    raise TimeoutError(f"Slot {slot} kept changing while being read")
+                time.sleep(0)
+
+    def read(self, slot: int) -> Optional[Telemetry]:
+        values = self.read_raw(slot)
+        if values is None:
+            return None
+        flags = values[17]
+        return Telemetry(values[0].rstrip(b"\0").decode(), *values[1:17], bool(flags & FLAG_ARMED),
+                         bool(flags & FLAG_EKF_OK), LINK_STATES[values[18]] if values[18] < len(LINK_STATES) else "",
+                         values[19].rstrip(b"\0").decode())
+
+    def _refresh_index(self) -> None:
+        generation = self.generation
+        if generation == self._generation:
+            return
+        index = {}
+        for slot in range(self.slots):
+            values = self.read_raw(slot)
+            if values is not None:
+                index[values[0].rstrip(b"\0").decode()] = slot
+        self._index, self._generation = index, generation
+
+    def get(self, connection_string: str) -> Optional[Telemetry]:
+        """Estado de um drone; o índice de slots só é refeito quando a geração muda"""
+        self._refresh_index()
+        slot = self._index.get(connection_string)
+        if slot is None:
+            return None
+        telemetry = self.read(slot)
+        if telemetry is None or telemetry.connection_string != connection_string:
+            # O slot foi reaproveitado entre a leitura do índice e a do slot
+            self._generation = None
+            return None
+        return telemetry
+
+    def snapshot(self) -> Dict[str, Telemetry]:
+        """Estado de todos os drones exportados (cada um consistente por si)"""
+        self._refresh_index()
+        telemetry = (self.read(slot) for slot in self._index.values())
+        return {item.connection_string: item for item in telemetry if item is not None}
+
+    def close(self) -> None:
+        self._buffer.close()
+
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from api.routes import drone_routes
 from api.routes import log_routes
+from api.routes import fleet_routes
+from api.routes import admin_routes
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI()
@@ -19,3 +21,5 @@ app.add_middleware(
 
 app.include_router(drone_routes.router)
 app.include_router(log_routes.router)
+app.include_router(fleet_routes.router)
+app.include_router(admin_routes.router)
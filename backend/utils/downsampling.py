@@ -0,0 +1,85 @@
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+        Largest-Triangle-Three-Buckets: escolhe `points` índices que preservam o formato
+        visual da série (picos e vales), independente de quantas amostras ela tem.
+        Retorna os índices escolhidos, em ordem crescente.
+    """
+    length = len(x)
+    if points >= length or points < 3:
+        return np.arange(length)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # O primeiro e o último ponto são sempre mantidos; o resto é dividido em buckets
+    edges = np.linspace(1, length - 1, points - 1).astype(np.int64)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = length - 1
+
+    previous = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else length
+
+        # Média do próximo bucket (ou o último ponto) é o terceiro vértice do triângulo
+        if i + 2 < len(edges):
+            avg_x = x[end:next_end].mean()
+            avg_y = y[end:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs((x[previous] - avg_x) * (bucket_y - y[previous]) -
+                       (x[previous] - bucket_x) * (avg_y - y[previous]))
+
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return selected
+
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+        Simplificação de Douglas–Peucker para uma linha 2D/3D: mantém apenas os pontos
+        que se afastam mais de `tolerance` da linha simplificada.
+        Retorna os índices mantidos, em ordem crescente.
+    """
+    length = len(points)
+    if length < 3:
+        return np.arange(length)
+
+    keep = np.zeros(length, dtype=bool)
+    keep[0] = keep[-1] = True
+
+    # Pilha explícita em vez de recursão: trajetórias longas estourariam o limite do Python
+    stack = [(0, length - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        start, end = points[first], points[last]
+        segment = end - start
+        segment_length_sq = float(np.dot(segment, segment))
+        inner = points[first + 1:last]
+
+        if segment_length_sq == 0.0:
+            distances = np.linalg.norm(inner - start, axis=1)
+        else:
+            # Distância de cada ponto até o segmento (projeção limitada às extremidades)
+            t = np.clip((inner - start) @ segment / segment_length_sq, 0.0, 1.0)
+            distances = np.linalg.norm(inner - (start + t[:, None] * segment), axis=1)
+
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return np.flatnonzero(keep)
@@ -9,3 +9,11 @@ class ACKTimeoutException(Exception):
 class CommandFailedException(Exception):
     def __init__(self, message: str):
         super().__init__(message)
+
+class ProfilerBusyException(Exception):
+    def __init__(self):
+        super().__init__("A profile is already running")
+
+class MissionTransferBusyException(Exception):
+    def __init__(self):
+        super().__init__("A mission transfer is already running")
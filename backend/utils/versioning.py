@@ -0,0 +1,9 @@
+import itertools
+
+# Contador global: versões nunca se repetem dentro do processo, nem entre
+# objetos diferentes (por exemplo, um drone reconectado com um novo Drone())
+_version_counter = itertools.count(1)
+
+
+def next_version() -> int:
+    return next(_version_counter)
@@ -6,11 +6,13 @@ import Panel from "./components/Panel";
 import Button from "./components/Button";
 import { useNavigate } from "react-router-dom";
 import { useEffect } from "react";
+import { useFleetEvents } from "./drone/useFleetEvents";
 import "./DroneCardScroll.css"; 
 
 function App() {
   const { drones, disconnectDrone } = useDronesStore();
   const navigate = useNavigate();
+  useFleetEvents(drones.length > 0);
 
   useEffect(() => {
     const handleUnload = () => {
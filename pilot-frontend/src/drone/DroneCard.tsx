@@ -1,4 +1,4 @@
-import React from 'react';
+import React, { useState } from 'react';
 import { toast } from 'react-toastify';
 import DroneInfo from './DroneInfoCard';
 import ModeSelector from './ModeSelector';
@@ -8,6 +8,7 @@ import { Drone, useDronesStore } from '../store/dronesStore';
 import { useNavigate } from 'react-router-dom';
 import Button from '../components/Button';
 import Panel from '../components/Panel';
+import { useStreamDemand } from './useStreamDemand';
 
 interface DroneCardProps {
   drone: Drone;
@@ -18,6 +19,11 @@ const DroneCard: React.FC<DroneCardProps> = ({ drone }) => {
 
   const navigate = useNavigate();
 
+  // A telemetria do card fica sempre visível com a demanda de visão geral que o polling do
+  // dashboard já mantém; só o card expandido pede taxas de detalhe
+  const [expanded, setExpanded] = useState(false);
+  useStreamDemand(drone.connectionString, 'detail', expanded);
+
   function checkIfInArmableMode() {
         if (notArmableModes.includes(drone.info.mode)) {
             toast.error(`${drone.info.mode} is not armable`);
@@ -94,6 +100,9 @@ const DroneCard: React.FC<DroneCardProps> = ({ drone }) => {
         <Button variant="secondary" onClick={handleTakeoffClick}>Takeoff</Button>
       </Panel>
       <DroneInfo info={drone.info} />
+      <Button variant="secondary" onClick={() => setExpanded(!expanded)}>
+        {expanded ? 'Normal telemetry rate' : 'High telemetry rate'}
+      </Button>
       <Button variant="secondary" onClick={handleParametersClick}> Parameters</Button>
     </Panel>
   );
@@ -0,0 +1,81 @@
+import { useEffect, useState } from 'react';
+import { toast } from 'react-toastify';
+import { API_BASE_URL } from '../services/client';
+
+interface SeparationEvent {
+  drones: string[];
+  distance: number | null;
+}
+
+interface GeofenceEvent {
+  connection_string: string;
+  fence_id: number;
+  fence: string;
+  kind: 'inclusion' | 'exclusion';
+}
+
+interface LinkEvent {
+  connection_string: string;
+  previous: 'ok' | 'degraded' | 'lost';
+  last_packet_age: number;
+  loss_percent: number;
+}
+
+/**
+ * Assina o stream de eventos da frota (Server-Sent Events) e mostra alertas de
+ * separação, de cercas e de enlaces perdidos. O toastId evita repetir o mesmo alerta quando o
+ * EventSource reconecta e o backend reenvia os alertas ativos.
+ *
+ * O stream só fica aberto enquanto `enabled` (há drones conectados) e a aba está visível;
+ * ao voltar para a aba, a reabertura recebe os alertas ainda ativos.
+ */
+export function useFleetEvents(enabled: boolean) {
+  const [visible, setVisible] = useState(!document.hidden);
+
+  useEffect(() => {
+    const handleVisibility = () => setVisible(!document.hidden);
+    document.addEventListener('visibilitychange', handleVisibility);
+    return () => document.removeEventListener('visibilitychange', handleVisibility);
+  }, []);
+
+  useEffect(() => {
+    if (!enabled || !visible) {
+      return;
+    }
+    const source = new EventSource(`${API_BASE_URL}/fleet/events`);
+
+    source.addEventListener('separation_alert', (event) => {
+      const data: SeparationEvent = JSON.parse((event as MessageEvent).data);
+      toast.warn(`Separation: ${data.drones.join(' and ')} at ${data.distance?.toFixed(1)} m`,
+                 { toastId: `separation-${data.drones.join('-')}` });
+    });
+    source.addEventListener('separation_cleared', (event) => {
+      const data: SeparationEvent = JSON.parse((event as MessageEvent).data);
+      toast.dismiss(`separation-${data.drones.join('-')}`);
+    });
+    source.addEventListener('geofence_breach', (event) => {
+      const data: GeofenceEvent = JSON.parse((event as MessageEvent).data);
+      const action = data.kind === 'inclusion' ? 'left' : 'entered';
+      toast.error(`${data.connection_string} ${action} geofence "${data.fence}"`,
+                  { toastId: `geofence-${data.connection_string}-${data.fence_id}` });
+    });
+    source.addEventListener('geofence_cleared', (event) => {
+      const data: GeofenceEvent = JSON.parse((event as MessageEvent).data);
+      toast.dismiss(`geofence-${data.connection_string}-${data.fence_id}`);
+    });
+    source.addEventListener('link_lost', (event) => {
+      const data: LinkEvent = JSON.parse((event as MessageEvent).data);
+      toast.error(`Lost link to ${data.connection_string}`, { toastId: `link-${data.connection_string}` });
+    });
+    source.addEventListener('link_restored', (event) => {
+      const data: LinkEvent = JSON.parse((event as MessageEvent).data);
+      // Um enlace perdido costuma voltar passando por "degraded": o toast de perda ainda está aberto
+      if (toast.isActive(`link-${data.connection_string}`)) {
+        toast.dismiss(`link-${data.connection_string}`);
+        toast.info(`Link to ${data.connection_string} restored`);
+      }
+    });
+
+    return () => source.close();
+  }, [enabled, visible]);
+}
@@ -0,0 +1,50 @@
+import { useEffect } from 'react';
+import { v4 as uuid } from 'uuid';
+import { droneApi } from '../services/drones';
+
+// Identifica esta aba para o backend; cada aba tem a sua própria demanda
+const CLIENT_ID = uuid();
+
+// Menor que o watch_ttl do backend (10 s), para a demanda não expirar entre renovações
+const WATCH_RENEW_INTERVAL = 4000;
+
+/**
+ * Pede ao backend taxas de telemetria mais altas para o drone enquanto `enabled`, o
+ * componente estiver montado e a aba visível. Ao desligar, desmontar (ou esconder a aba)
+ * a demanda é retirada e o backend volta às taxas de visão geral/idle.
+ */
+export function useStreamDemand(connectionString: string, level: 'overview' | 'detail' = 'detail',
+                                enabled: boolean = true) {
+  useEffect(() => {
+    if (!enabled) return;
+    let interval: number | null = null;
+
+    const watch = () => droneApi.watch(connectionString, CLIENT_ID, level).catch(() => {});
+
+    const start = () => {
+      if (interval !== null) return;
+      watch();
+      interval = setInterval(watch, WATCH_RENEW_INTERVAL);
+    };
+
+    const stop = () => {
+      if (interval === null) return;
+      clearInterval(interval);
+      interval = null;
+      droneApi.unwatch(connectionString, CLIENT_ID).catch(() => {});
+    };
+
+    const handleVisibilityChange = () => {
+      if (document.visibilityState === 'visible') start();
+      else stop();
+    };
+
+    handleVisibilityChange();
+    document.addEventListener('visibilitychange', handleVisibilityChange);
+
+    return () => {
+      document.removeEventListener('visibilitychange', handleVisibilityChange);
+      stop();
+    };
+  }, [connectionString, level, enabled]);
+}
@@ -3,9 +3,10 @@ import { Vector3 } from "three";
 import Ground, { WORLD_SIZE } from "./Ground";
 import { Line, OrbitControls } from "@react-three/drei";
 import "./WorldMap.css";
-import { useEffect, useState, useMemo } from "react";
+import { useEffect, useState, useMemo, useRef } from "react";
 import { Drone } from "../store/dronesStore";
 import { convertNEDToXYZ } from "../utils/converters";
+import { droneApi } from "../services/drones";
 
 // Predefined colors for drones and their trajectories
 const DRONE_COLORS = [
@@ -21,19 +22,12 @@ const DRONE_COLORS = [
   "#32CD32", // Lime Green
 ];
 
-// Threshold for position change detection (in units)
-const POSITION_CHANGE_THRESHOLD = 0.05;
+// Zoom level sent to the backend track simplification (higher = more detail)
+const TRACK_ZOOM = 8;
+const TRACK_POLLING_INTERVAL = 1000;
 
-/**
- * Function to check if the position has changed significantly
- */
-const hasPositionChanged = (newPos: Vector3, lastPos: Vector3): boolean => {
-  if (!lastPos) return true;
-
-  // Calculate distance between positions
-  const distance = newPos.distanceTo(lastPos);
-  return distance > POSITION_CHANGE_THRESHOLD;
-};
+// Simplified NED track points as returned by the backend
+type TrackPoints = number[][];
 
 const degreesToRadians = (degrees: number): number => {
   return degrees * (Math.PI / 180);
@@ -75,7 +69,10 @@ const DroneObject = ({
 
 function WorldMap({ drones }: { drones: Drone[] }) {
   const initialCameraPosition = new Vector3(2, 2, 2);
-  const [trajectories, setTrajectories] = useState<Record<string, Vector3[]>>({});
+  const [tracks, setTracks] = useState<Record<string, TrackPoints>>({});
+  const tracksRef = useRef<Record<string, TrackPoints>>({});
+  const dronesRef = useRef<Drone[]>(drones);
+  dronesRef.current = drones;
 
   // Create a persistent color mapping for each drone ID
   const droneColorMap = useMemo(() => {
@@ -93,43 +90,46 @@ function WorldMap({ drones }: { drones: Drone[] }) {
   }, [drones.map((d) => d.id).join(",")]); // Only recreate when drone IDs change
 
   useEffect(() => {
-    // Update trajectories for each active drone
-    const newTrajectories = { ...trajectories };
+    // The backend keeps the full track and simplifies it; we only fetch what changed
+    const fetchTracks = async () => {
+      const updates = await Promise.all(dronesRef.current.map(async (drone) => {
+        const current = tracksRef.current[drone.id] || [];
+        try {
+          const response = await droneApi.getTrack(drone.connectionString, TRACK_ZOOM, current.length);
+          const { start, points } = response.data;
+          return [drone.id, current.slice(0, start).concat(points)] as [string, TrackPoints];
+        } catch (error) {
+          return [drone.id, current] as [string, TrackPoints];
+        }
+      }));
 
-    drones.forEach((drone) => {
-      const newPosition = convertNEDToXYZ(drone.worldPosition);
-      const positionVector = new Vector3(
-        newPosition.x,
-        newPosition.y,
-        newPosition.z
-      );
-
-      // Initialize trajectory array if it doesn't exist
-      if (!newTrajectories[drone.id]) {
-        newTrajectories[drone.id] = [];
-      }
+      tracksRef.current = Object.fromEntries(updates);
+      setTracks(tracksRef.current);
+    };
 
-      // Get the last recorded position
-      const lastPosition =
-        newTrajectories[drone.id][newTrajectories[drone.id].length - 1];
-
-      // Only add position if it has changed significantly or it's the first point
-      if (
-        newTrajectories[drone.id].length === 0 ||
-        hasPositionChanged(positionVector, lastPosition)
-      ) {
-        // Add new position to trajectory
-        newTrajectories[drone.id].push(positionVector);
-
-        // Limit trajectory length to prevent performance issues
-        if (newTrajectories[drone.id].length > 100) {
-          newTrajectories[drone.id] = newTrajectories[drone.id].slice(-100);
-        }
-      }
-    });
+    const interval = setInterval(fetchTracks, TRACK_POLLING_INTERVAL);
+    return () => clearInterval(interval);
+  }, []);
 
-    setTrajectories(newTrajectories);
-  }, [drones]);
+  // Tracks are in the drone's local NED frame; shift them to where the drone is drawn
+  const trajectories = useMemo(() => {
+    const result: Record<string, Vector3[]> = {};
+    drones.forEach((drone) => {
+      const points = tracks[drone.id];
+      if (!points || points.length < 2) return;
+
+      const offset = {
+        x: drone.worldPosition.x - drone.info.position.x,
+        y: drone.worldPosition.y - drone.info.position.y,
+        z: drone.worldPosition.z - drone.info.position.z
+      };
+      result[drone.id] = points.map(([x, y, z]) => {
+        const position = convertNEDToXYZ({ x: x + offset.x, y: y + offset.y, z: z + offset.z });
+        return new Vector3(position.x, position.y, position.z);
+      });
+    });
+    return result;
+  }, [tracks, drones]);
 
   // Get active drone IDs to only show trajectories for connected drones
   const activeDroneIds = useMemo(() => new Set(drones.map((d) => d.id)), [
@@ -9,7 +9,7 @@ import Input from '../components/Input';
 import './DroneParameters.css';
 
 import { 
-  parseParameterDefinitions, 
+  parseParameterSearchResults, 
   ParamDefinition,
   getParameterUnit,
   getParameterRange,
@@ -19,9 +19,11 @@ import {
   getDropdownDisplayValue
 } from '../services/parameterParser';
 
-import paramDefinitions from '../assets/parameter_definitions.json';
 import Select from '../components/Select';
 
+const PAGE_SIZE = 50;
+const SEARCH_DEBOUNCE_MS = 250;
+
 
 interface ParameterTableItem extends DroneParameter {
     name: string;
@@ -43,16 +45,13 @@ export function DroneParameters() {
   const [loading, setLoading] = useState(true);
   const [parameters, setParameters] = useState<ParameterDictionary>({});
   const [searchTerm, setSearchTerm] = useState('');
+  const [page, setPage] = useState(1);
+  const [total, setTotal] = useState(0);
   const [paramDefs, setParamDefs] = useState<Record<string, ParamDefinition>>({});
 
   // Find the current drone from our store
   const drone = drones.find(d => d.id === id);
 
-  useEffect(() => {
-    const parsedDefs = parseParameterDefinitions(paramDefinitions);
-    setParamDefs(parsedDefs);
-  }, []);
-
   async function fetchParameters() {
     try {
       setLoading(true);
@@ -62,12 +61,13 @@ export function DroneParameters() {
         return;
       }
 
-      const response = await parameterService.getDroneParameters(drone.connectionString);
-      console.log("here", paramDefs)
+      // The backend filters, ranks and joins the definitions, so only one page is transferred
+      const response = await parameterService.searchParameters(drone.connectionString, searchTerm, page, PAGE_SIZE);
+      const pageDefs = parseParameterSearchResults(response.data.results);
       const paramDictionary: ParameterDictionary = {};
-      Object.entries(response.data).forEach(([name, value]) => {
-        const numValue = parseFloat(value as string);
-        const hasDropdown = hasDropdownValues(name, paramDefs);
+      response.data.results.forEach(({ name, value }) => {
+        const numValue = Number(value);
+        const hasDropdown = hasDropdownValues(name, pageDefs);
 
         paramDictionary[name] = {
           name,
@@ -75,15 +75,17 @@ export function DroneParameters() {
           originalValue: numValue,
           isEditing: false,
           hasChanged: false,
-          unit: getParameterUnit(name, paramDefs),
-          range: getParameterRange(name, paramDefs),
-          description: getParameterDescription(name, paramDefs),
+          unit: getParameterUnit(name, pageDefs),
+          range: getParameterRange(name, pageDefs),
+          description: getParameterDescription(name, pageDefs),
           hasDropdown, 
-          dropdownOptions: hasDropdown ? getDropdownOptions(name, paramDefs) : undefined
+          dropdownOptions: hasDropdown ? getDropdownOptions(name, pageDefs) : undefined
         };
       });
 
+      setParamDefs(pageDefs);
       setParameters(paramDictionary);
+      setTotal(response.data.total);
     } catch (error) {
       console.error("Error fetching parameters:", error);
       toast.error("Failed to load drone parameters");
@@ -98,8 +100,9 @@ export function DroneParameters() {
       return;
     }
     
-    fetchParameters();
-  }, [paramDefs]);
+    const timeout = setTimeout(fetchParameters, SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timeout);
+  }, [searchTerm, page]);
 
   const handleEditClick = (name: string) => {
     setParameters({
@@ -173,8 +176,8 @@ export function DroneParameters() {
     }
   };
 
-  const filteredParameters = Object.values(parameters)
-    .filter(param => param.name.toLowerCase().includes(searchTerm.toLowerCase()));
+  const filteredParameters = Object.values(parameters);
+  const pageCount = Math.max(1, Math.ceil(total / PAGE_SIZE));
 
   if (!drone) {
     return (
@@ -201,9 +204,29 @@ export function DroneParameters() {
         <Input
           placeholder="Search parameters..."
           value={searchTerm}
-          onChange={(e) => setSearchTerm(e.target.value)}
+          onChange={(e) => {
+            setSearchTerm(e.target.value);
+            setPage(1);
+          }}
           fullWidth
         />
+        <Button 
+          variant="secondary" 
+          size="small"
+          onClick={() => setPage(page - 1)}
+          disabled={page <= 1}
+        >
+          Previous
+        </Button>
+        <span>{page} / {pageCount}</span>
+        <Button 
+          variant="secondary" 
+          size="small"
+          onClick={() => setPage(page + 1)}
+          disabled={page >= pageCount}
+        >
+          Next
+        </Button>
       </Panel>
       
       {loading ? (
@@ -1,9 +1,9 @@
 import { apiClient } from './client';
 
 export const droneApi = {
-    connect: (connectionString: string) => {
+    connect: (connectionString: string, worldPosition = { x: 0, y: 0, z: 0 }) => {
         connectionString = connectionString.replace(/\//g, '+');
-        return apiClient.get(`/connect/${connectionString}`);
+        return apiClient.get(`/connect/${connectionString}`, { params: worldPosition });
     },
 
     disconnect: (connectionString: string) =>{
@@ -37,5 +37,29 @@ export const droneApi = {
     getModes: (connectionString: string) => {
         connectionString = connectionString.replace(/\//g, '+');
         return apiClient.get(`/${connectionString}/modes`);
+    },
+
+    watch: (connectionString: string, clientId: string, level: 'overview' | 'detail' = 'detail') => {
+        connectionString = connectionString.replace(/\//g, '+');
+        return apiClient.get(`/${connectionString}/watch`, { params: { client_id: clientId, level } });
+    },
+
+    unwatch: (connectionString: string, clientId: string) => {
+        connectionString = connectionString.replace(/\//g, '+');
+        return apiClient.get(`/${connectionString}/unwatch`, { params: { client_id: clientId } });
+    },
+
+    getTrack: (connectionString: string, zoom: number, since: number = 0) => {
+        connectionString = connectionString.replace(/\//g, '+');
+        return apiClient.get(`/${connectionString}/track`, { params: { zoom, since } });
+    },
+
+    batchCommand: (connectionStrings: string[], command: 'arm' | 'takeoff' | 'set_mode' | 'land',
+                   options: { height?: number, mode?: string } = {}) => {
+        return apiClient.post(`/fleet/commands`, {
+            connection_strings: connectionStrings,
+            command,
+            ...options
+        });
     }
 }
\ No newline at end of file
@@ -1,3 +1,5 @@
+import { ParameterSearchResult } from './parameters';
+
 export interface ParamDefinition {
   name: string;
   displayName: string;
@@ -9,38 +11,21 @@ export interface ParamDefinition {
 }
 
 /**
- * Parses the parameter definition JSON and returns a flattened map of parameter definitions
+ * Converts the backend parameter search results into a map of parameter definitions
  */
-export function parseParameterDefinitions(jsonData: any): Record<string, ParamDefinition> {
+export function parseParameterSearchResults(results: ParameterSearchResult[]): Record<string, ParamDefinition> {
   const paramDefs: Record<string, ParamDefinition> = {};
 
-  // First level - categories
-  Object.entries(jsonData).forEach(([_, categoryParams]) => {
-    if (!categoryParams || typeof categoryParams !== 'object') return;
-    
-    // Second level - parameters within category
-    Object.entries(categoryParams as Record<string, any>).forEach(([paramName, paramDef]) => {
-      if (!paramDef || typeof paramDef !== 'object') return;
-      
-      // Create parameter definition
-      const fullParamName = paramName;
-      paramDefs[fullParamName] = {
-        name: fullParamName,
-        displayName: paramDef.DisplayName || fullParamName,
-        description: paramDef.Description || "No description available",
-        unit: paramDef.Units,
-        values: paramDef.Values,
-        bitmask: paramDef.Bitmask
-      };
-      
-      // Handle range if present
-      if (paramDef.Range) {
-        paramDefs[fullParamName].range = [
-          parseFloat(paramDef.Range.low), 
-          parseFloat(paramDef.Range.high)
-        ];
-      }
-    });
+  results.forEach(result => {
+    paramDefs[result.name] = {
+      name: result.name,
+      displayName: result.display_name || result.name,
+      description: result.description || "No description available",
+      unit: result.unit ?? undefined,
+      range: result.range ?? undefined,
+      values: result.values ?? undefined,
+      bitmask: result.bitmask ?? undefined
+    };
   });
 
   return paramDefs;
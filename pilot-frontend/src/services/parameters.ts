@@ -8,9 +8,33 @@ export interface DroneParameter {
   description?: string;
 }
 
+export interface ParameterSearchResult {
+  name: string;
+  value: number;
+  display_name: string;
+  description: string;
+  unit?: string;
+  range?: [number, number];
+  values?: Record<string, string>;
+  bitmask?: Record<string, string>;
+}
+
+export interface ParameterSearchResponse {
+  query: string;
+  total: number;
+  page: number;
+  page_size: number;
+  results: ParameterSearchResult[];
+}
+
 export const parameterService = {
   getDroneParameters: (connectionString: string) => 
     apiClient.get(`/${connectionString}/drone_parameters`),
+
+  searchParameters: (connectionString: string, query: string, page: number = 1, pageSize: number = 50) =>
+    apiClient.get<ParameterSearchResponse>(`/${connectionString}/parameters/search`, {
+      params: { q: query, page, page_size: pageSize }
+    }),
   
   setParameter: (connectionString: string, paramName: string, value: number) =>
     apiClient.get(`/${connectionString}/set_parameter/${paramName}/${value}`)
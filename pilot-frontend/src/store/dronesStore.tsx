@@ -80,7 +80,7 @@ export const useDronesStore = create<DronesState>((set, get) => {
       set({ isConnecting: true });
       
       try {
-        const response = await droneApi.connect(connectionString);
+        const response = await droneApi.connect(connectionString, initialPosition);
         
         if (response.status != 200 ) {
           toast.error("Error connecting to drone");